@@ -0,0 +1,100 @@
+"""Compares a burst of dashboard statistics queries evaluated one by one
+and as a batch
+
+Queries share the date range (5 years, month bins) and differ in criteria.
+Requests (a GET /statistics per query and a single POST /statistics/batch)
+are timed with SQL and with the in-memory engine (see api.stats_snapshot).
+"""
+
+from datetime import datetime
+
+from common import benchmark_app, timeit
+
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.statistics import BatchQuery, calculate_batch_stats
+from job_tracker.api.stats_snapshot import OffersSnapshot
+from job_tracker.database import db
+
+N_OFFERS = 100_000
+START = datetime(2020, 1, 1)
+END = datetime(2024, 12, 31)
+QUERIES = [
+    BatchQuery("all", START, END, Interval.MONTH),
+    BatchQuery("python", START, END, Interval.MONTH, tags=["Python"]),
+    BatchQuery("java", START, END, Interval.MONTH, tags=["Java", "Selenium"]),
+    BatchQuery("juniors", START, END, Interval.MONTH, job_level="junior"),
+    BatchQuery("full time", START, END, Interval.MONTH, contract_type="full time"),
+    BatchQuery(
+        "senior python",
+        START,
+        END,
+        Interval.MONTH,
+        tags=["Python", "SQL"],
+        job_level="senior",
+    ),
+]
+
+
+def statistics_params(query: BatchQuery) -> dict:
+    params = {
+        "start_date": f"{query.start_date:%Y-%m-%d}",
+        "end_date": f"{query.end_date:%Y-%m-%d}",
+        "binning": query.binning.value,
+    }
+    for name in ("tags", "contract_type", "job_level"):
+        if getattr(query, name) is not None:
+            params[name] = getattr(query, name)
+    return params
+
+
+def batch_spec(query: BatchQuery) -> dict:
+    return {"id": query.id, **statistics_params(query)}
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        app = conxn_app.app
+        client = conxn_app.test_client()
+        with app.app_context():
+            print(f"{N_OFFERS} offers in the db, {START:%Y-%m-%d} - {END:%Y-%m-%d}")
+            snapshot = OffersSnapshot(refresh_seconds=3600)
+            snapshot.refresh(db.session)
+            for engine in ("sql", "memory"):
+                if engine == "sql":
+                    app.extensions.pop("stats_snapshot", None)
+                else:
+                    app.extensions["stats_snapshot"] = snapshot
+                singles = [
+                    timeit(
+                        lambda: calculate_batch_stats([query]),  # noqa: B023
+                        repeat=5,
+                    )
+                    for query in QUERIES
+                ]
+                batch = timeit(lambda: calculate_batch_stats(QUERIES), repeat=5)
+                requests = timeit(
+                    lambda: [
+                        client.get("/api/statistics", params=statistics_params(query))
+                        for query in QUERIES
+                    ],
+                    repeat=5,
+                )
+                batch_request = timeit(
+                    lambda: client.post(
+                        "/api/statistics/batch",
+                        json={"queries": [batch_spec(query) for query in QUERIES]},
+                    ),
+                    repeat=5,
+                )
+                print(
+                    f"{engine:>6}: sum of {len(QUERIES)} queries "
+                    f"{sum(singles) * 1000:.1f} ms, "
+                    f"slowest {max(singles) * 1000:.1f} ms, "
+                    f"batch {batch * 1000:.1f} ms; "
+                    f"{len(QUERIES)} GET requests {requests * 1000:.1f} ms, "
+                    f"batch POST {batch_request * 1000:.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
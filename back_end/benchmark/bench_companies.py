@@ -0,0 +1,66 @@
+"""Compares listing of companies with precomputed numbers of offers
+and with offers counted for every request
+
+A page of the most active companies is read from company_stats
+(companies_query, an index range scan) and with the query the endpoint
+would run otherwise (offers grouped by company and sorted by their
+number). Time of storing new offers (updating the counts included)
+is measured too.
+"""
+
+import time
+
+from bench_concurrent_ingest import collected_offers
+from common import benchmark_app, timeit
+from sqlalchemy import func, select
+
+from job_tracker.api.companies import companies_query
+from job_tracker.database import db
+from job_tracker.models import Company, JobOffer
+from job_tracker.tasks import store_offers
+
+N_OFFERS = 100_000
+N_COMPANIES = 5_000
+N_NEW_OFFERS = 100
+PAGE = 30
+
+
+def counted_companies():
+    offers = func.count(JobOffer.joboffer_id).label("offers")
+    query = (
+        select(Company.company_id, Company.name, Company.website, offers)
+        .join(JobOffer, JobOffer.company_id == Company.company_id)
+        .group_by(Company.company_id)
+        .order_by(offers.desc(), Company.company_id.desc())
+        .limit(PAGE + 1)
+    )
+    return db.session.execute(query).all()
+
+
+def precomputed_companies():
+    return db.session.execute(companies_query("-offers").limit(PAGE + 1)).all()
+
+
+def main():
+    with benchmark_app(N_OFFERS, N_COMPANIES) as conxn_app:
+        with conxn_app.app.app_context():
+            print(f"{N_OFFERS} offers of {N_COMPANIES} companies in the db")
+            counted = timeit(counted_companies, repeat=5)
+            precomputed = timeit(precomputed_companies)
+            print(
+                f"page of {PAGE} companies: counted {counted * 1000:7.1f} ms, "
+                f"precomputed {precomputed * 1000:6.2f} ms"
+            )
+
+            t0 = time.perf_counter()
+            store_offers(
+                collected_offers(N_OFFERS + 1, N_NEW_OFFERS), is_tag_list_available=True
+            )
+            print(
+                f"storing {N_NEW_OFFERS} offers: "
+                f"{(time.perf_counter() - t0) * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
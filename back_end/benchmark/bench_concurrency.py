@@ -0,0 +1,97 @@
+"""Load test of the read endpoints: throughput of 100 concurrent clients
+served by one worker process with 10 threads (connexion's default)
+and with 100 threads (WSGI_WORKERS)
+
+Requests are sent through the ASGI interface of the app (as by uvicorn,
+without the network). Every client sends requests of offers, tags,
+statistics (a different date range each time) and health one after
+another. Queries are run on SQLite as they are and with QUERY_LATENCY
+added to every one of them, emulating the round trip to a database
+server or a slow query that does not use the CPU of the worker.
+"""
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import httpx
+from common import benchmark_app
+from sqlalchemy import event
+
+from job_tracker.database import db
+
+N_OFFERS = 10_000
+N_CLIENTS = 100
+REQUESTS_PER_CLIENT = 8
+QUERY_LATENCY = 0.1  # seconds
+
+
+def requests_of(client_id: int):
+    for n in range(REQUESTS_PER_CLIENT):
+        start = date(2020, 1, 1) + timedelta(days=client_id * 7 + n)
+        yield [
+            ("/api/offers", {"perpagelimit": 20}),
+            ("/api/tags", {"counts": "true"}),
+            (
+                "/api/statistics",
+                {
+                    "start_date": start.isoformat(),
+                    "end_date": (start + timedelta(days=365)).isoformat(),
+                    "binning": "month",
+                },
+            ),
+            ("/api/health", {}),
+        ][n % 4]
+
+
+async def load_test(conxn_app) -> tuple[float, int]:
+    """Returns requests per second and the number of failed requests"""
+    transport = httpx.ASGITransport(app=conxn_app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", timeout=60
+    ) as client:
+        # The middleware stack of the app is built by the first request
+        await client.get("/api/metrics")
+
+        async def run_client(client_id):
+            failed = 0
+            for path, params in requests_of(client_id):
+                response = await client.get(path, params=params)
+                failed += response.status_code != 200
+            return failed
+
+        t0 = time.perf_counter()
+        failed = await asyncio.gather(*map(run_client, range(N_CLIENTS)))
+        elapsed = time.perf_counter() - t0
+    return N_CLIENTS * REQUESTS_PER_CLIENT / elapsed, sum(failed)
+
+
+def main():
+    # Every thread can have its own connection
+    engine_options = {"pool_size": N_CLIENTS, "max_overflow": 0}
+    print(f"{N_OFFERS} offers in the db, {N_CLIENTS} concurrent clients")
+    for workers in (10, N_CLIENTS):
+        with benchmark_app(
+            N_OFFERS,
+            SQLALCHEMY_ENGINE_OPTIONS=engine_options,
+            SINGLE_FLIGHT=False,
+            WSGI_WORKERS=workers,
+        ) as conxn_app:
+            for latency in (0, QUERY_LATENCY):
+                if latency:
+                    with conxn_app.app.app_context():
+
+                        @event.listens_for(db.engine, "before_cursor_execute")
+                        def delay(*args):
+                            time.sleep(latency)
+
+                throughput, failed = asyncio.run(load_test(conxn_app))
+                print(
+                    f"query latency {latency * 1000:4.0f} ms, "
+                    f"{workers:3d} threads: {throughput:6.1f} requests/s"
+                    f" ({failed} failed)"
+                )
+
+
+if __name__ == "__main__":
+    main()
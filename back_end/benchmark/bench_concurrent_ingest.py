@@ -0,0 +1,149 @@
+"""Measures /statistics latency while the scraping task stores new offers
+
+The storing part of the fetch_offers task (store_offers) runs in a separate
+process (like in another gunicorn worker) with randomly generated offers
+(instead of ones scraped with selenium) while this process
+keeps requesting statistics. Offers are stored at a fixed rate (in bursts
+of INGEST_BATCH offers every second) so that both profiles do the same work
+and the difference in latency comes from readers waiting for the writer.
+Both SQLite profiles are compared: the default one (rollback journal,
+where every commit of the writer blocks readers) and the tuned one
+(SQLITE_PRAGMAS of the configuration: WAL etc.).
+"""
+
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from common import JOB_LEVELS, SALARIES, TAG_NAMES, TITLES, TOWNS, benchmark_app
+
+from job_tracker import create_app
+from job_tracker.config import SQLITE_PRAGMAS, BaseConfig
+from job_tracker.extensions import scheduler
+from job_tracker.tasks import store_offers
+
+N_OFFERS = 100_000
+N_NEW_OFFERS = 300
+INGEST_BATCH = 10  # offers stored every second
+# More reader threads of a single process would mostly compete for the GIL
+N_READERS = 1
+PROFILES = {"rollback journal": {}, "tuned (WAL)": SQLITE_PRAGMAS}
+STATISTICS_PARAMS = {
+    "start_date": "2020-01-01",
+    "end_date": "2024-12-31",
+    "binning": "month",
+    "contract_type": "Pełny etat",
+}
+
+
+def collected_offers(first_id: int, n_offers: int, seed: int = 1) -> list:
+    """Returns offers looking like the ones collected by the results page"""
+    rnd = random.Random(seed)
+    now = datetime.now()
+    return [
+        SimpleNamespace(
+            id=offer_id,
+            company_id=rnd.randint(1, 250),  # some companies are new
+            company_name=f"Company {offer_id}",
+            company_link="https://company.pl",
+            title=f"{rnd.choice(TITLES)}, {rnd.choice(TOWNS)}",
+            publication_date=now - timedelta(days=rnd.randrange(30)),
+            webscrap_timestamp=now,
+            contract_type="Pełny etat",
+            job_level=rnd.choice(JOB_LEVELS),
+            salary=rnd.choice(SALARIES),
+            link=f"https://www.pracuj.pl/praca/tester,oferta,{offer_id}",
+            technology_tags=rnd.sample(TAG_NAMES, rnd.randint(0, 3)),
+        )
+        for offer_id in range(first_id, first_id + n_offers)
+    ]
+
+
+def ingest(database_uri: str, pragmas: dict, first_id: int, durations) -> None:
+    """Stores new offers the way the fetch_offers task does
+
+    Total time spent storing offers is put into durations queue.
+    """
+
+    class IngestConfig(BaseConfig):
+        SQLALCHEMY_DATABASE_URI = database_uri
+        SQLITE_PRAGMAS = pragmas
+        WARM_UP = False
+
+    conxn_app = create_app(custom_config=IngestConfig)
+    scheduler.shutdown(wait=False)
+    offers = collected_offers(first_id, N_NEW_OFFERS)
+    busy = 0.0
+    with conxn_app.app.app_context():
+        for i in range(0, N_NEW_OFFERS, INGEST_BATCH):
+            t0 = time.perf_counter()
+            store_offers(offers[i : i + INGEST_BATCH], is_tag_list_available=True)
+            duration = time.perf_counter() - t0
+            busy += duration
+            time.sleep(max(0.0, 1 - duration))
+    durations.put(busy)
+
+
+def read_statistics(client, stop: threading.Event, latencies: list, errors: list):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        response = client.get("/api/statistics", params=STATISTICS_PARAMS)
+        latencies.append(time.perf_counter() - t0)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+def main():
+    print(
+        f"{N_OFFERS} offers in the db, storing {N_NEW_OFFERS} new offers, "
+        f"{N_READERS} thread(s) requesting statistics"
+    )
+    context = multiprocessing.get_context("spawn")
+    for profile, pragmas in PROFILES.items():
+        with benchmark_app(N_OFFERS, SQLITE_PRAGMAS=pragmas) as conxn_app:
+            durations = context.Queue()
+            writer = context.Process(
+                target=ingest,
+                args=(
+                    conxn_app.app.config["SQLALCHEMY_DATABASE_URI"],
+                    pragmas,
+                    N_OFFERS + 1,
+                    durations,
+                ),
+            )
+            stop = threading.Event()
+            latencies, errors = [], []
+            readers = [
+                threading.Thread(
+                    target=read_statistics,
+                    args=(conxn_app.test_client(), stop, latencies, errors),
+                )
+                for _ in range(N_READERS)
+            ]
+            t0 = time.perf_counter()
+            writer.start()
+            for reader in readers:
+                reader.start()
+            ingest_busy = durations.get()
+            writer.join()
+            stop.set()
+            for reader in readers:
+                reader.join()
+            duration = time.perf_counter() - t0
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{profile:>16}: "
+            f"storing an offer {ingest_busy / N_NEW_OFFERS * 1000:5.1f} ms, "
+            f"statistics p50 {quantiles[49] * 1000:6.1f} ms, "
+            f"p95 {quantiles[94] * 1000:6.1f} ms, "
+            f"max {max(latencies) * 1000:7.1f} ms, "
+            f"{len(latencies) / duration:5.1f} requests/s, {len(errors)} errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Compares loading the dashboard with separate requests (statistics
+and tags) and with the dashboard endpoint (computed and cached)
+
+Times are of the requests served by the app only, every request
+made by the frontend adds a network round trip on top of them.
+"""
+
+from common import benchmark_app, timeit
+
+from job_tracker.api.dashboard import DEFAULT_VIEW
+
+N_OFFERS = 100_000
+STATISTICS_PARAMS = {name: value for name, value in DEFAULT_VIEW.items() if value}
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        client = conxn_app.test_client()
+        config = conxn_app.app.config
+
+        def separate_requests():
+            client.get("/api/statistics", params=STATISTICS_PARAMS)
+            client.get("/api/tags", params={"counts": "true"})
+
+        print(f"{N_OFFERS} offers in the db")
+        separate = timeit(separate_requests, repeat=5)
+        config["DASHBOARD_CACHE_SECONDS"] = 0
+        computed = timeit(lambda: client.get("/api/dashboard"), repeat=5)
+        config["DASHBOARD_CACHE_SECONDS"] = 60
+        cached = timeit(lambda: client.get("/api/dashboard"))
+        print(f"statistics + tags (2 requests): {separate * 1000:6.1f} ms")
+        print(f"dashboard (computed):           {computed * 1000:6.1f} ms")
+        print(f"dashboard (cached):             {cached * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compares series of several tags counted with a call per tag
+and with a single grouped query
+
+Offers posted over 5 years are counted in month bins for every tag
+of the dashboard chart, by calling calculate_stats once per tag
+and by calculate_grouped_stats (one query, optionally top N + other),
+with SQL and with the in-memory engine (see api.stats_snapshot).
+"""
+
+from datetime import datetime
+
+from common import benchmark_app, timeit
+
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.statistics import calculate_grouped_stats, calculate_stats
+from job_tracker.api.stats_snapshot import OffersSnapshot
+from job_tracker.database import db
+
+N_OFFERS = 100_000
+START = datetime(2020, 1, 1)
+END = datetime(2024, 12, 31)
+TAGS = ["Python", "Java", "Go", "SQL", "Docker"]
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        with conxn_app.app.app_context():
+            print(f"{N_OFFERS} offers in the db, {START:%Y-%m-%d} - {END:%Y-%m-%d}")
+            snapshot = OffersSnapshot(refresh_seconds=3600)
+            snapshot.refresh(db.session)
+            for engine in ("sql", "memory"):
+                if engine == "sql":
+                    conxn_app.app.extensions.pop("stats_snapshot", None)
+                else:
+                    conxn_app.app.extensions["stats_snapshot"] = snapshot
+                separate = timeit(
+                    lambda: [
+                        calculate_stats(START, END, Interval.MONTH, [tag])
+                        for tag in TAGS
+                    ],
+                    repeat=5,
+                )
+                grouped = timeit(
+                    lambda: calculate_grouped_stats(
+                        START, END, Interval.MONTH, "tag", groups=TAGS
+                    ),
+                    repeat=5,
+                )
+                top = timeit(
+                    lambda: calculate_grouped_stats(
+                        START, END, Interval.MONTH, "tag", top=5
+                    ),
+                    repeat=5,
+                )
+                print(
+                    f"{engine:>6}, {len(TAGS)} tags: "
+                    f"separate calls {separate * 1000:.1f} ms, "
+                    f"grouped {grouped * 1000:.1f} ms, "
+                    f"top 5 + other {top * 1000:.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
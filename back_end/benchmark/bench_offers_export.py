@@ -0,0 +1,37 @@
+"""Checks that memory used by the export does not depend on the number of offers
+
+Peak memory allocated while producing the whole export is measured
+with tracemalloc for databases of increasing size.
+The export handler is called directly inside a request context
+(the test client would buffer the whole response body itself).
+"""
+
+import sys
+import tracemalloc
+
+from common import benchmark_app
+
+from job_tracker.api.offers import export
+
+
+def main():
+    for n_offers in (10_000, 50_000, 100_000):
+        with benchmark_app(n_offers) as conxn_app:
+            for export_format in ("ndjson", "csv"):
+                with conxn_app.app.test_request_context(
+                    "/api/offers/export", query_string={"format": export_format}
+                ):
+                    tracemalloc.start()
+                    response = export()
+                    n_bytes = sum(len(chunk) for chunk in response.response)
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                print(
+                    f"{n_offers:7d} offers, {export_format:>6}: "
+                    f"{n_bytes / 2**20:7.1f} MiB sent, "
+                    f"peak memory {peak / 2**20:6.1f} MiB"
+                )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
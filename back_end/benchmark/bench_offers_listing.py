@@ -0,0 +1,61 @@
+"""Compares the cost of building a subpage of the offers list
+
+before: JobOffer objects serialized with joboffers_schema
+        (tags lazy loaded one offer at a time)
+after:  plain rows serialized with serialize_offers
+        (tags of all offers loaded with one query)
+"""
+
+import sys
+
+from common import benchmark_app, count_queries, timeit
+from sqlalchemy import select
+
+from job_tracker.api.offers import listing_columns, serialize_offers
+from job_tracker.database import db
+from job_tracker.models import JobOffer, joboffers_schema
+
+N_OFFERS = 20_000
+PER_PAGE = 30
+
+
+def before(offset):
+    offers = db.session.scalars(
+        select(JobOffer)
+        .order_by(JobOffer.posted, JobOffer.joboffer_id)
+        .limit(PER_PAGE)
+        .offset(offset)
+    ).all()
+    result = joboffers_schema.dump(offers)
+    # Drop loaded objects so that every run starts cold.
+    db.session.expunge_all()
+    return result
+
+
+def after(offset):
+    rows = db.session.execute(
+        select(*listing_columns)
+        .order_by(JobOffer.posted, JobOffer.joboffer_id)
+        .limit(PER_PAGE)
+        .offset(offset)
+    ).all()
+    return serialize_offers(rows)
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        with conxn_app.app.app_context():
+            assert before(0) == after(0)
+            print(f"{N_OFFERS} offers in the db, {PER_PAGE} offers per subpage")
+            for name, fn in (("before", before), ("after", after)):
+                with count_queries(db.engine) as statements:
+                    fn(PER_PAGE)
+                best = timeit(lambda fn=fn: fn(PER_PAGE))
+                print(
+                    f"{name:>7}: {len(statements):3d} queries per subpage, "
+                    f"{best / PER_PAGE * 1e6:8.1f} µs per offer"
+                )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
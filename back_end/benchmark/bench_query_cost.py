@@ -0,0 +1,51 @@
+"""Compares responses of ten years of daily statistics streamed
+and encoded as a whole, and the cost of rejecting such requests
+
+The number of bins is not limited while the responses are compared
+(STATISTICS_MAX_BINS = 0). Time of the request and peak memory allocated
+while it is served (tracemalloc, Python objects only) are measured.
+"""
+
+import time
+import tracemalloc
+
+from common import benchmark_app, timeit
+
+N_OFFERS = 100_000
+TEN_YEARS_DAILY = {
+    "start_date": "2015-01-01",
+    "end_date": "2024-12-31",
+    "binning": "day",
+}
+
+
+def measure(client):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    response = client.get("/api/statistics", params=TEN_YEARS_DAILY)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert response.status_code == 200
+    return elapsed, peak, len(response.content)
+
+
+def main():
+    with benchmark_app(N_OFFERS, STATISTICS_MAX_BINS=0) as conxn_app:
+        client = conxn_app.test_client()
+        config = conxn_app.app.config
+        client.get("/api/statistics", params=TEN_YEARS_DAILY)
+        for name, min_items in (("encoded as a whole", 0), ("streamed", 1000)):
+            config["STATISTICS_STREAM_MIN_ITEMS"] = min_items
+            elapsed, peak, size = measure(client)
+            print(
+                f"{name:>18}: {elapsed * 1000:6.1f} ms, "
+                f"peak {peak / 1024:7.0f} KiB, {size} bytes"
+            )
+        config["STATISTICS_MAX_BINS"] = 2000
+        rejected = timeit(lambda: client.get("/api/statistics", params=TEN_YEARS_DAILY))
+        print(f"{'rejected':>18}: {rejected * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compares response encoding: JSON encoders and compression
+
+Payloads:
+- daily statistics for 5 years (as returned by /statistics)
+- a subpage of 30 offers with long detailsurl values (as returned by /offers)
+"""
+
+import sys
+import zlib
+
+import brotli
+from common import benchmark_app, timeit
+from flask import json
+
+from job_tracker.json_provider import OrjsonProvider, json_providers
+
+
+def main():
+    with benchmark_app(20_000) as conxn_app:
+        client = conxn_app.test_client()
+        payloads = {
+            "statistics (5y daily)": client.get(
+                "/api/statistics",
+                params={
+                    "start_date": "2020-01-01",
+                    "end_date": "2024-12-31",
+                    "binning": "day",
+                },
+            ).json(),
+            "offers (30 per subpage)": client.get(
+                "/api/offers", params={"perpagelimit": 30}
+            ).json(),
+        }
+        flask_app = conxn_app.app
+        encoders = {
+            "json indent=2 (before)": (json_providers["default"](flask_app), 2),
+            "json compact": (json_providers["default"](flask_app), None),
+            "orjson": (OrjsonProvider(flask_app), None),
+        }
+        with flask_app.app_context():
+            for payload_name, payload in payloads.items():
+                print(payload_name)
+                for encoder_name, (provider, indent) in encoders.items():
+                    flask_app.json = provider
+                    best = timeit(lambda: json.dumps(payload, indent=indent), 50)
+                    print(f"  {encoder_name:>24}: {best * 1e6:8.1f} µs")
+                flask_app.json = encoders["json indent=2 (before)"][0]
+                indented = json.dumps(payload, indent=2).encode()
+                flask_app.json = encoders["orjson"][0]
+                encoded = json.dumps(payload).encode()
+                sizes = {
+                    "indent=2 (before)": len(indented),
+                    "uncompressed": len(encoded),
+                    "gzip (level 6)": len(zlib.compress(encoded, 6)),
+                    "brotli (quality 4)": len(brotli.compress(encoded, quality=4)),
+                }
+                for name, size in sizes.items():
+                    print(f"  {name:>24}: {size:8d} bytes")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Measures the time of the full-text search of offers
+
+First page of offers matching a phrase found with the full-text index
+(ranked by relevance) compared with LIKE conditions (which have to scan
+the whole table), for common and rare phrases.
+"""
+
+from common import benchmark_app, timeit
+from sqlalchemy import func, select
+
+from job_tracker.api.offers import listing_columns, search_query
+from job_tracker.database import db
+from job_tracker.fulltext import search_terms
+from job_tracker.models import Company, JobOffer
+
+N_OFFERS = 1_000_000
+PER_PAGE = 30
+PHRASES = ("tester warszawa", "kierownik gdansk", "analityk testow zdalnie")
+
+
+def like_query(terms: list[str]):
+    """Search the way it could be done without the full-text index"""
+    document = func.lower(JobOffer.title + " " + Company.name)
+    return (
+        select(*listing_columns)
+        .join(Company, Company.company_id == JobOffer.company_id)
+        .where(*(document.like(f"%{term}%") for term in terms))
+        .order_by(JobOffer.joboffer_id.desc())
+    )
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        with conxn_app.app.app_context():
+            print(f"{N_OFFERS} offers in the db, {PER_PAGE} offers per page")
+            dialect_name = db.engine.dialect.name
+            for phrase in PHRASES:
+                terms = search_terms(phrase)
+                for name, query in (
+                    ("full-text", search_query(dialect_name, terms, [])),
+                    # LIKE does not fold diacritics, only ascii phrases compared
+                    ("LIKE", like_query(terms)),
+                ):
+                    query = query.limit(PER_PAGE)
+                    found = len(db.session.execute(query).all())
+                    duration = timeit(
+                        lambda: db.session.execute(query).all(),  # noqa: B023
+                        repeat=5,
+                    )
+                    print(
+                        f"{phrase!r:>30} {name:>9}: {duration * 1000:8.1f} ms "
+                        f"({found} offers)"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compares identical concurrent statistics requests with and without
+coalescing (single flight)
+
+N_CLIENTS clients request the default view of the dashboard (a year
+of daily statistics) at the same time, with coalescing enabled
+and disabled. Time until all of them are served and the number
+of SQL statements run are measured.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import benchmark_app, count_queries
+
+from job_tracker.database import db
+
+N_OFFERS = 100_000
+N_CLIENTS = 16
+DEFAULT_VIEW = {
+    "start_date": "2024-01-01",
+    "end_date": "2024-12-31",
+    "binning": "day",
+    "contract_type": "Pełny etat",
+}
+
+
+def main():
+    for single_flight in (False, True):
+        with benchmark_app(N_OFFERS, SINGLE_FLIGHT=single_flight) as conxn_app:
+            client = conxn_app.test_client()
+            with conxn_app.app.app_context():
+                engine = db.engine
+            # Warm up (page cache of the database file)
+            client.get("/api/statistics", params=DEFAULT_VIEW)
+            with count_queries(engine) as statements, ThreadPoolExecutor(
+                N_CLIENTS
+            ) as executor:
+                t0 = time.perf_counter()
+                responses = list(
+                    executor.map(
+                        lambda _: client.get("/api/statistics", params=DEFAULT_VIEW),
+                        range(N_CLIENTS),
+                    )
+                )
+                elapsed = time.perf_counter() - t0
+            assert all(response.status_code == 200 for response in responses)
+            print(
+                f"single flight {'on' if single_flight else 'off':>3}: "
+                f"{N_CLIENTS} requests in {elapsed * 1000:7.1f} ms, "
+                f"{len(statements)} SQL statements, "
+                f"metrics: {client.get('/api/metrics').json()['single_flight']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
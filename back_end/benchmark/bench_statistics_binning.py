@@ -0,0 +1,38 @@
+"""Measures the time of calculating statistics for each binning method
+
+Offers posted over 5 years are counted in day, month and year bins
+(whole range and with a contract type criterion).
+"""
+
+from datetime import datetime
+
+from common import benchmark_app, timeit
+
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.statistics import calculate_stats
+
+N_OFFERS = 100_000
+START = datetime(2020, 1, 1)
+END = datetime(2024, 12, 31)
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        with conxn_app.app.app_context():
+            print(f"{N_OFFERS} offers in the db, {START:%Y-%m-%d} - {END:%Y-%m-%d}")
+            for binning in (Interval.DAY, Interval.MONTH, Interval.YEAR):
+                for contract_type in (None, "Pełny etat"):
+                    duration = timeit(
+                        lambda: calculate_stats(
+                            START, END, binning, contract_type=contract_type
+                        ),
+                        repeat=5,
+                    )
+                    print(
+                        f"{binning.value:>5} bins, contract type {contract_type}: "
+                        f"{duration * 1000:8.1f} ms"
+                    )
+
+
+if __name__ == "__main__":
+    main()
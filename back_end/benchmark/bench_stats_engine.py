@@ -0,0 +1,80 @@
+"""Compares statistics calculated with SQL and with the in-memory engine
+
+Offers posted over 5 years are counted in month and day bins with
+different combinations of criteria (like the ones used by the dashboard),
+with SQL queries and in the snapshot of offers (see api.stats_snapshot).
+Time of building the snapshot and of refreshing it after new offers
+are stored is measured too.
+"""
+
+import time
+from datetime import datetime
+
+from bench_concurrent_ingest import collected_offers
+from common import benchmark_app, timeit
+
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.statistics import calculate_stats
+from job_tracker.api.stats_snapshot import OffersSnapshot
+from job_tracker.database import db
+from job_tracker.tasks import store_offers
+
+N_OFFERS = 100_000
+N_NEW_OFFERS = 100
+START = datetime(2020, 1, 1)
+END = datetime(2024, 12, 31)
+CRITERIA = {
+    "no criteria": {},
+    "contract type": {"contract_type": "Pełny etat"},
+    "job level": {"job_level": "junior"},
+    "1 tag": {"tags": ["Python"]},
+    "3 tags": {"tags": ["Python", "SQL", "Docker"]},
+    "level and 2 tags": {"job_level": "senior", "tags": ["Java", "Selenium"]},
+}
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        app = conxn_app.app
+        with app.app_context():
+            print(f"{N_OFFERS} offers in the db, {START:%Y-%m-%d} - {END:%Y-%m-%d}")
+            snapshot = OffersSnapshot(refresh_seconds=3600)
+            t0 = time.perf_counter()
+            snapshot.refresh(db.session)
+            print(f"building the snapshot: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+            for binning in (Interval.MONTH, Interval.DAY):
+                for name, criteria in CRITERIA.items():
+                    durations = []
+                    for engine in (None, snapshot):
+                        if engine is None:
+                            app.extensions.pop("stats_snapshot", None)
+                        else:
+                            app.extensions["stats_snapshot"] = engine
+                        durations.append(
+                            timeit(
+                                lambda: calculate_stats(
+                                    START, END, binning, **criteria  # noqa: B023
+                                ),
+                                repeat=5,
+                            )
+                        )
+                    print(
+                        f"{binning.value:>5} bins, {name:>16}: "
+                        f"sql {durations[0] * 1000:7.1f} ms, "
+                        f"memory {durations[1] * 1000:6.1f} ms"
+                    )
+
+            store_offers(
+                collected_offers(N_OFFERS + 1, N_NEW_OFFERS), is_tag_list_available=True
+            )
+            t0 = time.perf_counter()
+            snapshot.refresh(db.session)
+            print(
+                f"refreshing the snapshot after storing {N_NEW_OFFERS} offers: "
+                f"{(time.perf_counter() - t0) * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
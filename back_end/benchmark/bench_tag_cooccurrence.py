@@ -0,0 +1,80 @@
+"""Compares co-occurrence of tags counted from monthly counts of pairs
+of tags and with a self-join of tags of offers
+
+Offers posted over 5 years (of one year and of all of them) are counted
+with calculate_tag_cooccurrence (sums of tag_pair_month rows) and with
+the query the endpoint would run otherwise (joboffer_tag joined
+with itself). Time of storing new offers (counting their pairs of tags
+included) is measured too.
+"""
+
+import time
+from datetime import datetime
+
+from bench_concurrent_ingest import collected_offers
+from common import benchmark_app, timeit
+from sqlalchemy import and_, func, select
+
+from job_tracker.api.statistics import calculate_tag_cooccurrence
+from job_tracker.database import db
+from job_tracker.models import JobOffer, joboffer_tag
+from job_tracker.tasks import store_offers
+
+N_OFFERS = 100_000
+N_NEW_OFFERS = 100
+RANGES = {
+    "1 year": (datetime(2024, 1, 1), datetime(2024, 12, 31)),
+    "5 years": (datetime(2020, 1, 1), datetime(2024, 12, 31)),
+}
+
+
+def self_join_cooccurrence(start_date: datetime, end_date: datetime):
+    other = joboffer_tag.alias()
+    query = (
+        select(joboffer_tag.c.tag_id, other.c.tag_id, func.count())
+        .join(JobOffer, JobOffer.joboffer_id == joboffer_tag.c.joboffer_id)
+        .join(
+            other,
+            and_(
+                other.c.joboffer_id == joboffer_tag.c.joboffer_id,
+                other.c.tag_id >= joboffer_tag.c.tag_id,
+            ),
+        )
+        .where(JobOffer.posted_date.between(start_date.date(), end_date.date()))
+        .group_by(joboffer_tag.c.tag_id, other.c.tag_id)
+    )
+    return db.session.execute(query).all()
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        with conxn_app.app.app_context():
+            print(f"{N_OFFERS} offers in the db")
+            for name, (start_date, end_date) in RANGES.items():
+                self_join = timeit(
+                    lambda: self_join_cooccurrence(start_date, end_date),  # noqa: B023
+                    repeat=5,
+                )
+                rollup = timeit(
+                    lambda: calculate_tag_cooccurrence(  # noqa: B023
+                        start_date, end_date, 10
+                    ),
+                    repeat=5,
+                )
+                print(
+                    f"{name:>7}: self-join {self_join * 1000:7.1f} ms, "
+                    f"monthly pairs {rollup * 1000:6.1f} ms"
+                )
+
+            t0 = time.perf_counter()
+            store_offers(
+                collected_offers(N_OFFERS + 1, N_NEW_OFFERS), is_tag_list_available=True
+            )
+            print(
+                f"storing {N_NEW_OFFERS} offers: "
+                f"{(time.perf_counter() - t0) * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
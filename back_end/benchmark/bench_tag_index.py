@@ -0,0 +1,79 @@
+"""Compares statistics of offers having several tags with and without
+the tag index
+
+Offers posted over 5 years are counted in month bins with SQL queries
+matching tags with a subquery per tag and with the offers found
+by intersecting bitmaps of the tag index (see api.tag_index).
+Time of building the index and of counting offers having each tag
+(/tags?counts=true) is measured too.
+"""
+
+import time
+from datetime import datetime
+
+from common import benchmark_app, timeit
+
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.statistics import calculate_stats
+from job_tracker.api.tag_index import TagIndex
+from job_tracker.api.tags import tag_counts
+from job_tracker.database import db
+
+N_OFFERS = 100_000
+START = datetime(2020, 1, 1)
+END = datetime(2024, 12, 31)
+TAGS = {
+    "1 tag": ["Python"],
+    "2 tags": ["Java", "Selenium"],
+    "3 tags": ["Python", "SQL", "Docker"],
+    "4 tags": ["Python", "SQL", "Docker", "AWS"],
+}
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        app = conxn_app.app
+        with app.app_context():
+            print(f"{N_OFFERS} offers in the db, {START:%Y-%m-%d} - {END:%Y-%m-%d}")
+            index = TagIndex(refresh_seconds=3600)
+            t0 = time.perf_counter()
+            index.refresh(db.session)
+            print(f"building the index: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+            for name, tags in TAGS.items():
+                durations = []
+                for tag_index in (None, index):
+                    if tag_index is None:
+                        app.extensions.pop("tag_index", None)
+                    else:
+                        app.extensions["tag_index"] = tag_index
+                    durations.append(
+                        timeit(
+                            lambda: calculate_stats(
+                                START, END, Interval.MONTH, tags  # noqa: B023
+                            ),
+                            repeat=5,
+                        )
+                    )
+                matching = len(index.matching(db.session, tags))
+                print(
+                    f"{name:>7} ({matching:>5} offers): "
+                    f"sql {durations[0] * 1000:7.1f} ms, "
+                    f"index {durations[1] * 1000:6.1f} ms"
+                )
+
+            durations = []
+            for tag_index in (None, index):
+                if tag_index is None:
+                    app.extensions.pop("tag_index", None)
+                else:
+                    app.extensions["tag_index"] = tag_index
+                durations.append(timeit(tag_counts, repeat=5))
+            print(
+                f"tag counts: sql {durations[0] * 1000:.1f} ms, "
+                f"index {durations[1] * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
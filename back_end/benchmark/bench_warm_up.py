@@ -0,0 +1,50 @@
+"""Compares the first dashboard requests after new offers were stored
+with and without the warm-up of the dashboard cache
+
+Every request is the first one of its view since the offers were stored
+(the cache is emptied before each round). Time of the warm-up itself
+(run in a background thread by the app) is reported separately.
+"""
+
+import time
+
+from common import benchmark_app
+
+from job_tracker.api import dashboard
+from job_tracker.api.warm_up import WarmUp
+
+N_OFFERS = 100_000
+ROUNDS = 5
+
+
+def first_requests(client, views):
+    t0 = time.perf_counter()
+    for params in views:
+        assert client.get("/api/dashboard", params=params).status_code == 200
+    return (time.perf_counter() - t0) / len(views)
+
+
+def main():
+    with benchmark_app(N_OFFERS) as conxn_app:
+        client = conxn_app.test_client()
+        warm_up = WarmUp(views=[{}], top_tags=5, budget_seconds=30)
+        # the default view and the ones of the 3 most common tags
+        tags = client.get("/api/dashboard").json()["tags"]
+        views = [{}] + [{"tags": tag["name"]} for tag in tags[:3]]
+        print(f"{N_OFFERS} offers in the db")
+        cold = warm = warm_up_seconds = 0.0
+        for _ in range(ROUNDS):
+            dashboard._cache.clear()
+            cold += first_requests(client, views)
+            dashboard._cache.clear()
+            result = warm_up.run(conxn_app.app)
+            warm_up_seconds += result["seconds"]
+            warm += first_requests(client, views)
+        print(f"views warmed up: {result['cached']}")
+        print(f"first request (cold):      {cold / ROUNDS * 1000:6.1f} ms")
+        print(f"first request (warmed up): {warm / ROUNDS * 1000:6.1f} ms")
+        print(f"warm-up (background):      {warm_up_seconds / ROUNDS * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
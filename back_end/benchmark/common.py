@@ -0,0 +1,167 @@
+"""Helpers shared by the benchmark scripts
+
+Benchmarks are not part of the test suite. They are meant to be run
+manually from the back_end directory, eg.:
+python benchmark/bench_offers_listing.py
+"""
+
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from job_tracker import create_app
+from job_tracker.backfill import backfill_all
+from job_tracker.config import BaseConfig
+from job_tracker.database import db
+from job_tracker.extensions import scheduler
+from job_tracker.models import Company, JobOffer, Tag, joboffer_tag
+
+TAG_NAMES = [
+    "Python",
+    "Java",
+    "JavaScript",
+    "SQL",
+    "Selenium",
+    "pytest",
+    "Docker",
+    "AWS",
+    "Jira",
+    "Git",
+    "Postman",
+    "Cypress",
+]
+JOB_LEVELS = [
+    "Młodszy specjalista (Junior)",
+    "Specjalista (Mid / Regular)",
+    "Starszy specjalista (Senior)",
+    "Specjalista (Mid / Regular), Starszy specjalista (Senior)",
+]
+TITLES = [
+    "Tester oprogramowania",
+    "Młodszy tester manualny",
+    "Inżynier automatyzacji testów",
+    "Specjalista ds. zapewnienia jakości",
+    "QA Engineer",
+    "Test Automation Engineer (Python)",
+    "Starszy analityk testów",
+    "Kierownik zespołu testerów",
+]
+TOWNS = ["Warszawa", "Kraków", "Łódź", "Wrocław", "Poznań", "Gdańsk", "zdalnie"]
+SALARIES = [
+    "",
+    "10 000–14 000 zł netto (+ VAT) / mies.",
+    "8 400–22 000 zł brutto / mies.",
+    "120 zł netto (+ VAT) / godz.",
+]
+
+
+@contextmanager
+def benchmark_app(n_offers: int, n_companies: int = 200, seed: int = 0, **config):
+    """Yields a connexion app using a temporary sqlite database
+    filled with n_offers randomly generated offers.
+
+    Keyword arguments override settings of the app configuration.
+    """
+    db_fd, db_fpath = tempfile.mkstemp(prefix="bench_db_", suffix=".db")
+
+    class BenchmarkConfig(BaseConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_fpath}"
+        # Offers are generated after the app is created
+        WARM_UP = False
+
+    for name, value in config.items():
+        setattr(BenchmarkConfig, name, value)
+
+    conxn_app = create_app(custom_config=BenchmarkConfig)
+    scheduler.shutdown(wait=False)
+    with conxn_app.app.app_context():
+        fill_database(n_offers, n_companies, seed)
+        # Move the bulk insert from the write-ahead log to the database file
+        # (as it would have been long ago in a database that is in use).
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    try:
+        yield conxn_app
+    finally:
+        with conxn_app.app.app_context():
+            db.engine.dispose()
+        os.close(db_fd)
+        for path in (db_fpath, f"{db_fpath}-wal", f"{db_fpath}-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def fill_database(n_offers: int, n_companies: int, seed: int = 0):
+    rnd = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    db.session.execute(
+        insert(Company),
+        [
+            {"company_id": i, "name": f"Company {i}", "website": f"https://c{i}.pl"}
+            for i in range(1, n_companies + 1)
+        ],
+    )
+    db.session.execute(
+        insert(Tag),
+        [{"tag_id": i, "name": name} for i, name in enumerate(TAG_NAMES, 1)],
+    )
+    offers = []
+    offer_tags = []
+    for offer_id in range(1, n_offers + 1):
+        posted = start + timedelta(days=rnd.randrange(5 * 365))
+        offers.append(
+            {
+                "joboffer_id": offer_id,
+                "company_id": rnd.randint(1, n_companies),
+                "title": f"{rnd.choice(TITLES)}, {rnd.choice(TOWNS)}",
+                "posted": posted,
+                "collected": posted + timedelta(days=1),
+                "contracttype": "Pełny etat",
+                "jobmode": "",
+                "joblevel": rnd.choice(JOB_LEVELS),
+                "salary": rnd.choice(SALARIES),
+                "detailsurl": (
+                    "https://www.pracuj.pl/praca/tester-warszawa,oferta,"
+                    f"{offer_id}?s=1d2c2faa&searchId=MTcxMTQ4NDExNTUzNi43MDYz"
+                ),
+            }
+        )
+        for tag_id in rnd.sample(range(1, len(TAG_NAMES) + 1), rnd.randint(0, 5)):
+            offer_tags.append({"joboffer_id": offer_id, "tag_id": tag_id})
+    db.session.execute(insert(JobOffer), offers)
+    if offer_tags:
+        db.session.execute(insert(joboffer_tag), offer_tags)
+    # Offers are inserted bypassing the ORM (much faster)
+    # so derived values have to be filled in afterwards.
+    backfill_all(db.session.connection())
+    db.session.commit()
+
+
+@contextmanager
+def count_queries(engine):
+    """Counts SQL statements sent to the database inside the context"""
+    statements = []
+
+    def count_statement(*args):  # pylint: disable=unused-argument
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+
+def timeit(fn, repeat: int = 20) -> float:
+    """Returns the best (minimal) execution time of fn in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
@@ -1,13 +1,24 @@
 import os
 
 import connexion
+import flask
+from connexion.jsonifier import Jsonifier
 from connexion.resolver import RelativeResolver
 from dotenv import load_dotenv
 
 from job_tracker import config
-from job_tracker.database import db
+from job_tracker.api.query_cost import set_query_timeouts
+from job_tracker.api.single_flight import init_single_flight
+from job_tracker.api.stats_snapshot import init_stats_snapshot
+from job_tracker.api.tag_index import init_tag_index
+from job_tracker.api.warm_up import init_warm_up
+from job_tracker.compression import CompressionMiddleware
+from job_tracker.database import db, set_sqlite_pragmas
 from job_tracker.demo import load_demo_data
 from job_tracker.extensions import ma, scheduler
+from job_tracker.json_provider import init_json_provider
+from job_tracker.replicas import init_replicas
+from job_tracker.workers import middlewares
 
 answer = load_dotenv()
 print(f"loaded env?: {answer}")
@@ -22,6 +33,8 @@ def create_app(custom_config=config.DevelopmentConfig):
     connexion_app = connexion.FlaskApp(
         application_name,
         specification_dir=config.root_dir,
+        # Requests are served in a pool of WSGI_WORKERS threads (see workers module)
+        middlewares=middlewares(),
     )
     # Get underlying flask app
     base_flask_app = connexion_app.app
@@ -32,6 +45,16 @@ def create_app(custom_config=config.DevelopmentConfig):
     # Apply configuration to the flask app
     base_flask_app.config.from_object(custom_config)
 
+    # Replace JSON encoder (the default one is set by connexion)
+    init_json_provider(base_flask_app)
+
+    # Compress responses
+    if base_flask_app.config.get("COMPRESSION_ENABLED", True):
+        connexion_app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=base_flask_app.config.get("COMPRESSION_MIN_SIZE", 1024),
+        )
+
     # Initialize any extensions (db, serializer, etc.)
     # (usually these are applied to the flask app)
     #   1. Order does matter (db before ma).
@@ -44,21 +67,41 @@ def create_app(custom_config=config.DevelopmentConfig):
     db.init_app(base_flask_app)
     ma.init_app(base_flask_app)
     scheduler.init_app(base_flask_app)
+    init_stats_snapshot(base_flask_app)
+    init_single_flight(base_flask_app)
 
     # Register blueprints (including indirect registration by extensions)
     # resolver = None if __package__ is None else RelativeResolver(__package__ + ".api")
     resolver = RelativeResolver(containing_package_name + ".api")
     openapi_spec = config.root_dir.joinpath("job_tracker_backend_api.yml")
-    connexion_app.add_api(openapi_spec, resolver=resolver)
+    # Responses are encoded by the app's JSON provider (flask.json).
+    # Unlike connexion's default, the output is not indented.
+    connexion_app.add_api(
+        openapi_spec, resolver=resolver, jsonifier=Jsonifier(flask.json)
+    )
 
     # Any additional routes (eg. added temporarily for a quick test and
     # besides those already added through blueprints) can go here
 
     # Init the db here (within the context of created app !)
+    # Schema is created or upgraded to the latest revision (migrations).
+    # (imported here so that the module can be run as a script:
+    #  python -m job_tracker.migrate)
+    from job_tracker.migrate import init_database
+
     with base_flask_app.app_context():
-        db.create_all()
+        # Read replicas are used by the read-only endpoints (see replicas module)
+        for engine in [db.engine, *init_replicas(base_flask_app)]:
+            set_sqlite_pragmas(engine, base_flask_app.config.get("SQLITE_PRAGMAS", {}))
+            # Statistics queries are interrupted at their deadline
+            set_query_timeouts(engine)
+        init_database(db)
         if os.getenv("LOAD_DEMO_DATA"):
             load_demo_data(db)
+        # Offers having tags are found with bitmaps (see api.tag_index)
+        init_tag_index(base_flask_app)
+        # Hot dashboard views are cached in the background (see api.warm_up)
+        init_warm_up(base_flask_app)
 
     # Add any tasks to the scheduler here
     # (or import module(s) with functions decorated with @scheduler.task)
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from connexion.problem import problem
+from flask import current_app, request
+from sqlalchemy import exc, select
+
+from job_tracker.database import db
+from job_tracker.models import Company, company_stats
+from job_tracker.replicas import read_only
+
+from .pagination import after_cursor, encode_cursor
+
+# Numbers of offers are read from company_stats (kept up to date
+# when offers are stored), not counted for every listed company.
+listing_columns = (
+    company_stats.c.company_id,
+    Company.name,
+    Company.website,
+    company_stats.c.offers,
+    company_stats.c.active_offers,
+    company_stats.c.recent_offers,
+    company_stats.c.first_seen,
+    company_stats.c.last_seen,
+)
+
+# Allowed values of the sort parameter: (sort column, is descending)
+# Every ordering is backed by an index on (sort column, company_id).
+orderings = {
+    "-recent_offers": (company_stats.c.recent_offers, True),
+    "-active_offers": (company_stats.c.active_offers, True),
+    "-offers": (company_stats.c.offers, True),
+    "-last_seen": (company_stats.c.last_seen, True),
+    "name": (Company.name, False),
+}
+
+
+def companies_query(sort: str, after: str | None = None):
+    """Returns select of listing_columns of companies in the given order
+
+    Raises
+    ------
+    ValueError
+    If after is not a valid cursor of the ordering
+    """
+    sort_column, descending = orderings[sort]
+    # company_id makes the order deterministic (unambiguous cursor),
+    # Company.company_id is the id of the name index (sorting by name).
+    id_column = Company.company_id if sort == "name" else company_stats.c.company_id
+    ordering = (sort_column, id_column)
+    if descending:
+        ordering = tuple(column.desc() for column in ordering)
+    query = (
+        select(*listing_columns)
+        .join(Company, Company.company_id == company_stats.c.company_id)
+        .order_by(*ordering)
+    )
+    if after is not None:
+        query = query.where(
+            after_cursor(sort_column, id_column, after, sort, descending)
+        )
+    return query
+
+
+@read_only
+def get_all():
+    perpagelimit = request.args.get("perpagelimit", default=30, type=int)
+    # Allowed values of sort are validated by connexion
+    # against the API specification.
+    sort = request.args.get("sort", default="-recent_offers", type=str)
+    try:
+        query = companies_query(sort, request.args.get("after", type=str))
+    except ValueError:
+        return problem(status=400, title="Bad request", detail="invalid after token")
+    try:
+        # Fetch one extra row to find out if there is a next page.
+        rows = db.session.execute(query.limit(perpagelimit + 1)).all()
+    except exc.OperationalError:
+        current_app.logger.exception(
+            ("Failed to connect to the database while trying query for companies")
+        )
+        return problem(
+            status=500, title="database offline", detail="Check server health"
+        )
+    has_next = len(rows) > perpagelimit
+    rows = rows[:perpagelimit]
+    companies = [
+        {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row._asdict().items()
+        }
+        for row in rows
+    ]
+    sort_key = orderings[sort][0].key
+    last = rows[-1] if rows else None
+    next_after = (
+        encode_cursor(sort, getattr(last, sort_key), last.company_id)
+        if has_next
+        else None
+    )
+    return {"info": {"next_after": next_after}, "companies": companies}
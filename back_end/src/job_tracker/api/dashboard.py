@@ -0,0 +1,184 @@
+"""Everything the statistics dashboard needs to be shown, in one request
+
+The payload combines the list of tags (with numbers of offers),
+the allowed values of the filters and statistics of the requested
+view (the default view of the dashboard if none is given), so that
+the dashboard does not make several round trips on load and submit.
+
+Payloads are cached for DASHBOARD_CACHE_SECONDS (up to CACHE_SIZE
+views, the least recently used ones are dropped first), identical
+concurrent requests of a view not yet cached share one computation
+(see single_flight). Payloads of the most common views are computed
+before they are requested, when the app starts and after new offers
+are stored (see warm_up).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from connexion.problem import problem
+from flask import current_app, request
+from sqlalchemy import exc
+from werkzeug.datastructures import MultiDict
+
+from job_tracker.database import db
+from job_tracker.models import datapoints_schema
+from job_tracker.parsers import CONTRACT_TYPES, JOB_LEVELS
+from job_tracker.replicas import primary_requested, read_only
+
+from .date_helpers import Interval
+from .query_cost import QueryTimeout, TooManyBins, check_bins, query_timeout
+from .single_flight import coalesced
+from .statistics import (
+    bins_problem,
+    calculate_stats,
+    date_range_and_binning,
+    timeout_problem,
+)
+from .tags import tag_counts
+
+# View shown when the dashboard is loaded
+# (the same as the defaults of the frontend).
+DEFAULT_VIEW = {
+    "start_date": "2024-01-01",
+    "end_date": "2024-12-31",
+    "binning": "day",
+    "tags": [],
+    "contract_type": "Pełny etat",
+    "job_level": "",
+}
+# Maximum number of cached payloads (views)
+CACHE_SIZE = 64
+
+# Cached payloads keyed by (database url, view key).
+# Values are (timestamp of the computation, payload).
+_cache: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def dashboard_view(args) -> dict:
+    """Returns the view requested with args (the default view
+    updated with the ones given)
+    """
+    view = dict(DEFAULT_VIEW)
+    for name, default in DEFAULT_VIEW.items():
+        if name in args:
+            view[name] = args.getlist(name) if isinstance(default, list) else args[name]
+    return view
+
+
+def view_key(view: dict) -> tuple:
+    # An offer has to have ALL of the tags, their order does not matter
+    return tuple(
+        (name, tuple(sorted(value)) if isinstance(value, list) else value)
+        for name, value in sorted(view.items())
+    )
+
+
+def calculate_dashboard(view: dict) -> dict:
+    """Returns the dashboard payload of the view
+
+    Raises
+    ------
+    ValueError
+    If the dates or binning of the view are invalid
+    (TooManyBins if there are too many bins)
+    QueryTimeout
+    If the queries took too long
+    """
+    start_date, end_date, binning = date_range_and_binning(MultiDict(view))
+    check_bins(start_date, end_date, binning)
+    with query_timeout():
+        statistics = calculate_stats(
+            start_date,
+            end_date,
+            binning,
+            view["tags"],
+            view["contract_type"] or None,
+            None,
+            view["job_level"] or None,
+        )
+        counts = tag_counts()
+    return {
+        "view": view,
+        "statistics": datapoints_schema.dump(statistics),
+        "tags": [
+            {"name": name, "count": count}
+            for name, count in sorted(
+                counts.items(), key=lambda item: (-item[1], item[0])
+            )
+        ],
+        "choices": {
+            "binning": [interval.value for interval in Interval],
+            "contract_type": list(CONTRACT_TYPES),
+            "job_level": list(JOB_LEVELS),
+        },
+    }
+
+
+def _store(key: tuple, timestamp: float, payload: dict) -> None:
+    with _cache_lock:
+        _cache[key] = (timestamp, payload)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def cached_dashboard(view: dict) -> dict:
+    """Returns the (possibly DASHBOARD_CACHE_SECONDS old) payload of the view
+
+    Raises the same exceptions as calculate_dashboard.
+    """
+    max_age = current_app.config.get("DASHBOARD_CACHE_SECONDS", 60)
+    key = (str(db.engine.url), view_key(view))
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and now - cached[0] < max_age:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    def compute():
+        payload = calculate_dashboard(view)
+        _store(key, now, payload)
+        return payload
+
+    return coalesced(("dashboard", key), compute)
+
+
+def refresh_dashboard(view: dict) -> dict:
+    """Computes the payload of the view and caches it (replacing
+    the cached one, even if it has not expired yet)
+
+    Raises the same exceptions as calculate_dashboard.
+    """
+    key = (str(db.engine.url), view_key(view))
+    now = time.monotonic()
+    payload = calculate_dashboard(view)
+    _store(key, now, payload)
+    return payload
+
+
+@read_only
+def get():
+    view = dashboard_view(request.args)
+    try:
+        # Clients asking to read from the primary (eg. right after
+        # storing offers) get a fresh payload (cached for others).
+        if primary_requested():
+            return calculate_dashboard(view)
+        return cached_dashboard(view)
+    except TooManyBins as e:
+        return bins_problem(e)
+    except ValueError as e:
+        return problem(status=400, title="Bad request", detail=str(e))
+    except QueryTimeout as e:
+        return timeout_problem(e)
+    except exc.OperationalError:
+        current_app.logger.exception(
+            ("Failed to connect to the database while trying query for dashboard")
+        )
+        return problem(
+            status=500, title="database offline", detail="Check server health"
+        )
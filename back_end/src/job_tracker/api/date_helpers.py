@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from enum import Enum
 
 
@@ -6,7 +6,9 @@ class Interval(Enum):
     """Finite choice of binning periods"""
 
     DAY = "day"
+    WEEK = "week"  # ISO week (starting on Monday)
     MONTH = "month"
+    QUARTER = "quarter"
     YEAR = "year"
 
 
@@ -14,13 +16,18 @@ def interval_type(interval: str) -> Interval:
     match interval:
         case "year":
             return Interval.YEAR
+        case "quarter":
+            return Interval.QUARTER
         case "month":
             return Interval.MONTH
+        case "week":
+            return Interval.WEEK
         case "day":
             return Interval.DAY
         case _:
             raise ValueError(
-                f"binning can only be one of: year, month, day - is: {interval}"
+                "binning can only be one of: year, quarter, month, week, day"
+                f" - is: {interval}"
             )
 
 
@@ -87,3 +94,38 @@ def iterate_months(start_date, end_date):
             month = ((month + 1) % 12) or 12
             if month == 1:
                 year += 1
+
+
+def first_day_of_bin(any_date: date, binning: Interval) -> date:
+    """Returns the first day of the bin (day, ISO week, month...) of any_date"""
+    day = date(any_date.year, any_date.month, any_date.day)
+    match binning:
+        case Interval.YEAR:
+            return day.replace(month=1, day=1)
+        case Interval.QUARTER:
+            return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+        case Interval.MONTH:
+            return day.replace(day=1)
+        case Interval.WEEK:
+            return day - timedelta(days=day.weekday())
+        case _:
+            return day
+
+
+def shift_bins(first_day: date, n: int, binning: Interval) -> date:
+    """Returns the first day of the bin n bins after (or before if n < 0)
+    the bin starting on first_day
+    """
+    match binning:
+        case Interval.YEAR | Interval.QUARTER | Interval.MONTH:
+            months = {Interval.YEAR: 12, Interval.QUARTER: 3, Interval.MONTH: 1}
+            month = first_day.year * 12 + first_day.month - 1 + n * months[binning]
+            return date(month // 12, month % 12 + 1, 1)
+        case Interval.WEEK:
+            return first_day + timedelta(weeks=n)
+        case _:
+            return first_day + timedelta(days=n)
+
+
+def last_day_of_bin(first_day: date, binning: Interval) -> date:
+    return shift_bins(first_day, 1, binning) - timedelta(days=1)
@@ -0,0 +1,78 @@
+"""Base of the structures kept in memory and refreshed incrementally
+(statistics snapshot and tag index)
+
+Data is read from the database when it is used for the first time,
+then refreshed (offers collected since the last refresh are read)
+after the scraping task stores new offers and, for other processes,
+every refresh_seconds when used.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select
+
+from job_tracker.models import Tag
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+
+class IncrementallyRefreshed(ABC):
+    """Data read from the database, refreshed at least every refresh_seconds
+
+    Subclasses read the data in load().
+    """
+
+    def __init__(self, refresh_seconds: float = 60) -> None:
+        self.refresh_seconds = refresh_seconds
+        self._data = None
+        self._tag_ids: dict[str, int] = {}
+        # Offers collected at or after this timestamp are read on refresh
+        self._collected_since: datetime | None = None
+        self._refreshed_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def load(self, session, old, since: datetime | None) -> tuple:
+        """Returns the data and the timestamp the next refresh reads
+        offers collected since
+
+        Parameters
+        ----------
+        old : data of the last refresh (None if everything has to be read)
+        since : offers collected at or after this timestamp have to be read
+                (None if everything has to be read)
+        """
+
+    def refresh(self, session, rebuild: bool = False) -> None:
+        """Reads offers stored since the last refresh (all on the first one)
+
+        If another thread is already refreshing the data, returns
+        immediately (unless there is no data yet).
+        """
+        # pylint: disable-next=consider-using-with
+        if not self._lock.acquire(blocking=self._data is None):
+            return
+        try:
+            since = self._collected_since
+            if rebuild or self._data is None or since is None:
+                data, collected = self.load(session, None, None)
+            else:
+                data, collected = self.load(session, self._data, since)
+            self._tag_ids = dict(session.execute(select(Tag.name, Tag.tag_id)).all())
+            self._data = data
+            self._collected_since = collected
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def current(self, session):
+        """Returns the data, refreshed first if it is refresh_seconds old"""
+        if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            self.refresh(session)
+        return self._data
@@ -1,17 +1,267 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+
 from connexion.problem import problem
-from flask import current_app, request
-from sqlalchemy import exc
+from flask import Response, current_app, request, stream_with_context
+from sqlalchemy import exc, false, func, select
+
+from job_tracker.database import db
+from job_tracker.fulltext import search_matches, search_terms
+from job_tracker.models import (
+    Company,
+    JobOffer,
+    Tag,
+    joboffer_contracttype,
+    joboffer_joblevel,
+    joboffer_tag,
+)
+from job_tracker.parsers import (
+    contract_type_id,
+    job_level_id,
+    parse_contract_types,
+    parse_job_levels,
+)
+from job_tracker.replicas import read_only
+
+from .date_helpers import ISO8601_date_type
+from .pagination import after_cursor, cached_count, encode_cursor, paginate_rows
+
+# Columns returned for every offer on the list.
+# Selecting plain columns (instead of JobOffer objects) skips creation
+# of ORM instances and their identity map bookkeeping.
+listing_columns = (
+    JobOffer.joboffer_id,
+    JobOffer.company_id,
+    JobOffer.title,
+    JobOffer.posted,
+    JobOffer.collected,
+    JobOffer.contracttype,
+    JobOffer.jobmode,
+    JobOffer.joblevel,
+    JobOffer.salary,
+    JobOffer.detailsurl,
+)
+all_fields = [column.key for column in listing_columns] + ["tags"]
+
+
+# Allowed values of the sort parameter: (sort column, is descending)
+# Every ordering is backed by an index on (sort column, joboffer_id).
+orderings = {
+    "posted": (JobOffer.posted, False),
+    "-posted": (JobOffer.posted, True),
+    "collected": (JobOffer.collected, False),
+    "-collected": (JobOffer.collected, True),
+}
+
+
+def offers_filters(args) -> list:
+    """Translates query parameters into a list of selection criteria
+
+    Parameters
+    ----------
+    args : request arguments (werkzeug MultiDict)
+
+    Returns
+    -------
+    list of conditions that should be joined with AND
+
+    Raises
+    ------
+    ValueError
+    If any of the date parameters is not a valid date
+    """
+    criteria = []
+    for tag in args.getlist("tags", type=str):
+        # Every listed tag must be present (AND).
+        # Offers having the tag are found with the tag_id index
+        # on joboffer_tag (reverse lookup: tag -> offers).
+        criteria.append(
+            JobOffer.joboffer_id.in_(
+                select(joboffer_tag.c.joboffer_id)
+                .join(Tag, Tag.tag_id == joboffer_tag.c.tag_id)
+                .where(Tag.name == tag)
+            )
+        )
+    company_ids = args.getlist("company_id", type=int)
+    if company_ids:
+        criteria.append(JobOffer.company_id.in_(company_ids))
+    company = args.get("company", type=str)
+    if company is not None:
+        criteria.append(
+            JobOffer.company_id.in_(
+                select(Company.company_id).where(Company.name == company)
+            )
+        )
+    for param, column in (
+        ("posted", JobOffer.posted),
+        ("collected", JobOffer.collected),
+    ):
+        # Both ends of the range are inclusive (whole days).
+        date_from = args.get(f"{param}_from", type=str)
+        if date_from is not None:
+            criteria.append(column >= ISO8601_date_type(date_from))
+        date_to = args.get(f"{param}_to", type=str)
+        if date_to is not None:
+            criteria.append(column < ISO8601_date_type(date_to) + timedelta(days=1))
+    # Job level and contract type are matched against canonical values
+    # (see the statistics module), offers must have all given values.
+    job_level = args.get("job_level", type=str)
+    if job_level is not None:
+        names = parse_job_levels(job_level)
+        if not names:
+            criteria.append(false())
+        for name in names:
+            criteria.append(
+                JobOffer.joboffer_id.in_(
+                    select(joboffer_joblevel.c.joboffer_id).where(
+                        joboffer_joblevel.c.joblevel_id == job_level_id(name)
+                    )
+                )
+            )
+    contract_type = args.get("contract_type", type=str)
+    if contract_type is not None:
+        names = parse_contract_types(contract_type)
+        if not names:
+            criteria.append(false())
+        for name in names:
+            criteria.append(
+                JobOffer.joboffer_id.in_(
+                    select(joboffer_contracttype.c.joboffer_id).where(
+                        joboffer_contracttype.c.contracttype_id
+                        == contract_type_id(name)
+                    )
+                )
+            )
+    return criteria
+
+
+def tags_of_offers(offer_ids: list[int]) -> dict[int, list[str]]:
+    """Returns names of tags (sorted by name) for each of the given offers
+
+    All tags are loaded using a single query
+    (as opposed to one query per offer when lazy loading JobOffer.tags).
+    """
+    tags_by_offer = defaultdict(list)
+    if offer_ids:
+        query = (
+            select(joboffer_tag.c.joboffer_id, Tag.name)
+            .join(Tag, Tag.tag_id == joboffer_tag.c.tag_id)
+            .where(joboffer_tag.c.joboffer_id.in_(offer_ids))
+            .order_by(Tag.name)
+        )
+        for offer_id, tag_name in db.session.execute(query).all():
+            tags_by_offer[offer_id].append(tag_name)
+    return tags_by_offer
 
-from job_tracker.models import JobOffer, joboffers_schema
 
+def serialize_offers(rows, fields: list[str] | None = None) -> list[dict]:
+    """Converts rows of listing_columns to json ready dictionaries
 
+    The output is the same as the one produced by joboffers_schema
+    (datetime objects are converted to ISO 8601 strings and the offer
+    has a list of its tags' names) but all values are native
+    json types so no custom encoding is needed afterwards.
+
+    If fields are given only those are included in the output
+    (rows may contain other columns as well).
+    """
+    if fields is None:
+        fields = all_fields
+    with_tags = "tags" in fields
+    tags_by_offer = (
+        tags_of_offers([row.joboffer_id for row in rows]) if with_tags else {}
+    )
+    columns = [field for field in fields if field != "tags"]
+    offers = []
+    for row in rows:
+        row_dict = row._asdict()
+        offer = {}
+        for column in columns:
+            value = row_dict[column]
+            offer[column] = value.isoformat() if isinstance(value, datetime) else value
+        if with_tags:
+            offer["tags"] = tags_by_offer.get(row.joboffer_id, [])
+        offers.append(offer)
+    return offers
+
+
+@read_only
 def get_all():
-    subpage = request.args.get("subpage", default=1, type=int)
     perpagelimit = request.args.get("perpagelimit", type=int)
-    try:
-        paginated_offers = JobOffer.query.order_by(JobOffer.posted).paginate(
-            page=subpage, per_page=perpagelimit
+    after = request.args.get("after", type=str)
+    # Subpages are numbered (and counted) unless the client opts in
+    # to cursor based pagination, until the subpage parameter is removed.
+    by_cursor = (
+        after is not None
+        or request.args.get("pagination", default="subpage") == "cursor"
+    )
+    if by_cursor and "subpage" in request.args:
+        return problem(
+            status=400,
+            title="Bad request",
+            detail="subpage can not be used with after or cursor pagination",
         )
+    # Allowed values of sort and fields are validated by connexion
+    # against the API specification.
+    sort = request.args.get("sort", default="posted", type=str)
+    fields = request.args.getlist("fields", type=str) or all_fields
+    try:
+        criteria = offers_filters(request.args)
+    except ValueError as e:
+        return problem(status=400, title="Bad request", detail=str(e))
+
+    # Only the requested columns are read (projection) plus those
+    # needed to build the cursor and to look up tags.
+    sort_column, descending = orderings[sort]
+    needed = set(fields) | {"joboffer_id", sort_column.key}
+    columns = [column for column in listing_columns if column.key in needed]
+    # Ordering by the id (besides the sort column) makes the order
+    # deterministic, which is required for the cursor to be unambiguous.
+    ordering = (sort_column, JobOffer.joboffer_id)
+    if descending:
+        ordering = tuple(column.desc() for column in ordering)
+    query = select(*columns).where(*criteria).order_by(*ordering)
+    try:
+        if not by_cursor:
+            # Page number based pagination - kept for backward compatibility.
+            # This requires a COUNT(*) and an OFFSET scan on every call
+            # so it becomes slower the deeper the requested subpage is.
+            subpage = request.args.get("subpage", default=1, type=int)
+            paginated_offers = paginate_rows(query, subpage, perpagelimit)
+            if paginated_offers is None:
+                return problem(
+                    status=404, title="Not found", detail="subpage out of range"
+                )
+            rows, tot_subpages, has_next = paginated_offers
+            info = {"tot_subpages": tot_subpages, "curr_subpage": subpage}
+        else:
+            # Cursor (keyset) based pagination (the first subpage if there
+            # is no cursor). Thanks to the (sort column, joboffer_id) indexes
+            # the database seeks directly to the first row after the cursor,
+            # so every page costs the same regardless of how deep it is.
+            if after is not None:
+                try:
+                    condition = after_cursor(
+                        sort_column, JobOffer.joboffer_id, after, sort, descending
+                    )
+                except ValueError:
+                    return problem(
+                        status=400, title="Bad request", detail="invalid after token"
+                    )
+                query = query.where(condition)
+            # Fetch one extra row to find out if there is a next page.
+            query = query.limit(perpagelimit + 1)
+            rows = db.session.execute(query).all()
+            has_next = len(rows) > perpagelimit
+            rows = rows[:perpagelimit]
+            info = {}
+            if not criteria:
+                # Counting filtered offers would require a scan every time.
+                info["tot_offers"] = cached_count(JobOffer.__table__)
+        offers = serialize_offers(rows, fields)
     except exc.OperationalError:
         current_app.logger.exception(
             ("Failed to connect to the database while trying query for offers")
@@ -20,10 +270,183 @@ def get_all():
             status=500, title="database offline", detail="Check server health"
         )
     else:
-        info = {
-            "tot_subpages": paginated_offers.pages,
-            "curr_subpage": paginated_offers.page,
-        }
-        offers = joboffers_schema.dump(paginated_offers)
+        # Token pointing to the next page is returned in both modes
+        # so that clients can switch to cursor based pagination at any point.
+        last = rows[-1] if rows else None
+        info["next_after"] = (
+            encode_cursor(sort, getattr(last, sort_column.key), last.joboffer_id)
+            if has_next
+            else None
+        )
         ans = {"info": info, "offers": offers}
         return ans  # Flask "jsonifies" ans object
+
+
+def search_query(dialect_name: str, terms: list[str], criteria: list):
+    """Returns select of offers (listing_columns and score) matching all terms
+
+    Offers matching the phrase are found with the full-text index
+    (see fulltext module) and joined with the joboffer table by primary key.
+    Best matches come first, ties are ordered by the id (newest first)
+    so that the cursor is unambiguous.
+    """
+    matches = search_matches(
+        dialect_name, JobOffer.joboffer_id, JobOffer.search_text, terms
+    )
+    return (
+        select(*listing_columns, matches.c.score)
+        .join(matches, matches.c.joboffer_id == JobOffer.joboffer_id)
+        .where(*criteria)
+        .order_by(matches.c.score.desc(), JobOffer.joboffer_id.desc())
+    )
+
+
+@read_only
+def search():
+    perpagelimit = request.args.get("perpagelimit", type=int)
+    after = request.args.get("after", type=str)
+    terms = search_terms(request.args.get("q", type=str))
+    if not terms:
+        return problem(
+            status=400, title="Bad request", detail="q does not contain any words"
+        )
+    try:
+        criteria = offers_filters(request.args)
+    except ValueError as e:
+        return problem(status=400, title="Bad request", detail=str(e))
+
+    query = search_query(db.session.get_bind().dialect.name, terms, criteria)
+    if after is not None:
+        try:
+            condition = after_cursor(
+                query.selected_columns.score,
+                JobOffer.joboffer_id,
+                after,
+                "relevance",
+                descending=True,
+            )
+        except ValueError:
+            return problem(
+                status=400, title="Bad request", detail="invalid after token"
+            )
+        query = query.where(condition)
+    try:
+        # Fetch one extra row to find out if there is a next page.
+        rows = db.session.execute(query.limit(perpagelimit + 1)).all()
+        has_next = len(rows) > perpagelimit
+        rows = rows[:perpagelimit]
+        offers = serialize_offers(rows)
+    except exc.OperationalError:
+        current_app.logger.exception(
+            ("Failed to connect to the database while trying to search offers")
+        )
+        return problem(
+            status=500, title="database offline", detail="Check server health"
+        )
+    else:
+        last = rows[-1] if rows else None
+        next_after = (
+            encode_cursor("relevance", last.score, last.joboffer_id)
+            if has_next
+            else None
+        )
+        return {"info": {"next_after": next_after}, "offers": offers}
+
+
+# Separator of tag names aggregated into a single string
+# (a control character that can't appear in a tag name).
+TAGS_SEPARATOR = "\x1f"
+# Number of rows fetched from the database cursor at once during export.
+EXPORT_BATCH_SIZE = 1000
+export_fields = (
+    ["joboffer_id", "company_id", "company_name"]
+    + [column.key for column in listing_columns[2:]]
+    + ["tags"]
+)
+
+
+def export_lines(result, export_format: str):
+    """Yields exported offers in chunks of text
+
+    Every chunk covers one batch of rows fetched from the database.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(export_fields)
+        yield buffer.getvalue()
+    for rows in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        lines = []
+        for row in rows:
+            offer = row._asdict()
+            offer["posted"] = row.posted.isoformat()
+            offer["collected"] = row.collected.isoformat()
+            offer["tags"] = sorted(row.tags.split(TAGS_SEPARATOR)) if row.tags else []
+            if export_format == "csv":
+                offer["tags"] = ";".join(offer["tags"])
+                writer.writerow(offer.values())
+            else:
+                lines.append(json.dumps(offer, ensure_ascii=False))
+                lines.append("\n")
+        yield buffer.getvalue() if export_format == "csv" else "".join(lines)
+    result.close()
+
+
+@read_only
+def export():
+    export_format = request.args.get("format", default="ndjson", type=str)
+    try:
+        criteria = offers_filters(request.args)
+    except ValueError as e:
+        return problem(status=400, title="Bad request", detail=str(e))
+
+    # Tags are aggregated by a correlated subquery (one primary key lookup
+    # per offer) rather than GROUP BY over the whole result, so that rows
+    # can be sent to the client as soon as the database produces them.
+    tags = (
+        # pylint: disable-next=not-callable
+        select(func.aggregate_strings(Tag.name, TAGS_SEPARATOR))
+        .join(joboffer_tag, Tag.tag_id == joboffer_tag.c.tag_id)
+        .where(joboffer_tag.c.joboffer_id == JobOffer.joboffer_id)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            JobOffer.joboffer_id,
+            JobOffer.company_id,
+            Company.name.label("company_name"),
+            *listing_columns[2:],
+            tags.label("tags"),
+        )
+        .outerjoin(Company, Company.company_id == JobOffer.company_id)
+        .where(*criteria)
+        .order_by(JobOffer.posted, JobOffer.joboffer_id)
+    )
+    try:
+        # yield_per makes the result use a server side cursor (where
+        # supported) and buffer only EXPORT_BATCH_SIZE rows at a time,
+        # so memory usage does not depend on the number of offers.
+        result = db.session.execute(
+            query, execution_options={"yield_per": EXPORT_BATCH_SIZE}
+        )
+    except exc.OperationalError:
+        current_app.logger.exception(
+            ("Failed to connect to the database while trying to export offers")
+        )
+        return problem(
+            status=500, title="database offline", detail="Check server health"
+        )
+
+    if export_format == "csv":
+        mimetype = "text/csv"
+    else:
+        mimetype = "application/x-ndjson"
+    chunks = export_lines(result, export_format)
+    headers = {"Content-Disposition": f"attachment; filename=offers.{export_format}"}
+    # The stream is compressed chunk by chunk (if the client accepts it)
+    # by the compression middleware.
+    # stream_with_context keeps the request (and the database session)
+    # alive until the last chunk is sent.
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
@@ -0,0 +1,149 @@
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import DateTime, and_, func, literal, or_, select
+from sqlalchemy.dialects import sqlite
+
+from job_tracker.database import db
+
+# Cached results of COUNT(*) queries keyed by (database url, table name).
+# Values are (timestamp of the count, count).
+_counts_cache: dict[tuple[str, str], tuple[float, int]] = {}
+_counts_cache_lock = threading.Lock()
+
+# SQLite stores datetimes as text. Rows stored by SQLAlchemy have
+# microseconds ("2024-01-09 17:01:00.000000"), rows inserted with plain
+# SQL (eg. the demo data) may not have them ("2024-01-09 17:01:00").
+# Both forms of a cursor value are bound, the first one with this type.
+_WHOLE_SECONDS = DateTime().with_variant(
+    sqlite.DATETIME(
+        storage_format=(
+            "%(year)04d-%(month)02d-%(day)02d " "%(hour)02d:%(minute)02d:%(second)02d"
+        )
+    ),
+    "sqlite",
+)
+
+
+def encode_cursor(key: str, sort_value, row_id: int) -> str:
+    """Creates an opaque pagination token from the last row of a page
+
+    Token is an url-safe base64 encoded json array of the name of
+    the ordering (key), the value of the sort column and the id of the row
+    (datetime values are stored in ISO 8601 format).
+    The format is an implementation detail and clients should not
+    depend on it.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    payload = json.dumps([key, sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, key: str) -> tuple:
+    """Reverses encode_cursor
+
+    Returns
+    -------
+    (sort value, row id)
+
+    Raises
+    ------
+    ValueError
+    If the token was not created by encode_cursor or was created
+    for a different ordering (key)
+    """
+    try:
+        padding = "=" * (-len(token) % 4)
+        token_key, sort_value, row_id = json.loads(
+            base64.urlsafe_b64decode(token + padding)
+        )
+        if token_key != key:
+            raise ValueError(f"token created for {token_key} ordering not {key}")
+        if not isinstance(row_id, int):
+            raise TypeError("row id must be an integer")
+        if isinstance(sort_value, dict):
+            # Columns store naive datetimes (of the server's time zone)
+            sort_value = datetime.fromisoformat(sort_value["dt"]).replace(tzinfo=None)
+        return sort_value, row_id
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"invalid pagination token: {token}") from e
+
+
+def after_cursor(sort_column, id_column, token: str, key: str, descending=False):
+    """Returns condition selecting rows placed after the cursor
+
+    Rows are expected to be ordered by (sort_column, id_column),
+    both either ascending or descending.
+    Row value comparison, eg. (posted, joboffer_id) > (:p, :id),
+    is spelled out with OR/AND so that it can be used as an index
+    range condition on every supported database.
+
+    Datetime values without microseconds are matched in both forms
+    stored by SQLite (with and without the fraction of a second,
+    see _WHOLE_SECONDS), both are the same value on other databases.
+    """
+    sort_value, row_id = decode_cursor(token, key)
+    lowest = sort_value
+    if isinstance(sort_value, datetime) and not sort_value.microsecond:
+        lowest = literal(sort_value, _WHOLE_SECONDS)
+    same_value = (
+        sort_column == sort_value
+        if lowest is sort_value
+        else sort_column.between(lowest, sort_value)
+    )
+    if descending:
+        return or_(
+            sort_column < lowest,
+            and_(same_value, id_column < row_id),
+        )
+    return or_(
+        sort_column > sort_value,
+        and_(same_value, id_column > row_id),
+    )
+
+
+def paginate_rows(query, page: int, per_page: int):
+    """Page number based pagination of a select returning rows (not objects)
+
+    Works like Flask-SQLAlchemy's paginate (COUNT(*) + LIMIT/OFFSET)
+    but returns plain rows.
+
+    Returns
+    -------
+    (rows, number of pages, is there a next page) or None if the page
+    is out of range
+    """
+    # pylint: disable-next=not-callable
+    count_query = select(func.count()).select_from(query.order_by(None).subquery())
+    total = db.session.execute(count_query).scalar_one()
+    pages = -(-total // per_page)
+    if page > pages and page != 1:
+        return None
+    rows = db.session.execute(query.limit(per_page).offset((page - 1) * per_page)).all()
+    return rows, pages, page < pages
+
+
+def cached_count(table) -> int:
+    """Returns the (possibly slightly stale) number of rows in the table
+
+    Counting all rows requires a full scan (of the table or an index)
+    so the result is cached for OFFERS_COUNT_CACHE_SECONDS seconds.
+    """
+    max_age = current_app.config.get("OFFERS_COUNT_CACHE_SECONDS", 60)
+    key = (str(db.engine.url), table.name)
+    now = time.monotonic()
+    with _counts_cache_lock:
+        cached = _counts_cache.get(key)
+    if cached is not None and now - cached[0] < max_age:
+        return cached[1]
+
+    # pylint: disable-next=not-callable
+    count = db.session.execute(select(func.count()).select_from(table)).scalar_one()
+    with _counts_cache_lock:
+        _counts_cache[key] = (now, count)
+    return count
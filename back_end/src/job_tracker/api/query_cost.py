@@ -0,0 +1,227 @@
+"""Limits of the cost of statistics requests
+
+The cost of statistics is proportional to the number of bins (data points
+of every series) rather than to the number of offers, eg. ten years
+of daily statistics are 3653 data points, encoded and sent to the client.
+
+- Requests of more than STATISTICS_MAX_BINS bins are rejected (TooManyBins),
+  the finest coarser binning within the limit is suggested.
+- Queries of a request have STATISTICS_TIMEOUT_SECONDS in total
+  (see query_timeout), the database interrupts the one running
+  at the deadline (QueryTimeout).
+- Responses of more than STATISTICS_STREAM_MIN_ITEMS data points are
+  streamed in chunks (see json_response) instead of being encoded
+  as a single string.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from itertools import chain
+from typing import TYPE_CHECKING
+
+from flask import Response, current_app, g, has_app_context, json, stream_with_context
+from sqlalchemy import event, exc
+
+from .date_helpers import Interval, first_day_of_bin
+
+if TYPE_CHECKING:
+    from datetime import date
+
+# Binnings from the finest to the coarsest
+BINNINGS = (
+    Interval.DAY,
+    Interval.WEEK,
+    Interval.MONTH,
+    Interval.QUARTER,
+    Interval.YEAR,
+)
+# Number of items of a list encoded at once by streamed responses
+STREAM_CHUNK_ITEMS = 500
+# SQLite checks the deadline every this many virtual machine instructions
+SQLITE_PROGRESS_STEPS = 10_000
+
+
+class TooManyBins(ValueError):
+    """Statistics of too many bins were requested"""
+
+    def __init__(self, bins: int, max_bins: int, suggested: Interval | None) -> None:
+        self.bins = bins
+        self.max_bins = max_bins
+        self.suggested = suggested
+        detail = f"too many bins: {bins} (at most {max_bins})"
+        if suggested is not None:
+            detail += f", use coarser binning: {suggested.value}"
+        super().__init__(detail)
+
+
+class QueryTimeout(Exception):
+    """Queries of the request were interrupted at the deadline"""
+
+
+def count_bins(start_date: date, end_date: date, binning: Interval) -> int:
+    """Returns the number of bins between start and end dates
+    (the same as len(statistics.bins_range(...)) without creating them)
+    """
+    first = first_day_of_bin(start_date, binning)
+    last = first_day_of_bin(end_date, binning)
+    match binning:
+        case Interval.YEAR:
+            return last.year - first.year + 1
+        case Interval.QUARTER | Interval.MONTH:
+            months = (last.year - first.year) * 12 + last.month - first.month
+            return months // (3 if binning == Interval.QUARTER else 1) + 1
+        case Interval.WEEK:
+            return (last - first).days // 7 + 1
+        case _:
+            return (last - first).days + 1
+
+
+def check_bins(
+    start_date: date, end_date: date, binning: Interval, extra_bins: int = 0
+) -> None:
+    """Checks the number of bins against STATISTICS_MAX_BINS
+
+    Parameters
+    ----------
+    extra_bins : bins computed besides the ones of the range
+                 (eg. before the range, for moving averages)
+
+    Raises
+    ------
+    TooManyBins
+    If there are more bins than allowed
+    """
+    max_bins = current_app.config.get("STATISTICS_MAX_BINS", 0)
+    if not max_bins:
+        return
+    bins = count_bins(start_date, end_date, binning) + extra_bins
+    if bins <= max_bins:
+        return
+    suggested = next(
+        (
+            coarser
+            for coarser in BINNINGS[BINNINGS.index(binning) + 1 :]
+            if count_bins(start_date, end_date, coarser) + extra_bins <= max_bins
+        ),
+        None,
+    )
+    raise TooManyBins(bins, max_bins, suggested)
+
+
+@contextmanager
+def query_timeout():
+    """Queries run inside the context are interrupted
+    STATISTICS_TIMEOUT_SECONDS after it was entered
+
+    The deadline of an outer context (eg. the time budget of the warm-up,
+    see warm_up module) is never extended.
+
+    Raises
+    ------
+    QueryTimeout
+    If a query was interrupted (or failed) after the deadline
+    """
+    seconds = current_app.config.get("STATISTICS_TIMEOUT_SECONDS", 0)
+    if not seconds:
+        yield
+        return
+    previous = g.get("query_deadline")
+    deadline = time.monotonic() + seconds
+    if previous is not None:
+        deadline = min(deadline, previous)
+    g.query_deadline = deadline
+    try:
+        yield
+    except exc.OperationalError as e:
+        if time.monotonic() >= deadline:
+            raise QueryTimeout(f"statistics took longer than {seconds} s") from e
+        raise
+    finally:
+        g.query_deadline = previous
+
+
+def set_query_timeouts(engine) -> None:
+    """Makes the engine interrupt queries run after g.query_deadline
+
+    SQLite - a progress handler of the connection checks the deadline,
+    PostgreSQL - statement_timeout (of the transaction),
+    MySQL - max_execution_time (of the SELECT statements),
+    MariaDB - max_statement_time.
+    """
+    dialect = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def limit_query_time(connection, cursor, *_):
+        deadline = g.get("query_deadline") if has_app_context() else None
+        info = connection.info
+        if deadline is None and not info.get("query_timeout"):
+            return
+        info["query_timeout"] = deadline is not None
+        if dialect == "sqlite":
+            if deadline is None:
+                connection.connection.driver_connection.set_progress_handler(None, 0)
+            else:
+                connection.connection.driver_connection.set_progress_handler(
+                    lambda: time.monotonic() >= deadline, SQLITE_PROGRESS_STEPS
+                )
+            return
+        # Milliseconds left (0 - no limit), at least 1 after the deadline
+        milliseconds = (
+            0 if deadline is None else max(1, int((deadline - time.monotonic()) * 1000))
+        )
+        if dialect == "postgresql":
+            # Reset with the end of the transaction
+            if deadline is not None:
+                cursor.execute(f"SET LOCAL statement_timeout = {milliseconds}")
+        elif dialect == "mysql":
+            cursor.execute(f"SET SESSION max_execution_time = {milliseconds}")
+        elif dialect == "mariadb":
+            cursor.execute(f"SET SESSION max_statement_time = {milliseconds / 1000}")
+
+
+def iter_json(value, chunk_items: int = STREAM_CHUNK_ITEMS):
+    """Yields the JSON of the value in chunks
+
+    Long lists are encoded chunk_items items at a time, the output
+    is the same as of flask.json.dumps (keys sorted, separators
+    of the app's JSON provider).
+    """
+    if isinstance(value, dict):
+        # '{"":0}' - ':' or ': '
+        key_separator = json.dumps({"": 0})[3:-2]
+        yield "{"
+        for i, (key, item) in enumerate(sorted(value.items())):
+            yield (item_separator() if i else "") + json.dumps(key) + key_separator
+            yield from iter_json(item, chunk_items)
+        yield "}"
+    elif isinstance(value, list) and len(value) > chunk_items:
+        yield "["
+        for start in range(0, len(value), chunk_items):
+            items = json.dumps(value[start : start + chunk_items])[1:-1]
+            yield (item_separator() if start else "") + items
+        yield "]"
+    else:
+        yield json.dumps(value)
+
+
+def item_separator() -> str:
+    # '[0,0]' - ',' or ', '
+    return json.dumps([0, 0])[2:-2]
+
+
+def json_response(value, items: int):
+    """Returns the value as is (encoded by connexion) or streamed
+    if it has more than STATISTICS_STREAM_MIN_ITEMS data points
+
+    Parameters
+    ----------
+    items : number of data points of the value
+    """
+    min_items = current_app.config.get("STATISTICS_STREAM_MIN_ITEMS", 0)
+    if not min_items or items < min_items:
+        return value
+    # Ends with a new line like responses encoded by connexion
+    chunks = chain(iter_json(value), "\n")
+    return Response(stream_with_context(chunks), mimetype="application/json")
@@ -0,0 +1,130 @@
+"""Coalescing of identical concurrent requests (single flight)
+
+Dashboards loading the same view at the same time request the same
+statistics. With SINGLE_FLIGHT enabled, a request whose key (endpoint
+and normalized arguments, see request_key) matches a computation
+already in progress waits for it and gets the same result instead
+of running the same queries again.
+
+A computation is joined only until its deadline, SINGLE_FLIGHT_TIMEOUT_SECONDS
+(or the timeout given for the key) after it started. Requests still waiting
+then compute the result on their own, later ones start a new computation,
+so a stuck query does not hold every request of the key.
+
+Numbers of computed, coalesced and timed out requests are reported
+by the metrics endpoint (for the process serving it, every gunicorn
+worker has its own).
+"""
+
+import threading
+import time
+
+from flask import current_app, request
+
+from job_tracker.replicas import primary_requested
+
+
+class _Flight:
+    """Computation in progress"""
+
+    def __init__(self, deadline: float) -> None:
+        self.deadline = deadline
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Runs at most one computation of every key at a time"""
+
+    def __init__(self, timeout: float = 10) -> None:
+        self.timeout = timeout
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+        self._computed = 0
+        self._coalesced = 0
+        self._timed_out = 0
+
+    def do(self, key, compute, timeout: float | None = None):
+        """Returns compute() or the result of the computation of the key
+        in progress (its exception is raised as well)
+
+        Parameters
+        ----------
+        key : hashable key of the computation
+        timeout : seconds after which the computation is no longer
+                  joined (default: timeout of the instance)
+        """
+        now = time.monotonic()
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None or flight.deadline <= now
+            if is_leader:
+                flight = _Flight(now + (self.timeout if timeout is None else timeout))
+                self._flights[key] = flight
+                self._computed += 1
+        if is_leader:
+            try:
+                flight.result = compute()
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+                flight.done.set()
+            return flight.result
+        if not flight.done.wait(flight.deadline - now):
+            with self._lock:
+                self._timed_out += 1
+            return compute()
+        with self._lock:
+            self._coalesced += 1
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "computed": self._computed,
+                "coalesced": self._coalesced,
+                "timed_out": self._timed_out,
+            }
+
+
+def request_key(endpoint: str, unordered: tuple[str, ...] = ("tags",)) -> tuple:
+    """Returns the key of the request to the endpoint
+
+    Arguments are sorted by name, values of the unordered ones
+    (eg. tags, an offer has to have all of them) are sorted too.
+    Requests reading from the primary database do not share
+    results with the ones reading from replicas.
+    """
+    arguments = tuple(
+        (name, tuple(sorted(values) if name in unordered else values))
+        for name, values in sorted(request.args.lists())
+    )
+    return endpoint, arguments, primary_requested()
+
+
+def coalesced(key, compute, timeout: float | None = None):
+    """Returns compute() shared with concurrent requests of the same key
+    (see SingleFlight.do), compute() if coalescing is disabled
+
+    The result is shared between requests, so it must not be modified.
+    """
+    flights = current_app.extensions.get("single_flight")
+    if flights is None:
+        return compute()
+    return flights.do(key, compute, timeout)
+
+
+def init_single_flight(app) -> None:
+    """Enables coalescing of requests if configured"""
+    if app.config.get("SINGLE_FLIGHT", False):
+        app.extensions["single_flight"] = SingleFlight(
+            timeout=app.config.get("SINGLE_FLIGHT_TIMEOUT_SECONDS", 10)
+        )
@@ -1,75 +1,299 @@
-from contextlib import contextmanager
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
 
+import numpy as np
 from connexion.problem import problem
 from flask import current_app, request
-from sqlalchemy import and_, delete, exc, func, inspect, or_, select, true
+from sqlalchemy import and_, exc, false, func, select
+from werkzeug.datastructures import MultiDict
 
+from job_tracker.archive import offer_tiers
 from job_tracker.database import db
-from job_tracker.models import JobOffer, Tag, datapoints_schema
+from job_tracker.models import (
+    HOT_OFFERS,
+    Company,
+    ContractType,
+    JobLevel,
+    OfferTables,
+    Tag,
+    datapoints_schema,
+    tag_pair_month,
+)
+from job_tracker.parsers import (
+    contract_type_id,
+    job_level_id,
+    parse_contract_types,
+    parse_job_levels,
+)
+from job_tracker.replicas import read_only
 
 from .date_helpers import (
     Interval,
     ISO8601_date_type,
+    first_day_of_bin,
     interval_type,
     iterate_months,
-    last_day_of_month,
+    last_day_of_bin,
+    shift_bins,
 )
+from .query_cost import (
+    QueryTimeout,
+    TooManyBins,
+    check_bins,
+    json_response,
+    query_timeout,
+)
+from .single_flight import coalesced, request_key
 
-# Silence litner for lines using func (eg. func.extract or func.count)
+# Silence litner for lines using func (eg. func.count)
 # pylint: disable=not-callable
 
 
-class TmpContinuousDatesRange(db.Model):
-    __tablename__ = "tmp_continuous_dates_range"
-    timestamp = db.Column(db.DateTime, primary_key=True, autoincrement=False)
+def bins_range(start_date: date, end_date: date, binning: Interval) -> list[date]:
+    """Returns the first day of every bin between start and end dates
 
-    def __init__(self, **kwargs) -> None:
-        super().__init__(**kwargs)
+    Range includes bins of both start_date and end_date.
+    """
+    match binning:
+        case Interval.YEAR:
+            return [
+                date(year, 1, 1) for year in range(start_date.year, end_date.year + 1)
+            ]
+        case Interval.QUARTER:
+            first_month = first_day_of_bin(start_date, binning)
+            months = iterate_months(first_month, end_date)
+            return [month.date() for month in months][::3]
+        case Interval.MONTH:
+            return [month.date() for month in iterate_months(start_date, end_date)]
+        case Interval.WEEK:
+            monday = first_day_of_bin(start_date, binning)
+            return [
+                monday + timedelta(weeks=x)
+                for x in range(0, (end_date - monday).days // 7 + 1)
+            ]
+        case _:
+            return [
+                start_date + timedelta(days=x)
+                for x in range(0, (end_date - start_date).days + 1)
+            ]
 
 
-@contextmanager
-def temporary_timestamps_table():
-    r"""Create a temporary table for continuous range of timestamps
+def bin_column_and_range(
+    start_date: datetime,
+    end_date: datetime,
+    binning: Interval,
+    offers=HOT_OFFERS.offers,
+):
+    """Returns the calendar column of the binning and its first and last value
 
-    A table is created (if it doesn't already exist) using current
-    database context. Table has a single column which should be filled
-    with a continuous range of timestamps inside the context created
-    by this manager.
+    Offers are grouped by calendar columns stored with every offer
+    (see models.posted_calendar). The date range is expanded
+    to full bins (years, quarters, months or weeks).
+    ISO weeks and quarters are not stored, offers are grouped by days
+    and months of the weeks and quarters (see fold_bins).
+    offers is the table of offers (regular or archived).
 
-    No data are inserted into the table, the manager just yields
-    the table object.
-    However after the context is closed all rows are removed from the table
-    (the table itself is not dropped).
+    Returns
+    -------
+    (column, first bin, last bin) - bins are dates (first days of bins)
+    or years (int) for yearly binning
+    """
+    match binning:
+        case Interval.YEAR:
+            return offers.c.posted_year, start_date.year, end_date.year
+        case Interval.QUARTER:
+            last_quarter = first_day_of_bin(end_date, binning)
+            return (
+                offers.c.posted_month,
+                first_day_of_bin(start_date, binning),
+                shift_bins(last_quarter, 2, Interval.MONTH),
+            )
+        case Interval.MONTH:
+            return (
+                offers.c.posted_month,
+                start_date.date().replace(day=1),
+                end_date.date().replace(day=1),
+            )
+        case Interval.WEEK:
+            return (
+                offers.c.posted_date,
+                first_day_of_bin(start_date, binning),
+                last_day_of_bin(first_day_of_bin(end_date, binning), binning),
+            )
+        case _:
+            return offers.c.posted_date, start_date.date(), end_date.date()
 
-    E.g.::
 
-        with temporary_timestamps_table as TmpContinuousDatesRange:
-            # Create data and populate the table
-            timestamps_range = [
-                start + timedelta(days=x)
-                for x in range(0, (start - end).days + 1)
-            ]
-            for tsp in timestamps_range:
-                db.session.add(TmpContinuousDatesRange(timestamp=tsp))
+def fold_bins(counts: dict, binning: Interval) -> dict:
+    """Sums counts of days (or months) returned by the calendar columns
+    into counts of ISO weeks (or quarters)
+
+    counts are keyed by bins or by (group, bin), other binnings
+    are returned unchanged.
+    """
+    if binning not in (Interval.WEEK, Interval.QUARTER):
+        return counts
+    folded = Counter()
+    for key, count in counts.items():
+        if isinstance(key, tuple):
+            group, day = key
+            folded[group, first_day_of_bin(day, binning)] += count
+        else:
+            folded[first_day_of_bin(key, binning)] += count
+    return folded
 
-            # Use in a query
-            a_query = select(TmpContinuousDatesRange.timestamp)
-            timestamps_from_db = db.session.execute(a_query).fetchall()
 
-        for row in timestamps_from_db:
-            print(row)
+def offers_selection(
+    tags: list[str] | None = None,
+    contract_type: str | None = None,
+    job_mode: str | None = None,
+    job_level: str | None = None,
+    tables: OfferTables = HOT_OFFERS,
+    offer_ids: list[int] | None = None,
+) -> tuple[list, list]:
+    """Translates statistics criteria into selection criteria and joins
+
+    Parameters are the same as for calculate_stats, tables are the tables
+    of offers (regular or archived) the criteria apply to.
+    offer_ids - only offers with these ids are selected
+    (offers having the tags, found with the tag index).
+
+    Returns
+    -------
+    (list of conditions that should be joined with AND,
+     list of (table, on clause) that should be joined with joboffer)
     """
+    offers = tables.offers
+    selection_criteria = []
+    # Job level and contract type are matched against canonical values
+    # (parsed from raw descriptions when offers are stored) with
+    # equality joins on junction tables, using their
+    # (dimension id, joboffer_id) indexes.
+    # If several values are given (eg. "Pełny etat, Część etatu")
+    # offers must have all of them.
+    # Values that are not recognized don't match any offer.
+    dimension_joins = []
+    if contract_type is not None:
+        # NOTE: Currently only offers marked as full_time are being collected
+        #       (this is achieved by parsing of CSS class names not strings
+        #        in the offer description itself)
+        #       Criteria for the offers that are being collected
+        #       are hard coded in the fetch_offers task.
+        names = parse_contract_types(contract_type)
+        if not names:
+            selection_criteria.append(false())
+        for name in names:
+            junction = tables.contract_types.alias()
+            dimension_joins.append(
+                (
+                    junction,
+                    and_(
+                        junction.c.joboffer_id == offers.c.joboffer_id,
+                        junction.c.contracttype_id == contract_type_id(name),
+                    ),
+                )
+            )
+    if job_mode is not None:
+        selection_criteria.append(offers.c.jobmode == job_mode)
+    if job_level is not None:
+        # Some offers advertise job opening at more then one level
+        # (probably subject to evaluation during an interview),
+        # such an offer matches each of its levels.
+        names = parse_job_levels(job_level)
+        if not names:
+            selection_criteria.append(false())
+        for name in names:
+            junction = tables.job_levels.alias()
+            dimension_joins.append(
+                (
+                    junction,
+                    and_(
+                        junction.c.joboffer_id == offers.c.joboffer_id,
+                        junction.c.joblevel_id == job_level_id(name),
+                    ),
+                )
+            )
+    if tags is not None:
+        for tag in tags:
+            # Find all offers with a given tag.
+            # Conditions for consecutive tags are joined with AND
+            # so only the offers that have ALL requested tags
+            # (not just any one of them) will be counted.
+            selection_criteria.append(
+                offers.c.joboffer_id.in_(
+                    select(tables.tags.c.joboffer_id)
+                    .join(Tag, Tag.tag_id == tables.tags.c.tag_id)
+                    .where(Tag.name == tag)
+                )
+            )
+    if offer_ids is not None:
+        selection_criteria.append(offers.c.joboffer_id.in_(offer_ids))
+    return selection_criteria, dimension_joins
+
 
-    if not inspect(db.engine).has_table(TmpContinuousDatesRange.__tablename__):
-        # Create empty table
-        TmpContinuousDatesRange.metadata.create_all(db.engine)
+def indexed_tags(tags: list[str] | None) -> tuple[list[str] | None, list | None]:
+    """Finds offers having ALL of the tags with the tag index
 
-    yield TmpContinuousDatesRange
+    Offers are found only if the index is enabled (see tag_index module)
+    and at most TAG_INDEX_MAX_OFFERS have the tags, otherwise
+    the tags are matched by the SQL query.
+
+    Returns
+    -------
+    (tags left for the SQL query, ids of offers having the tags or None)
+    """
+    index = current_app.extensions.get("tag_index")
+    if not tags or index is None:
+        return tags, None
+    offer_ids = index.matching(db.session, tags)
+    if len(offer_ids) > current_app.config.get("TAG_INDEX_MAX_OFFERS", 10000):
+        return tags, None
+    return None, offer_ids.to_array().tolist()
+
+
+def binned_counts_query(
+    start_date: datetime,
+    end_date: datetime,
+    binning: Interval,
+    tags: list[str] | None = None,
+    contract_type: str | None = None,
+    job_mode: str | None = None,
+    job_level: str | None = None,
+    tables: OfferTables = HOT_OFFERS,
+    offer_ids: list[int] | None = None,
+):
+    """Returns a query counting offers in (not empty) bins
 
-    # Remove all data from the table when context is closed
-    # (the table itself is not removed/dropped).
-    db.session.execute(delete(TmpContinuousDatesRange))
+    Parameters are the same as for calculate_stats, tables are the tables
+    of offers (regular or archived) to count, offer_ids are the same
+    as for offers_selection.
+    Rows of the query are (bin, count), where bin is the first day
+    of the bin (a date) or the year (an int) for yearly binning
+    (days or months for weekly and quarterly binning, see fold_bins).
+    If offer_ids are given, bins out of the date range are counted too.
+    """
+    # The date range condition and the grouping both use the index
+    # on the calendar column.
+    bin_column, first_bin, last_bin = bin_column_and_range(
+        start_date, end_date, binning, tables.offers
+    )
+    selection_criteria, dimension_joins = offers_selection(
+        tags, contract_type, job_mode, job_level, tables, offer_ids
+    )
+    not_empty_bins = select(
+        bin_column.label("bin"),
+        func.count(tables.offers.c.joboffer_id).label("count"),
+    )
+    for junction, on_clause in dimension_joins:
+        not_empty_bins = not_empty_bins.join(junction, on_clause)
+    if offer_ids is None:
+        selection_criteria += [bin_column >= first_bin, bin_column <= last_bin]
+    # Offers found with the tag index are looked up by their ids.
+    # With the date range condition the planner would rather scan
+    # the whole range, so bins out of the range are returned too
+    # (and ignored by calculate_stats).
+    return not_empty_bins.where(*selection_criteria).group_by(bin_column)
 
 
 def calculate_stats(
@@ -80,6 +304,8 @@ def calculate_stats(
     contract_type: str | None = None,
     job_mode: str | None = None,
     job_level: str | None = None,
+    rolling: int | None = None,
+    cumulative: bool = False,
 ):
     """Counts offers meeting given criteria in specified time bins.
 
@@ -92,204 +318,561 @@ def calculate_stats(
 
     start_date : earliest date an offer was posted on
     end_date : latest date an offer was posted on
-    binning : bin matching offers by either day, month or year
+    binning : bin matching offers by either day, ISO week, month, quarter
+              or year
+    rolling : also return the moving average of counts of the bin
+              and rolling - 1 bins before it (also before the range)
+    cumulative : also return the running total of counts since
+                 the first bin of the range
 
     Returns
     -------
-    [(date, int)]
+    [{"date": date, "count": int}] for every bin between the dates
+    (date is the first day of the bin), with "average" (float)
+    and "cumulative" (int) if requested
     """
+    # Moving averages of the first bins include bins before the range.
+    lead = rolling - 1 if rolling else 0
+    first_day = shift_bins(first_day_of_bin(start_date, binning), -lead, binning)
+    start_date = datetime.combine(first_day, datetime.min.time())
+    bins = bins_range(first_day, end_date.date(), binning)
+    snapshot = current_app.extensions.get("stats_snapshot")
+    if snapshot is not None:
+        # In-memory engine (see stats_snapshot module)
+        counts = snapshot.binned_counts(
+            db.session,
+            binning,
+            bins[0],
+            bins[-1],
+            tags,
+            contract_type,
+            job_mode,
+            job_level,
+        )
+    else:
+        # Archived offers are counted only if the range reaches the archive.
+        counts = Counter()
+        tags, offer_ids = indexed_tags(tags)
+        for tables in offer_tiers(db.session, bins[0]):
+            query = binned_counts_query(
+                start_date,
+                end_date,
+                binning,
+                tags,
+                contract_type,
+                job_mode,
+                job_level,
+                tables,
+                offer_ids,
+            )
+            counts.update(dict(db.session.execute(query).all()))
+        counts = fold_bins(counts, binning)
 
-    with temporary_timestamps_table() as TmpContinuousDatesRange:
-        match binning:
-            # Expand date range (to full years or months)
-            # based on requested binning method,
-            # establish grouping criteria for the sql query,
-            # fill in the TmpContinuousDatesRange table with timestamps.
-            case Interval.YEAR:
-                mod_sd = start_date.replace(month=1, day=1, hour=0, minute=0, second=0)
-                mod_ed = end_date.replace(
-                    month=12, day=31, hour=23, minute=59, second=59
-                )
+    # Bins without any offers are filled with zeros.
+    data_points = []
+    for first_day in bins:
+        key = first_day.year if binning == Interval.YEAR else first_day
+        data_points.append({"date": first_day, "count": counts.get(key, 0)})
+    if rolling or cumulative:
+        add_running_values(data_points, rolling, cumulative)
+    return data_points[lead:]
 
-                grouping_criteria = [
-                    func.extract("year", JobOffer.posted),
-                ]
-
-                years = [y for y in range(mod_sd.year, mod_ed.year + 1, 1)]
-                for year in years:
-                    db.session.add(
-                        TmpContinuousDatesRange(
-                            timestamp=datetime(year, month=1, day=1)
-                        )
-                    )
-            case Interval.MONTH:
-                mod_sd = start_date.replace(day=1, hour=0, minute=0, second=0)
-                mod_ed = last_day_of_month(end_date).replace(
-                    hour=23, minute=59, second=59
-                )
 
-                grouping_criteria = [
-                    func.extract("year", JobOffer.posted),
-                    func.extract("month", JobOffer.posted),
-                ]
-
-                for first_day in iterate_months(mod_sd, mod_ed):
-                    db.session.add(TmpContinuousDatesRange(timestamp=first_day))
-            case Interval.DAY:
-                mod_sd = start_date.replace(hour=0, minute=0, second=0)
-                mod_ed = end_date.replace(hour=23, minute=59, second=59)
-
-                grouping_criteria = [
-                    func.extract("year", JobOffer.posted),
-                    func.extract("month", JobOffer.posted),
-                    func.extract("day", JobOffer.posted),
-                ]
-
-                dates_range = [
-                    mod_sd + timedelta(days=x)
-                    for x in range(0, (mod_ed - mod_sd).days + 1)
-                ]
-                for date in dates_range:
-                    db.session.add(TmpContinuousDatesRange(timestamp=date))
-
-        selection_criteria = [
-            JobOffer.posted >= mod_sd,
-            JobOffer.posted <= mod_ed,
-        ]
-
-        if contract_type is not None:
-            # WARNING: Contract type description is in Polish or Ukrainian only.
-            #          It is unknown, at this time, whether all possible choices
-            #          where seen and accounted for. Also some job offers
-            #          are tagged with multiple contract types. This makes
-            #          this criterion similar to the one for job level below
-            #          and implementation should be improved in similar manner
-            #          once enough offers are collected and analysed.
-            #          Selection filtering is added to relax the condition
-            #          and allow the user to make a choice using current implementation.
-            # selection_criteria.append(JobOffer.contracttype == contract_type)
-
-            # NOTE: Currently only offers marked as full_time are being collected
-            #       (this is achieved by parsing of CSS class names not strings
-            #        in the offer description itself)
-            #       Criteria for the offers that are being collected
-            #       are hard coded in the fetch_offers task.
-            selection_criteria.append(JobOffer.contracttype.contains(contract_type))
-        if job_mode is not None:
-            selection_criteria.append(JobOffer.jobmode == job_mode)
-        if job_level is not None:
-            # WARNING Job offers have job level description in rather
-            #         descriptive form (in Polish or Ukrainian) with
-            #         general job level term in English in parentheses but
-            #         only for junior/regular/senior positions - there
-            #         are some non-standard ones as well. The way this is
-            #         handled can be improved once enough offers are
-            #         collected, hopefully representing all possible levels.
-            #         Additionally some offers advertise job opening at
-            #         more then one level (probably subject to evaluation during
-            #         an interview). This shows that a table for all job levels
-            #         should be added (together with a junction table).
-            #         This would allow to add multiple level per offer
-            #         (similarly to implementation of 'tag' and
-            #          'joboffer_tag' tables).
-            #         The 'contains' filter below relaxes the search criteria
-            #         and allows to select a level even if multiple are present
-            #         and the specific wording is not yet fully known.
-            # selection_criteria.append(JobOffer.joblevel == job_level)
-            selection_criteria.append(JobOffer.joblevel.contains(job_level))
-        if tags is not None:
-            for tag in tags:
-                # Find all offers with a given tag
-                offers_with_matching_tag = (
-                    JobOffer.query.join(JobOffer.tags).filter(Tag.name == tag).all()
-                )
-                # Since in selection_criteria conditions will be joined with AND
-                # create a list of all criteria in such a way that ANY one of them
-                # will be satisfying the final condition (for a current tag).
-                # (that is the final condition will not evaluate to a nonsensical
-                # thing like
-                # select offer_id where offer=offer1 AND offer=offer2)
-                cond = or_(
-                    *[
-                        JobOffer.joboffer_id == offer.joboffer_id
-                        for offer in offers_with_matching_tag
-                    ]
-                )
-                selection_criteria.append(cond)
-                # Iterating over requested tags in the for loop will result
-                # in AND condition assuring that only the offers that have
-                # ALL requested tags (not just any one of them) will be counted.
-
-        gen_timestamps = select(TmpContinuousDatesRange.timestamp)
-        gen_timestamps_subq = gen_timestamps.subquery()
-        not_empty_bins = (
-            select(
-                JobOffer.posted,
-                func.count(JobOffer.joboffer_id).label("count"),
-            )
-            .where(and_(true(), *selection_criteria))
-            .group_by(
-                *grouping_criteria,
+def add_running_values(
+    data_points: list[dict], rolling: int | None, cumulative: bool
+) -> None:
+    """Adds moving averages and running totals of counts to data points
+
+    Computed for all bins at once (from cumulative sums of counts).
+    Averages of the first rolling - 1 data points (preceding the range
+    of calculate_stats) are not added, the running total starts
+    after them.
+    """
+    counts = np.fromiter((point["count"] for point in data_points), dtype=np.int64)
+    lead = rolling - 1 if rolling else 0
+    sums = np.concatenate(([0], np.cumsum(counts)))
+    if rolling:
+        averages = (sums[rolling:] - sums[:-rolling]) / rolling
+        for point, average in zip(data_points[lead:], averages.tolist()):
+            point["average"] = average
+    if cumulative:
+        totals = sums[lead + 1 :] - sums[lead]
+        for point, total in zip(data_points[lead:], totals.tolist()):
+            point["cumulative"] = total
+
+
+def group_column_and_joins(group_by: str, tables: OfferTables = HOT_OFFERS):
+    """Returns the column naming groups of offers and the joins it needs
+
+    Offers are grouped by names of their tags, job levels, contract types
+    (an offer having several of them is a member of several groups)
+    or by the name of their company.
+
+    Returns
+    -------
+    (column, list of (table, on clause) that should be joined with joboffer)
+    """
+    offers = tables.offers
+    match group_by:
+        case "company":
+            return Company.name, [
+                (Company.__table__, Company.company_id == offers.c.company_id)
+            ]
+        case "tag":
+            junction, dimension, key = tables.tags, Tag, "tag_id"
+        case "job_level":
+            junction, dimension, key = tables.job_levels, JobLevel, "joblevel_id"
+        case "contract_type":
+            junction, dimension, key = (
+                tables.contract_types,
+                ContractType,
+                "contracttype_id",
             )
+        case _:
+            raise ValueError(f"offers can not be grouped by {group_by}")
+    return dimension.name, [
+        (junction, junction.c.joboffer_id == offers.c.joboffer_id),
+        (dimension.__table__, dimension.__table__.c[key] == junction.c[key]),
+    ]
+
+
+def grouped_counts_query(
+    start_date: datetime,
+    end_date: datetime,
+    binning: Interval,
+    group_by: str,
+    groups: list[str] | None = None,
+    tags: list[str] | None = None,
+    contract_type: str | None = None,
+    job_mode: str | None = None,
+    job_level: str | None = None,
+    tables: OfferTables = HOT_OFFERS,
+    offer_ids: list[int] | None = None,
+):
+    """Returns a query counting offers in (not empty) bins of every group
+
+    Parameters are the same as for calculate_grouped_stats
+    and binned_counts_query.
+    Rows of the query are (group, bin, count).
+    """
+    offers = tables.offers
+    bin_column, first_bin, last_bin = bin_column_and_range(
+        start_date, end_date, binning, offers
+    )
+    group_column, group_joins = group_column_and_joins(group_by, tables)
+    selection_criteria, dimension_joins = offers_selection(
+        tags, contract_type, job_mode, job_level, tables, offer_ids
+    )
+    query = select(
+        group_column.label("group"),
+        bin_column.label("bin"),
+        func.count(offers.c.joboffer_id).label("count"),
+    ).select_from(offers)
+    for junction, on_clause in dimension_joins + group_joins:
+        query = query.join(junction, on_clause)
+    if groups:
+        selection_criteria.append(group_column.in_(groups))
+    return query.where(
+        bin_column >= first_bin, bin_column <= last_bin, *selection_criteria
+    ).group_by(group_column, bin_column)
+
+
+def calculate_grouped_stats(
+    start_date: datetime,
+    end_date: datetime,
+    binning: Interval,
+    group_by: str,
+    groups: list[str] | None = None,
+    top: int | None = None,
+    tags: list[str] | None = None,
+    contract_type: str | None = None,
+    job_mode: str | None = None,
+    job_level: str | None = None,
+) -> dict:
+    """Counts offers meeting given criteria in time bins of every group
+
+    All series are counted with a single grouped query (per tier of offers)
+    or, with the in-memory statistics engine, in the snapshot of offers
+    (except for companies, not kept in the snapshot).
+
+    Parameters
+    ----------
+    group_by : "tag", "job_level", "contract_type" or "company"
+               (see group_column_and_joins)
+    groups : only count offers of these groups (None - all groups),
+             groups without any offers are included with zero counts
+    top : only return series of top groups (with most offers in the range),
+          offers of the remaining groups are counted in "other"
+
+    Other parameters are the same as for calculate_stats.
+
+    Returns
+    -------
+    {"group_by": group_by,
+     "series": [{"group": name, "total": int,
+                 "data": [{"date": date, "count": int}]}],
+     "other": {"groups": int, "total": int, "data": [...]} or None}
+    with series ordered by total (descending) and data for every bin
+    between the dates (same as returned by calculate_stats)
+    """
+    bins = bins_range(start_date.date(), end_date.date(), binning)
+    snapshot = current_app.extensions.get("stats_snapshot")
+    if snapshot is not None and group_by != "company":
+        counts = snapshot.grouped_counts(
+            db.session,
+            binning,
+            bins[0],
+            bins[-1],
+            group_by,
+            groups,
+            tags,
+            contract_type,
+            job_mode,
+            job_level,
         )
-        not_empty_bins_subq = not_empty_bins.subquery()
-
-        comparison_criteria = [
-            func.extract("year", not_empty_bins_subq.c.posted)
-            == func.extract("year", gen_timestamps_subq.c.timestamp)
-        ]
-        if not binning == Interval.YEAR:
-            comparison_criteria.append(
-                func.extract("month", not_empty_bins_subq.c.posted)
-                == func.extract("month", gen_timestamps_subq.c.timestamp)
+    else:
+        counts = Counter()
+        tags, offer_ids = indexed_tags(tags)
+        for tables in offer_tiers(db.session, bins[0]):
+            query = grouped_counts_query(
+                start_date,
+                end_date,
+                binning,
+                group_by,
+                groups,
+                tags,
+                contract_type,
+                job_mode,
+                job_level,
+                tables,
+                offer_ids,
             )
-            if not binning == Interval.MONTH:
-                comparison_criteria.append(
-                    func.extract("day", not_empty_bins_subq.c.posted)
-                    == func.extract("day", gen_timestamps_subq.c.timestamp)
-                )
+            rows = db.session.execute(query).all()
+            counts.update({(group, key): count for group, key, count in rows})
+        counts = fold_bins(counts, binning)
 
-        # data_points is a list of rows. Each row is an object that has methods
-        # corresponding to the names of "columns" in the select statement.
-        # (To "rename the column" and hence the object's method name
-        # use .label("str") method).
-        # data_points serializer expects returned objects
-        # to have .date and .count methods
-        joined_query = (
-            select(
-                gen_timestamps_subq.c.timestamp.label("date"),
-                func.coalesce(not_empty_bins_subq.c.count, 0).label("count"),
+    totals = Counter(dict.fromkeys(groups or (), 0))
+    for (group, _), count in counts.items():
+        totals[group] += count
+    ranked = sorted(totals, key=lambda group: (-totals[group], group))
+
+    def series(members: list[str]) -> dict:
+        data_points = []
+        for first_day in bins:
+            key = first_day.year if binning == Interval.YEAR else first_day
+            data_points.append(
+                {
+                    "date": first_day,
+                    "count": sum(counts.get((group, key), 0) for group in members),
+                }
             )
-            .outerjoin(not_empty_bins_subq, and_(true(), *comparison_criteria))
-            .order_by(gen_timestamps_subq.c.timestamp.asc())
+        return {"total": sum(totals[group] for group in members), "data": data_points}
+
+    other = None
+    if top is not None and len(ranked) > top:
+        ranked, others = ranked[:top], ranked[top:]
+        other = {"groups": len(others), **series(others)}
+    return {
+        "group_by": group_by,
+        "series": [{"group": group, **series([group])} for group in ranked],
+        "other": other,
+    }
+
+
+class BatchQuery(NamedTuple):
+    """Statistics query of a batch (see calculate_batch_stats)
+
+    Criteria are the same as of calculate_stats, except for job_mode
+    (not yet collected, see timedependant).
+    """
+
+    id: str
+    start_date: datetime
+    end_date: datetime
+    binning: Interval
+    tags: list[str] | None = None
+    contract_type: str | None = None
+    job_level: str | None = None
+    rolling: int | None = None
+    cumulative: bool = False
+
+
+def calculate_batch_stats(queries: list[BatchQuery]) -> dict[str, list]:
+    """Counts offers of several statistics queries at once
+
+    All queries are evaluated in the same transaction (the session is not
+    committed between them), so they count the same offers even if new
+    offers are stored meanwhile. Queries with the same parameters
+    (but different ids) are evaluated once.
+
+    Returns
+    -------
+    {query id: data points (same as returned by calculate_stats)}
+    """
+    results = {}
+    evaluated = {}
+    for query in queries:
+        params = (
+            query.start_date,
+            query.end_date,
+            query.binning,
+            tuple(query.tags or ()),
+            query.contract_type,
+            query.job_level,
+            query.rolling,
+            query.cumulative,
         )
-        data_points = db.session.execute(joined_query).fetchall()
+        if params not in evaluated:
+            evaluated[params] = calculate_stats(
+                query.start_date,
+                query.end_date,
+                query.binning,
+                query.tags,
+                query.contract_type,
+                None,
+                query.job_level,
+                query.rolling,
+                query.cumulative,
+            )
+        results[query.id] = evaluated[params]
+    return results
 
-    return data_points
 
+# Percentiles of salaries returned by default
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+DEFAULT_HISTOGRAM_BINS = 10
 
-def timedependant():
+
+def bin_indexes(keys, first_bin, binning: Interval) -> np.ndarray:
+    """Converts bins (as returned by calendar columns) to their positions
+    in the list returned by bins_range (all at once)
+    """
+    if binning == Interval.YEAR:
+        return np.asarray(keys, dtype=np.int64) - first_bin
+    # Days of weeks and months of quarters are stored
+    unit = "M" if binning in (Interval.MONTH, Interval.QUARTER) else "D"
+    length = {Interval.WEEK: 7, Interval.QUARTER: 3}.get(binning, 1)
+    return (
+        np.asarray(keys, dtype=f"datetime64[{unit}]") - np.datetime64(first_bin, unit)
+    ).astype(np.int64) // length
+
+
+def salary_distribution(
+    bin_idx: np.ndarray,
+    values: np.ndarray,
+    n_bins: int,
+    percentiles=DEFAULT_PERCENTILES,
+    histogram_bins: int = DEFAULT_HISTOGRAM_BINS,
+):
+    """Computes number, percentiles and histogram of values in every bin
+
+    All bins are processed at once (no loop over offers or bins):
+    values are sorted within bins, percentiles are interpolated linearly
+    between the closest ranks (same as numpy.percentile does by default)
+    and histograms of all bins are counted with a single bincount.
+    Histograms share the same edges (spanning all values) so that
+    they can be compared between bins.
+
+    Parameters
+    ----------
+    bin_idx : index of the bin of every value
+    values : values to analyse
+
+    Returns
+    -------
+    (counts - shape (n_bins,),
+     percentiles - shape (n_bins, len(percentiles)), nan for empty bins,
+     histograms - shape (n_bins, histogram_bins),
+     histogram edges - shape (histogram_bins + 1,) or (0,) if there are no values)
+    """
+    counts = np.bincount(bin_idx, minlength=n_bins)
+    q = np.asarray(percentiles, dtype=float) / 100
+    bins_percentiles = np.full((n_bins, q.size), np.nan)
+    histograms = np.zeros((n_bins, histogram_bins), dtype=np.int64)
+    if values.size == 0:
+        return counts, bins_percentiles, histograms, np.empty(0)
+
+    # Sort by bin, then by value - values of every bin form a sorted slice.
+    sorted_values = values[np.lexsort((values, bin_idx))]
+    starts = np.cumsum(counts) - counts
+    filled = counts > 0
+    ranks = q[None, :] * (counts[filled, None] - 1)
+    fractions = ranks - np.floor(ranks)
+    lower = starts[filled, None] + np.floor(ranks).astype(np.int64)
+    upper = np.minimum(lower + 1, (starts + counts - 1)[filled, None])
+    bins_percentiles[filled] = (
+        sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fractions
+    )
+
+    edges = np.histogram_bin_edges(values, bins=histogram_bins)
+    # The last bucket includes its right edge (like numpy.histogram)
+    buckets = np.clip(
+        np.searchsorted(edges, values, side="right") - 1, 0, histogram_bins - 1
+    )
+    histograms = np.bincount(
+        bin_idx * histogram_bins + buckets, minlength=n_bins * histogram_bins
+    ).reshape(n_bins, histogram_bins)
+    return counts, bins_percentiles, histograms, edges
+
+
+def calculate_salary_stats(
+    start_date: datetime,
+    end_date: datetime,
+    binning: Interval,
+    period: str = "month",
+    currency: str = "PLN",
+    gross: bool | None = None,
+    percentiles=DEFAULT_PERCENTILES,
+    histogram_bins: int = DEFAULT_HISTOGRAM_BINS,
+    tags: list[str] | None = None,
+    contract_type: str | None = None,
+    job_level: str | None = None,
+) -> dict:
+    """Calculates salary distribution in specified time bins.
+
+    The salary of an offer is the middle of its (parsed) salary range.
+    Only offers with salaries in the given currency and period are included.
+
+    Parameters
+    ----------
+    period : "month" or "hour"
+    currency : ISO 4217 code of the currency
+    gross : only include gross (True) or net (False) salaries,
+            None - include all
+    percentiles : percentiles (0-100) to calculate
+    histogram_bins : number of histogram bins
+
+    Other parameters are the same as for calculate_stats.
+
+    Returns
+    -------
+    {"histogram_edges": [float],
+     "data": [{"date": date, "count": int,
+               "percentiles": {"p<percentile>": float | None},
+               "histogram": [int]}]}
+    with data for every bin between the dates
+    """
+    bins = bins_range(start_date.date(), end_date.date(), binning)
+    # Offers are looked up by the (salary_period, salary_currency, posted_date)
+    # index, dates range is expanded to full bins.
+    last_day = last_day_of_bin(bins[-1], binning)
+    rows = []
+    tags, offer_ids = indexed_tags(tags)
+    for tables in offer_tiers(db.session, bins[0]):
+        offers = tables.offers
+        bin_column, first_bin, _ = bin_column_and_range(
+            start_date, end_date, binning, offers
+        )
+        selection_criteria, dimension_joins = offers_selection(
+            tags, contract_type, None, job_level, tables, offer_ids
+        )
+        query = select(bin_column, offers.c.salary_min, offers.c.salary_max)
+        for junction, on_clause in dimension_joins:
+            query = query.join(junction, on_clause)
+        query = query.where(
+            offers.c.salary_period == period,
+            offers.c.salary_currency == currency,
+            offers.c.posted_date >= bins[0],
+            offers.c.posted_date <= last_day,
+            *selection_criteria,
+        )
+        if gross is not None:
+            query = query.where(offers.c.salary_gross == gross)
+        rows += db.session.execute(query).all()
+
+    keys, minimums, maximums = zip(*rows) if rows else ((), (), ())
+    values = (np.asarray(minimums, dtype=float) + np.asarray(maximums, dtype=float)) / 2
+    counts, bins_percentiles, histograms, edges = salary_distribution(
+        bin_indexes(keys, first_bin, binning),
+        values,
+        len(bins),
+        percentiles,
+        histogram_bins,
+    )
+    names = [f"p{percentile:g}" for percentile in percentiles]
+    data = []
+    for i, first_day in enumerate(bins):
+        data.append(
+            {
+                "date": first_day.isoformat(),
+                "count": int(counts[i]),
+                "percentiles": {
+                    name: None if np.isnan(value) else float(value)
+                    for name, value in zip(names, bins_percentiles[i])
+                },
+                "histogram": histograms[i].tolist(),
+            }
+        )
+    return {"histogram_edges": edges.tolist(), "data": data}
+
+
+def date_range(args) -> tuple[datetime, datetime]:
+    """Reads start_date and end_date request arguments
+
+    Raises
+    ------
+    ValueError
+    If any of them is missing or invalid (with the reason as the message)
+    """
     # connexion automatically VALIDATES date FORMAT based on API specification
     # but casting here from string to datetime object for easier handling.
-    start_date: datetime | None = request.args.get("start_date", type=ISO8601_date_type)
+    start_date: datetime | None = args.get("start_date", type=ISO8601_date_type)
     # connexion WILL NOT validate date CORRECTNESS (eg. it will accept 2023-09-44)
     if start_date is None:
-        return problem(status=400, title="Bad request", detail="invalid start_date")
-    end_date: datetime | None = request.args.get("end_date", type=ISO8601_date_type)
+        raise ValueError("invalid start_date")
+    end_date: datetime | None = args.get("end_date", type=ISO8601_date_type)
     if end_date is None:
-        return problem(status=400, title="Bad request", detail="invalid end_date")
+        raise ValueError("invalid end_date")
     if end_date < start_date:
-        return problem(
-            status=400, title="Bad request", detail="end_date earlier than start_date"
-        )
+        raise ValueError("end_date earlier than start_date")
+    return start_date, end_date
+
+
+def date_range_and_binning(args) -> tuple[datetime, datetime, Interval]:
+    """Reads start_date, end_date and binning request arguments
+
+    Raises
+    ------
+    ValueError
+    If any of them is missing or invalid (with the reason as the message)
+    """
+    start_date, end_date = date_range(args)
     # There is no need to validate binning value since connexion
     # will automatically check this against choices allowed in API specification,
     # but casting for easier handling in other functions.
-    binning = request.args.get("binning", type=interval_type)
+    binning = args.get("binning", type=interval_type)
     if binning is None:
-        return problem(
-            title="Bad request", detail="invalid or missing binning", status=400
-        )
+        raise ValueError("invalid or missing binning")
+    return start_date, end_date, binning
+
+
+def bins_problem(e: TooManyBins, detail_prefix: str = ""):
+    return problem(
+        status=400,
+        title="Bad request",
+        detail=f"{detail_prefix}{e}",
+        ext={
+            "bins": e.bins,
+            "max_bins": e.max_bins,
+            "suggested_binning": None if e.suggested is None else e.suggested.value,
+        },
+    )
+
+
+def timeout_problem(e: QueryTimeout):
+    return problem(
+        status=503,
+        title="Query timeout",
+        detail=f"{e}, narrow the date range or use coarser binning",
+    )
+
+
+@read_only
+def timedependant():
+    try:
+        start_date, end_date, binning = date_range_and_binning(request.args)
+    except ValueError as e:
+        return problem(status=400, title="Bad request", detail=str(e))
     tags = request.args.getlist("tags", type=str)
     contract_type = request.args.get("contract_type", type=str)
     # TODO: job_mode is not yet collected when webpage offers are analysed
@@ -298,10 +881,261 @@ def timedependant():
     job_mode = None
     job_level = request.args.get("job_level", type=str)
 
+    # Several series (eg. of every tag) can be requested at once.
+    group_by = request.args.get("group_by", type=str)
+    top = request.args.get("top", type=int)
+    if top is not None and group_by is None:
+        return problem(status=400, title="Bad request", detail="top requires group_by")
+    # Moving averages and running totals are computed on the server
+    # (the series of smaller bins does not have to be sent).
+    rolling = request.args.get("rolling", type=int)
+    cumulative = request.args.get("cumulative", type=str) == "true"
+    if group_by is not None and (rolling is not None or cumulative):
+        return problem(
+            status=400,
+            title="Bad request",
+            detail="rolling and cumulative can not be used with group_by",
+        )
     try:
-        stats = calculate_stats(
-            start_date, end_date, binning, tags, contract_type, job_mode, job_level
+        # Moving averages need bins before the range too
+        check_bins(start_date, end_date, binning, rolling - 1 if rolling else 0)
+    except TooManyBins as e:
+        return bins_problem(e)
+
+    groups = request.args.getlist("groups", type=str)
+
+    def compute():
+        with query_timeout():
+            if group_by is not None:
+                stats = calculate_grouped_stats(
+                    start_date,
+                    end_date,
+                    binning,
+                    group_by,
+                    groups,
+                    top,
+                    tags,
+                    contract_type,
+                    job_mode,
+                    job_level,
+                )
+                for series in filter(None, [*stats["series"], stats["other"]]):
+                    series["data"] = datapoints_schema.dump(series["data"])
+                return stats
+            return datapoints_schema.dump(
+                calculate_stats(
+                    start_date,
+                    end_date,
+                    binning,
+                    tags,
+                    contract_type,
+                    job_mode,
+                    job_level,
+                    rolling,
+                    cumulative,
+                )
+            )
+
+    try:
+        # Identical concurrent requests (eg. of the default view
+        # of the dashboard) share one computation.
+        stats = coalesced(request_key("statistics"), compute)
+    except QueryTimeout as e:
+        return timeout_problem(e)
+    except exc.OperationalError:
+        current_app.logger.exception(
+            ("Failed to connect to the database while trying query for statistics")
+        )
+        return problem(
+            status=500, title="database offline", detail="Check server health"
+        )
+    if group_by is not None:
+        series = filter(None, [*stats["series"], stats["other"]])
+        return json_response(stats, sum(len(each["data"]) for each in series))
+    return json_response(stats, len(stats))
+
+
+@read_only
+def salary():
+    try:
+        start_date, end_date, binning = date_range_and_binning(request.args)
+    except ValueError as e:
+        return problem(status=400, title="Bad request", detail=str(e))
+    try:
+        check_bins(start_date, end_date, binning)
+    except TooManyBins as e:
+        return bins_problem(e)
+    # Allowed values are validated by connexion against the API specification.
+    gross = request.args.get("gross", type=str)
+
+    def compute():
+        with query_timeout():
+            return calculate_salary_stats(
+                start_date,
+                end_date,
+                binning,
+                period=request.args.get("period", default="month", type=str),
+                currency=request.args.get("currency", default="PLN", type=str),
+                gross=None if gross is None else gross == "true",
+                percentiles=(
+                    request.args.getlist("percentiles", type=float)
+                    or DEFAULT_PERCENTILES
+                ),
+                histogram_bins=request.args.get(
+                    "histogram_bins", default=DEFAULT_HISTOGRAM_BINS, type=int
+                ),
+                tags=request.args.getlist("tags", type=str),
+                contract_type=request.args.get("contract_type", type=str),
+                job_level=request.args.get("job_level", type=str),
+            )
+
+    try:
+        stats = coalesced(request_key("salary"), compute)
+    except QueryTimeout as e:
+        return timeout_problem(e)
+    except exc.OperationalError:
+        current_app.logger.exception(
+            ("Failed to connect to the database while trying query for statistics")
+        )
+        return problem(
+            status=500, title="database offline", detail="Check server health"
+        )
+    else:
+        return json_response(stats, len(stats["data"]))
+
+
+def months_condition(start_date: datetime, end_date: datetime):
+    """Selects monthly counts of pairs of tags of months of the date range"""
+    return tag_pair_month.c.month.between(
+        start_date.date().replace(day=1), end_date.date().replace(day=1)
+    )
+
+
+def top_tags_query(start_date: datetime, end_date: datetime, top: int):
+    """Returns a query of (tag_id, name) of top tags with most offers
+    posted in months of the date range
+    """
+    pairs = tag_pair_month.c
+    offers = func.sum(pairs.offers)
+    # Pairs of tags with themselves count offers having the tags
+    return (
+        select(Tag.tag_id, Tag.name)
+        .select_from(tag_pair_month)
+        .join(Tag, Tag.tag_id == pairs.tag_id)
+        .where(
+            months_condition(start_date, end_date), pairs.tag_id == pairs.other_tag_id
+        )
+        .group_by(Tag.tag_id, Tag.name)
+        .having(offers > 0)
+        .order_by(offers.desc(), Tag.name)
+        .limit(top)
+    )
+
+
+def calculate_tag_cooccurrence(
+    start_date: datetime, end_date: datetime, top: int = 10
+) -> dict:
+    """Counts offers having both tags of every pair of top tags
+
+    Offers are counted in months (the date range is expanded to full
+    months) by summing monthly counts of pairs of tags (tag_pair_month)
+    kept up to date when offers are stored, not by joining tags of offers
+    with themselves.
+
+    Parameters
+    ----------
+    top : number of tags (with most offers in the range) to return
+
+    Returns
+    -------
+    {"tags": [name], "matrix": [[int]]}
+    with tags ordered by the number of offers (descending),
+    matrix[i][j] - number of offers having both tags i and j
+    (matrix[i][i] - number of offers having tag i)
+    """
+    pairs = tag_pair_month.c
+    top_tags = db.session.execute(top_tags_query(start_date, end_date, top)).all()
+    positions = {tag_id: i for i, (tag_id, _) in enumerate(top_tags)}
+    matrix = np.zeros((len(top_tags), len(top_tags)), dtype=np.int64)
+    if top_tags:
+        rows = db.session.execute(
+            select(pairs.tag_id, pairs.other_tag_id, func.sum(pairs.offers))
+            .where(
+                months_condition(start_date, end_date),
+                pairs.tag_id.in_(positions),
+                pairs.other_tag_id.in_(positions),
+            )
+            .group_by(pairs.tag_id, pairs.other_tag_id)
+        ).all()
+        tag_ids, other_tag_ids, counts = zip(*rows)
+        i = np.fromiter(map(positions.get, tag_ids), dtype=np.int64)
+        j = np.fromiter(map(positions.get, other_tag_ids), dtype=np.int64)
+        matrix[i, j] = counts
+        matrix[j, i] = counts
+    return {"tags": [name for _, name in top_tags], "matrix": matrix.tolist()}
+
+
+@read_only
+def tag_cooccurrence():
+    try:
+        start_date, end_date = date_range(request.args)
+    except ValueError as e:
+        return problem(status=400, title="Bad request", detail=str(e))
+    try:
+        return calculate_tag_cooccurrence(
+            start_date, end_date, request.args.get("top", default=10, type=int)
+        )
+    except exc.OperationalError:
+        current_app.logger.exception(
+            ("Failed to connect to the database while trying query for statistics")
+        )
+        return problem(
+            status=500, title="database offline", detail="Check server health"
         )
+
+
+# Maximum number of queries of a batch (also limited by the API specification)
+MAX_BATCH_QUERIES = 50
+
+
+@read_only
+def batch(body):
+    if len(body["queries"]) > MAX_BATCH_QUERIES:
+        return problem(status=400, title="Bad request", detail="too many queries")
+    queries = []
+    for spec in body["queries"]:
+        try:
+            start_date, end_date, binning = date_range_and_binning(MultiDict(spec))
+        except ValueError as e:
+            return problem(
+                status=400, title="Bad request", detail=f"query {spec['id']}: {e}"
+            )
+        rolling = spec.get("rolling")
+        try:
+            check_bins(start_date, end_date, binning, rolling - 1 if rolling else 0)
+        except TooManyBins as e:
+            return bins_problem(e, f"query {spec['id']}: ")
+        queries.append(
+            BatchQuery(
+                spec["id"],
+                start_date,
+                end_date,
+                binning,
+                spec.get("tags"),
+                spec.get("contract_type"),
+                spec.get("job_level"),
+                spec.get("rolling"),
+                spec.get("cumulative", False),
+            )
+        )
+    if len({query.id for query in queries}) != len(queries):
+        return problem(status=400, title="Bad request", detail="duplicate query ids")
+
+    try:
+        with query_timeout():
+            stats = calculate_batch_stats(queries)
+    except QueryTimeout as e:
+        return timeout_problem(e)
     except exc.OperationalError:
         current_app.logger.exception(
             ("Failed to connect to the database while trying query for statistics")
@@ -310,4 +1144,12 @@ def timedependant():
             status=500, title="database offline", detail="Check server health"
         )
     else:
-        return datapoints_schema.dump(stats)
+        return json_response(
+            {
+                "results": {
+                    query_id: datapoints_schema.dump(data_points)
+                    for query_id, data_points in stats.items()
+                }
+            },
+            sum(map(len, stats.values())),
+        )
@@ -0,0 +1,464 @@
+"""In-memory statistics engine (columnar snapshot of offers)
+
+With STATISTICS_ENGINE = "memory" offers are counted by calculate_stats
+in a snapshot of all offers (regular and archived) kept in the memory
+of the process instead of with SQL queries. Only the columns statistics
+filter and group by are kept, as NumPy arrays ordered by joboffer_id:
+
+- posted_date (and the month and year derived from it) as int32 day,
+  month and year numbers (ISO weeks and quarters are derived from day
+  and month numbers when counted),
+- job mode as small int codes,
+- job levels and contract types (an offer can have several of each)
+  as bit masks of their ids,
+- tags as bitsets (one row of 64 bit words per 64 tag ids).
+
+Offers matching the criteria are selected with boolean masks and counted
+in bins with a single np.bincount, giving the same results as the SQL path
+(also for series of every tag, job level or contract type).
+
+The snapshot is built when it is used for the first time and refreshed
+incrementally (offers collected since the last refresh are appended)
+after the scraping task stores new offers and, for other processes,
+every STATISTICS_SNAPSHOT_REFRESH_SECONDS when used. If the number
+of offers in the database does not match after the refresh (offers were
+deleted or stored with an earlier collected timestamp) the snapshot
+is rebuilt. Changes of stored offers (eg. tags of an existing offer)
+are not tracked.
+"""
+
+from __future__ import annotations
+
+from itertools import chain
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+from sqlalchemy import String, func, select, type_coerce
+
+from job_tracker.models import ARCHIVED_OFFERS, HOT_OFFERS
+from job_tracker.parsers import (
+    CONTRACT_TYPES,
+    JOB_LEVELS,
+    contract_type_id,
+    job_level_id,
+    parse_contract_types,
+    parse_job_levels,
+)
+
+from .date_helpers import Interval
+from .in_memory import IncrementallyRefreshed
+
+if TYPE_CHECKING:
+    from datetime import date
+
+# Calendar numbers of offers without the posted date (outside of any range)
+NO_DATE = np.iinfo(np.int32).min
+# Maximum number of offers looked up in a single query
+_IDS_CHUNK = 1000
+
+
+class SnapshotColumns(NamedTuple):
+    """Columns of offers ordered by joboffer_id"""
+
+    ids: np.ndarray  # int64
+    days: np.ndarray  # int32, days since 1970-01-01
+    months: np.ndarray  # int32, months since 1970-01
+    years: np.ndarray  # int32
+    job_modes: np.ndarray  # int16, indexes of job_mode_names
+    job_mode_names: tuple
+    job_levels: np.ndarray  # uint16, bit joblevel_id is set for every level
+    contract_types: np.ndarray  # uint8, bit contracttype_id is set for every type
+    tags: np.ndarray  # uint64 (words, offers), bit tag_id of the offer's bitset
+
+
+def calendar_numbers(values: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    """Converts datetime64 days or months to int32 numbers since 1970"""
+    return np.where(missing, NO_DATE, values.astype(np.int64)).astype(np.int32)
+
+
+def bin_keys(numbers: np.ndarray, binning: Interval) -> list:
+    """Converts calendar numbers back to bin keys of the SQL query
+    (first days of bins or years)
+    """
+    match binning:
+        case Interval.YEAR:
+            return numbers.tolist()
+        case Interval.QUARTER:
+            months = (numbers * 3).astype("datetime64[M]")
+            return months.astype("datetime64[D]").tolist()
+        case Interval.MONTH:
+            return numbers.astype("datetime64[M]").astype("datetime64[D]").tolist()
+        case Interval.WEEK:
+            return (numbers * 7 - 3).astype("datetime64[D]").tolist()
+        case _:
+            return numbers.astype("datetime64[D]").tolist()
+
+
+def week_numbers(days):
+    """Converts day numbers (since 1970) to numbers of ISO weeks
+    (1970-01-01 was a Thursday, week 0 starts on Monday 1969-12-29)
+    """
+    return (days + 3) // 7
+
+
+def calendar_number(first_day: date, binning: Interval) -> int:
+    match binning:
+        case Interval.YEAR:
+            return first_day.year
+        case Interval.QUARTER:
+            return calendar_number(first_day, Interval.MONTH) // 3
+        case Interval.MONTH:
+            return (first_day.year - 1970) * 12 + first_day.month - 1
+        case Interval.WEEK:
+            return week_numbers(calendar_number(first_day, Interval.DAY))
+        case _:
+            return int(np.datetime64(first_day, "D").astype(np.int64))
+
+
+def bin_positions(
+    columns: SnapshotColumns, binning: Interval, first_day: date, last_day: date
+):
+    """Returns positions of the bins of offers (relative to the bin
+    of first_day), the calendar number of the first bin and the number of bins
+    """
+    match binning:
+        case Interval.YEAR:
+            calendar = columns.years.astype(np.int64)
+        case Interval.QUARTER:
+            calendar = columns.months.astype(np.int64) // 3
+        case Interval.MONTH:
+            calendar = columns.months.astype(np.int64)
+        case Interval.WEEK:
+            calendar = week_numbers(columns.days.astype(np.int64))
+        case _:
+            calendar = columns.days.astype(np.int64)
+    first = calendar_number(first_day, binning)
+    n_bins = calendar_number(last_day, binning) - first + 1
+    return calendar - first, first, n_bins
+
+
+def offer_positions(ids: np.ndarray, offer_ids: np.ndarray):
+    """Returns positions of offers (ids sorted) and which of them were found"""
+    positions = np.clip(np.searchsorted(ids, offer_ids), 0, max(ids.size - 1, 0))
+    found = ids[positions] == offer_ids if ids.size else np.zeros(0, dtype=bool)
+    return positions, found
+
+
+def junction_rows(session, junction, dimension_column: str, offer_ids):
+    """Returns (joboffer_id, dimension id) arrays of the junction table rows
+    of the offers (all rows if offer_ids is None)
+    """
+    query = select(junction.c.joboffer_id, junction.c[dimension_column])
+    if offer_ids is None:
+        chunks = [session.execute(query).all()]
+    else:
+        chunks = [
+            session.execute(
+                query.where(
+                    junction.c.joboffer_id.in_(offer_ids[i : i + _IDS_CHUNK].tolist())
+                )
+            ).all()
+            for i in range(0, len(offer_ids), _IDS_CHUNK)
+        ]
+    rows = np.fromiter(
+        chain.from_iterable(row for chunk in chunks for row in chunk), dtype=np.int64
+    ).reshape(-1, 2)
+    return rows[:, 0], rows[:, 1]
+
+
+def load_columns(session, tiers, condition=None, job_mode_names=()):
+    """Reads offers of the tiers (that meet the condition) into columns
+
+    Parameters
+    ----------
+    tiers : OfferTables to read offers from
+    condition : function returning the condition of the offers table
+                (None - all offers)
+    job_mode_names : names of already known job modes
+                     (their codes are kept)
+
+    Returns
+    -------
+    (SnapshotColumns, the latest collected timestamp or None)
+    """
+    offer_rows = []
+    collected = None
+    for tables in tiers:
+        offers = tables.offers
+        # Dates are converted by NumPy (much faster than date objects)
+        query = select(
+            offers.c.joboffer_id,
+            type_coerce(offers.c.posted_date, String),
+            offers.c.jobmode,
+        )
+        latest = select(func.max(offers.c.collected))
+        if condition is not None:
+            query = query.where(condition(offers))
+            latest = latest.where(condition(offers))
+        offer_rows += session.execute(query).all()
+        collected = max(
+            filter(None, (collected, session.execute(latest).scalar_one())),
+            default=None,
+        )
+    ids, posted_dates, jobmodes = zip(*offer_rows) if offer_rows else ((), (), ())
+    ids = np.array(ids, dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    ids = ids[order]
+    # posted_month and posted_year are derived from posted_date
+    # (see models.posted_calendar)
+    days = np.array(posted_dates, dtype="datetime64[D]")[order]
+    missing = np.isnat(days)
+    months = days.astype("datetime64[M]")
+    years = months.astype("datetime64[Y]").astype(np.int64) + 1970
+    names = list(job_mode_names)
+    codes = {name: code for code, name in enumerate(names)}
+    for name in jobmodes:
+        if name not in codes:
+            codes[name] = len(names)
+            names.append(name)
+    job_modes = np.array([codes[name] for name in jobmodes], dtype=np.int16)[order]
+
+    # Junction rows of the offers (all of them when reading all offers)
+    offer_ids = None if condition is None else ids
+    job_levels = np.zeros(ids.size, dtype=np.uint16)
+    contract_types = np.zeros(ids.size, dtype=np.uint8)
+    tag_rows = []
+    for tables in tiers:
+        for column, junction, dimension in (
+            (job_levels, tables.job_levels, "joblevel_id"),
+            (contract_types, tables.contract_types, "contracttype_id"),
+        ):
+            junction_ids, dimension_ids = junction_rows(
+                session, junction, dimension, offer_ids
+            )
+            positions, found = offer_positions(ids, junction_ids)
+            np.bitwise_or.at(
+                column,
+                positions[found],
+                np.left_shift(1, dimension_ids[found]).astype(column.dtype),
+            )
+        tag_rows.append(junction_rows(session, tables.tags, "tag_id", offer_ids))
+    tag_offer_ids = np.concatenate([offer_ids for offer_ids, _ in tag_rows])
+    tag_ids = np.concatenate([tag_ids for _, tag_ids in tag_rows])
+    positions, found = offer_positions(ids, tag_offer_ids)
+    n_words = int(tag_ids.max()) // 64 + 1 if tag_ids.size else 1
+    tags = np.zeros((n_words, ids.size), dtype=np.uint64)
+    np.bitwise_or.at(
+        tags,
+        (tag_ids[found] // 64, positions[found]),
+        np.left_shift(np.uint64(1), (tag_ids[found] % 64).astype(np.uint64)),
+    )
+
+    columns = SnapshotColumns(
+        ids=ids,
+        days=calendar_numbers(days, missing),
+        months=calendar_numbers(months, missing),
+        years=np.where(missing, NO_DATE, years).astype(np.int32),
+        job_modes=job_modes,
+        job_mode_names=tuple(names),
+        job_levels=job_levels,
+        contract_types=contract_types,
+        tags=tags,
+    )
+    return columns, collected
+
+
+def merge_columns(old: SnapshotColumns, new: SnapshotColumns) -> SnapshotColumns:
+    """Returns columns of offers of both (new uses job mode codes of old)"""
+    n_words = max(old.tags.shape[0], new.tags.shape[0])
+    tags = np.zeros((n_words, old.ids.size + new.ids.size), dtype=np.uint64)
+    tags[: old.tags.shape[0], : old.ids.size] = old.tags
+    tags[: new.tags.shape[0], old.ids.size :] = new.tags
+    ids = np.concatenate([old.ids, new.ids])
+    order = np.argsort(ids, kind="stable")
+    return SnapshotColumns(
+        ids=ids[order],
+        days=np.concatenate([old.days, new.days])[order],
+        months=np.concatenate([old.months, new.months])[order],
+        years=np.concatenate([old.years, new.years])[order],
+        job_modes=np.concatenate([old.job_modes, new.job_modes])[order],
+        job_mode_names=new.job_mode_names,
+        job_levels=np.concatenate([old.job_levels, new.job_levels])[order],
+        contract_types=np.concatenate([old.contract_types, new.contract_types])[order],
+        tags=tags[:, order],
+    )
+
+
+def count_offers(session) -> int:
+    """Returns the number of all offers (regular and archived)"""
+    return sum(
+        # pylint: disable-next=not-callable
+        session.execute(select(func.count()).select_from(tables.offers)).scalar_one()
+        for tables in (HOT_OFFERS, ARCHIVED_OFFERS)
+    )
+
+
+class OffersSnapshot(IncrementallyRefreshed):
+    """Snapshot of offers answering calculate_stats queries"""
+
+    def load(self, session, old, since):
+        if old is None:
+            return load_columns(session, (HOT_OFFERS, ARCHIVED_OFFERS))
+        # New offers are always stored in the regular table
+        new, collected = load_columns(
+            session,
+            (HOT_OFFERS,),
+            condition=lambda offers: offers.c.collected >= since,
+            job_mode_names=old.job_mode_names,
+        )
+        # Offers collected at the very same time were already read
+        unseen = ~np.isin(new.ids, old.ids)
+        new = SnapshotColumns(
+            *(
+                value[..., unseen] if isinstance(value, np.ndarray) else value
+                for value in new
+            )
+        )
+        columns = merge_columns(old, new)
+        if columns.ids.size != count_offers(session):
+            return load_columns(session, (HOT_OFFERS, ARCHIVED_OFFERS))
+        return columns, max(collected or since, since)
+
+    def columns(self, session) -> SnapshotColumns:
+        return self.current(session)
+
+    def selection(
+        self,
+        columns: SnapshotColumns,
+        tags: list[str] | None = None,
+        contract_type: str | None = None,
+        job_mode: str | None = None,
+        job_level: str | None = None,
+    ) -> np.ndarray:
+        """Returns the mask of offers meeting the criteria
+
+        Criteria are the same (and matched the same way) as in
+        statistics.offers_selection.
+        """
+        selected = np.ones(columns.ids.size, dtype=bool)
+        nothing = np.zeros(columns.ids.size, dtype=bool)
+        for raw, parse, to_id, column in (
+            (contract_type, parse_contract_types, contract_type_id, "contract_types"),
+            (job_level, parse_job_levels, job_level_id, "job_levels"),
+        ):
+            if raw is None:
+                continue
+            names = parse(raw)
+            if not names:
+                return nothing
+            masks = getattr(columns, column)
+            required = masks.dtype.type(sum(1 << to_id(name) for name in set(names)))
+            selected &= (masks & required) == required
+        if job_mode is not None:
+            if job_mode not in columns.job_mode_names:
+                return nothing
+            selected &= columns.job_modes == columns.job_mode_names.index(job_mode)
+        for tag in tags or ():
+            tag_id = self._tag_ids.get(tag)
+            if tag_id is None or tag_id // 64 >= columns.tags.shape[0]:
+                return nothing
+            bit = np.uint64(1) << np.uint64(tag_id % 64)
+            selected &= (columns.tags[tag_id // 64] & bit) != 0
+        return selected
+
+    def binned_counts(
+        self,
+        session,
+        binning: Interval,
+        first_day: date,
+        last_day: date,
+        tags: list[str] | None = None,
+        contract_type: str | None = None,
+        job_mode: str | None = None,
+        job_level: str | None = None,
+    ) -> dict:
+        """Counts offers in (not empty) bins between the first days of bins
+
+        Returns
+        -------
+        {bin: count} - same as rows of statistics.binned_counts_query
+        """
+        columns = self.columns(session)
+        positions, first, n_bins = bin_positions(columns, binning, first_day, last_day)
+        selected = (positions >= 0) & (positions < n_bins)
+        selected &= self.selection(columns, tags, contract_type, job_mode, job_level)
+        counts = np.bincount(positions[selected], minlength=n_bins)
+        not_empty = np.flatnonzero(counts)
+        return dict(
+            zip(bin_keys(not_empty + first, binning), counts[not_empty].tolist())
+        )
+
+    def grouped_counts(
+        self,
+        session,
+        binning: Interval,
+        first_day: date,
+        last_day: date,
+        group_by: str,
+        groups: list[str] | None = None,
+        tags: list[str] | None = None,
+        contract_type: str | None = None,
+        job_mode: str | None = None,
+        job_level: str | None = None,
+    ) -> dict:
+        """Counts offers in (not empty) bins of every tag, job level
+        or contract type (offers are not grouped by companies)
+
+        Bits of the offers' bitsets or bit masks are unpacked into
+        (offer, group) pairs, counted in all bins of all groups
+        with a single np.bincount.
+
+        Returns
+        -------
+        {(group, bin): count} - same as rows of
+        statistics.grouped_counts_query
+        """
+        columns = self.columns(session)
+        positions, first, n_bins = bin_positions(columns, binning, first_day, last_day)
+        selected = (positions >= 0) & (positions < n_bins)
+        selected &= self.selection(columns, tags, contract_type, job_mode, job_level)
+        offers = np.flatnonzero(selected)
+        match group_by:
+            case "tag":
+                bitsets = columns.tags[:, offers].T
+                names = {tag_id: name for name, tag_id in self._tag_ids.items()}
+            case "job_level":
+                bitsets = columns.job_levels[offers, None]
+                names = {job_level_id(name): name for name in JOB_LEVELS}
+            case "contract_type":
+                bitsets = columns.contract_types[offers, None]
+                names = {contract_type_id(name): name for name in CONTRACT_TYPES}
+            case _:
+                raise ValueError(f"offers can not be grouped by {group_by} in memory")
+        # Bit i of the unpacked row of an offer is set if it has the value of id i
+        members = np.unpackbits(
+            np.ascontiguousarray(bitsets.astype("<u8")).view(np.uint8),
+            axis=1,
+            bitorder="little",
+        )
+        member_offers, dimension_ids = np.divmod(
+            np.flatnonzero(members.view(bool)), members.shape[1]
+        )
+        counts = np.bincount(
+            dimension_ids * n_bins + positions[offers[member_offers]],
+            minlength=n_bins,
+        )
+        not_empty = np.flatnonzero(counts)
+        dimension_ids, bins = np.divmod(not_empty, n_bins)
+        return {
+            (names[dimension_id], key): count
+            for dimension_id, key, count in zip(
+                dimension_ids.tolist(),
+                bin_keys(bins + first, binning),
+                counts[not_empty].tolist(),
+            )
+            if dimension_id in names and (not groups or names[dimension_id] in groups)
+        }
+
+
+def init_stats_snapshot(app) -> None:
+    """Creates the snapshot if the memory statistics engine is configured"""
+    if app.config.get("STATISTICS_ENGINE", "sql") == "memory":
+        app.extensions["stats_snapshot"] = OffersSnapshot(
+            refresh_seconds=app.config.get("STATISTICS_SNAPSHOT_REFRESH_SECONDS", 60)
+        )
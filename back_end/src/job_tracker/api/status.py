@@ -79,3 +79,15 @@ def health():
         "is_selenium_service_healthy": get_selenium_service_status(),
         "is_database_online": database_status,
     }
+
+
+def metrics():
+    """Numbers of requests of this process (see api.single_flight)
+    and the state of the dashboard warm-up (see api.warm_up)
+    """
+    flights = current_app.extensions.get("single_flight")
+    warm_up = current_app.extensions.get("warm_up")
+    return {
+        "single_flight": None if flights is None else flights.metrics(),
+        "warm_up": None if warm_up is None else warm_up.metrics(),
+    }
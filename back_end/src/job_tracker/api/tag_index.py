@@ -0,0 +1,233 @@
+"""Tag bitmap index (offers having every tag as compressed bitmaps)
+
+With TAG_INDEX enabled, ids of offers (regular and archived) having
+each tag are kept in the memory of the process as compressed bitmaps
+(in the style of roaring bitmaps, see Bitmap). Offers having ALL
+of several tags are found by intersecting their bitmaps, instead of
+with a subquery per tag, and statistics count only the offers found
+(see statistics.indexed_tags). The number of offers having each tag
+is the cardinality of its bitmap (see tags.get_all).
+
+The index is built at startup and refreshed incrementally (tags
+of offers collected since the last refresh are added) after
+the scraping task stores new offers and, for other processes,
+every TAG_INDEX_REFRESH_SECONDS when used. If the number of tags
+of offers in the database does not match after the refresh
+the index is rebuilt.
+"""
+
+from __future__ import annotations
+
+from itertools import chain
+from typing import TYPE_CHECKING
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import exc, func, select
+
+from job_tracker.database import db
+from job_tracker.models import ARCHIVED_OFFERS, HOT_OFFERS
+
+from .in_memory import IncrementallyRefreshed
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+# Ids are split into chunks of 2**16 values by their high bits
+_CHUNK_BITS = 16
+_LOW_MASK = (1 << _CHUNK_BITS) - 1
+# Chunks with more values are kept as bit arrays (8 kB), smaller ones
+# as sorted arrays of the low 16 bits of ids (at most 8 kB)
+_ARRAY_MAX = 4096
+_WORDS = (1 << _CHUNK_BITS) // 64
+
+
+def _container(values: np.ndarray) -> np.ndarray:
+    """Returns the container of the chunk's values (sorted uint16)
+
+    Containers are told apart by their dtype: uint16 - sorted values,
+    uint64 - bit array (bit value % 64 of word value // 64 is set).
+    """
+    if values.size <= _ARRAY_MAX:
+        return values
+    words = np.zeros(_WORDS, dtype=np.uint64)
+    np.bitwise_or.at(
+        words,
+        values >> 6,
+        np.left_shift(np.uint64(1), (values & 63).astype(np.uint64)),
+    )
+    return words
+
+
+def _values(container: np.ndarray) -> np.ndarray:
+    """Returns sorted (uint16) values of the container"""
+    if container.dtype == np.uint16:
+        return container
+    bits = np.unpackbits(container.astype("<u8").view(np.uint8), bitorder="little")
+    return np.flatnonzero(bits).astype(np.uint16)
+
+
+def _cardinality(container: np.ndarray) -> int:
+    if container.dtype == np.uint16:
+        return container.size
+    return int(np.bitwise_count(container).sum())
+
+
+def _intersection(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if a.dtype == np.uint16 and b.dtype == np.uint16:
+        return np.intersect1d(a, b, assume_unique=True)
+    if a.dtype == np.uint16 or b.dtype == np.uint16:
+        values, words = (a, b) if a.dtype == np.uint16 else (b, a)
+        bits = words[values >> 6] >> (values & 63).astype(np.uint64)
+        return values[(bits & np.uint64(1)).astype(bool)]
+    return _container(_values(a & b))
+
+
+class Bitmap:
+    """Compressed bitmap of non-negative integers (ids of offers)"""
+
+    def __init__(self, containers: dict[int, np.ndarray] | None = None) -> None:
+        # {high bits of ids: container of their low bits}
+        self.containers = containers or {}
+
+    @classmethod
+    def from_ids(cls, ids) -> Bitmap:
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        keys, starts = np.unique(ids >> _CHUNK_BITS, return_index=True)
+        chunks = np.split((ids & _LOW_MASK).astype(np.uint16), starts[1:])
+        return cls({int(key): _container(chunk) for key, chunk in zip(keys, chunks)})
+
+    def __or__(self, other: Bitmap) -> Bitmap:
+        containers = dict(self.containers)
+        for key, container in other.containers.items():
+            if key in containers:
+                container = _container(
+                    np.union1d(_values(containers[key]), _values(container))
+                )
+            containers[key] = container
+        return Bitmap(containers)
+
+    def __and__(self, other: Bitmap) -> Bitmap:
+        containers = {}
+        for key in self.containers.keys() & other.containers.keys():
+            container = _intersection(self.containers[key], other.containers[key])
+            if container.size:
+                containers[key] = container
+        return Bitmap(containers)
+
+    def __len__(self) -> int:
+        return sum(map(_cardinality, self.containers.values()))
+
+    def to_array(self) -> np.ndarray:
+        """Returns sorted ids (int64)"""
+        return np.concatenate(
+            [
+                (key << _CHUNK_BITS) + _values(self.containers[key]).astype(np.int64)
+                for key in sorted(self.containers)
+            ]
+            or [np.empty(0, dtype=np.int64)]
+        )
+
+
+def tag_rows(session, tiers, since: datetime | None = None):
+    """Returns (tag_id, joboffer_id) arrays of tags of offers of the tiers
+    (only of offers collected at or after since, if given)
+    """
+    rows = []
+    for tables in tiers:
+        query = select(tables.tags.c.tag_id, tables.tags.c.joboffer_id)
+        if since is not None:
+            offers = tables.offers
+            query = query.join(
+                offers, offers.c.joboffer_id == tables.tags.c.joboffer_id
+            ).where(offers.c.collected >= since)
+        rows += session.execute(query).all()
+    rows = np.fromiter(chain.from_iterable(rows), dtype=np.int64).reshape(-1, 2)
+    return rows[:, 0], rows[:, 1]
+
+
+def tag_bitmaps(tag_ids: np.ndarray, offer_ids: np.ndarray) -> dict[int, Bitmap]:
+    order = np.argsort(tag_ids, kind="stable")
+    keys, starts = np.unique(tag_ids[order], return_index=True)
+    return {
+        int(key): Bitmap.from_ids(ids)
+        for key, ids in zip(keys, np.split(offer_ids[order], starts[1:]))
+    }
+
+
+def count_offer_tags(session) -> int:
+    """Returns the number of tags of all offers (regular and archived)"""
+    return sum(
+        # pylint: disable-next=not-callable
+        session.execute(select(func.count()).select_from(tables.tags)).scalar_one()
+        for tables in (HOT_OFFERS, ARCHIVED_OFFERS)
+    )
+
+
+class TagIndex(IncrementallyRefreshed):
+    """Bitmaps of offers having every tag"""
+
+    def load(self, session, old, since):
+        # Timestamp is read first so that no offer is missed next time
+        collected = session.execute(
+            select(func.max(HOT_OFFERS.offers.c.collected))
+        ).scalar_one()
+        if old is None:
+            bitmaps = tag_bitmaps(*tag_rows(session, (HOT_OFFERS, ARCHIVED_OFFERS)))
+            return bitmaps, collected
+        # New offers are always stored in the regular table,
+        # offers collected at the very same time are added again
+        # (without any effect).
+        bitmaps = dict(old)
+        for tag_id, bitmap in tag_bitmaps(
+            *tag_rows(session, (HOT_OFFERS,), since)
+        ).items():
+            bitmaps[tag_id] = bitmaps[tag_id] | bitmap if tag_id in bitmaps else bitmap
+        if sum(map(len, bitmaps.values())) != count_offer_tags(session):
+            bitmaps = tag_bitmaps(*tag_rows(session, (HOT_OFFERS, ARCHIVED_OFFERS)))
+        return bitmaps, collected or since
+
+    def bitmaps(self, session) -> dict[int, Bitmap]:
+        return self.current(session)
+
+    def matching(self, session, tags: list[str]) -> Bitmap:
+        """Returns the bitmap of offers having ALL of the tags"""
+        bitmaps = self.bitmaps(session)
+        of_tags = []
+        for tag in set(tags):
+            bitmap = bitmaps.get(self._tag_ids.get(tag))
+            if bitmap is None:
+                return Bitmap()
+            of_tags.append(bitmap)
+        # Starting with the smallest bitmap keeps intersections small
+        of_tags.sort(key=len)
+        matching = of_tags[0]
+        for bitmap in of_tags[1:]:
+            matching &= bitmap
+            if not matching.containers:
+                break
+        return matching
+
+    def counts(self, session) -> dict[str, int]:
+        """Returns the number of offers having each tag"""
+        bitmaps = self.bitmaps(session)
+        return {
+            name: len(bitmaps[tag_id]) if tag_id in bitmaps else 0
+            for name, tag_id in self._tag_ids.items()
+        }
+
+
+def init_tag_index(app) -> None:
+    """Creates and builds the index if it is enabled
+
+    Has to be called in the app context.
+    If the database can not be read the index is built when used.
+    """
+    if not app.config.get("TAG_INDEX", False):
+        return
+    index = TagIndex(refresh_seconds=app.config.get("TAG_INDEX_REFRESH_SECONDS", 60))
+    app.extensions["tag_index"] = index
+    try:
+        index.refresh(db.session)
+    except exc.OperationalError:
+        current_app.logger.exception("Failed to build the tag index")
@@ -1,15 +1,46 @@
 from connexion.problem import problem
-from flask import current_app
-from sqlalchemy import exc
+from flask import current_app, request
+from sqlalchemy import exc, func, select
 
-from job_tracker.models import Tag
+from job_tracker.database import db
+from job_tracker.models import ARCHIVED_OFFERS, HOT_OFFERS, Tag
+from job_tracker.replicas import read_only
 
 # from job_tracker.models import Tag, tags_schema
 
+# Silence litner for lines using func (eg. func.count)
+# pylint: disable=not-callable
 
+
+def tag_counts() -> dict[str, int]:
+    """Returns the number of offers (regular and archived) having each tag
+
+    Offers are counted with the tag index if it is enabled
+    (see tag_index module).
+    """
+    index = current_app.extensions.get("tag_index")
+    if index is not None:
+        return index.counts(db.session)
+    counts = dict.fromkeys(db.session.execute(select(Tag.name)).scalars(), 0)
+    for tables in (HOT_OFFERS, ARCHIVED_OFFERS):
+        query = (
+            select(Tag.name, func.count(tables.tags.c.joboffer_id))
+            .join(tables.tags, tables.tags.c.tag_id == Tag.tag_id)
+            .group_by(Tag.name)
+        )
+        for name, count in db.session.execute(query).all():
+            counts[name] += count
+    return counts
+
+
+@read_only
 def get_all():
+    with_counts = request.args.get("counts", type=str) == "true"
     try:
-        tags = Tag.query.all()
+        if with_counts:
+            counts = tag_counts()
+        else:
+            tags = Tag.query.all()
     except exc.OperationalError:
         current_app.logger.exception(
             ("Failed to connect to the database while trying query for tags")
@@ -17,6 +48,12 @@ def get_all():
         return problem(
             status=500, title="database offline", detail="Check server health"
         )
-    else:
-        # return tags_schema.dump(tags)
-        return [tag.name for tag in tags]
+    if with_counts:
+        return [
+            {"name": name, "count": count}
+            for name, count in sorted(
+                counts.items(), key=lambda item: (-item[1], item[0])
+            )
+        ]
+    # return tags_schema.dump(tags)
+    return [tag.name for tag in tags]
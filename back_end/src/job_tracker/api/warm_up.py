@@ -0,0 +1,162 @@
+"""Warm-up of the dashboard cache
+
+The first dashboard request after the app starts or the scraping task
+stores new offers would compute the payload (statistics and tags)
+from scratch. With WARM_UP enabled, payloads of the most common views
+are computed and cached (see dashboard.refresh_dashboard) in a background
+thread before they are requested:
+
+- the views of WARM_UP_VIEWS (parameters of the dashboard endpoint,
+  an empty one is the default view of the dashboard),
+- the default view filtered by each of WARM_UP_TOP_TAGS most common tags.
+
+Views are computed one by one until all of them are cached or
+WARM_UP_BUDGET_SECONDS have passed (queries in progress are interrupted
+at that time, see query_cost). Views are read from the primary database,
+replicas may not have the new offers yet.
+"""
+
+import threading
+import time
+
+from flask import current_app, g
+from sqlalchemy import exc
+from werkzeug.datastructures import MultiDict
+
+from job_tracker.database import db
+
+from .dashboard import dashboard_view, refresh_dashboard
+from .query_cost import QueryTimeout
+
+
+def hot_views(views: list[dict], tags: list[str]) -> list[dict]:
+    """Returns the dashboard views of the parameters (views) and
+    the default views of the tags, without duplicates
+    """
+    unique = []
+    for params in [*views, *({"tags": [tag]} for tag in tags)]:
+        view = dashboard_view(MultiDict(params))
+        if view not in unique:
+            unique.append(view)
+    return unique
+
+
+class WarmUp:
+    """Caches payloads of hot dashboard views, one warm-up at a time"""
+
+    def __init__(
+        self, views: list[dict], top_tags: int = 5, budget_seconds: float = 30
+    ) -> None:
+        self.views = views
+        self.top_tags = top_tags
+        self.budget_seconds = budget_seconds
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._last: dict | None = None
+
+    def start(self, app) -> bool:
+        """Starts the warm-up in a background thread
+
+        Returns False if the previous one is still running
+        (nothing is started then).
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(
+                target=self.run, args=(app,), name="dashboard-warm-up", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def join(self, timeout: float | None = None) -> None:
+        """Waits for the warm-up in progress (if any) to finish"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def run(self, app) -> dict:
+        """Caches the hot views (in the calling thread) within the budget
+
+        Returns numbers of the views cached, failed (invalid views
+        or interrupted queries) and skipped when the budget ran out.
+        """
+        started = time.monotonic()
+        deadline = started + self.budget_seconds
+        result = {"cached": 0, "failed": 0, "skipped": 0}
+        configured = hot_views(self.views, [])
+        views = list(configured)
+        # Views of the most common tags are added once they are known
+        # (every payload lists all tags, most common first).
+        tags_known = not self.top_tags
+        with app.app_context():
+            # Queries of every view end with the budget
+            g.query_deadline = deadline
+            while views:
+                if time.monotonic() >= deadline:
+                    result["skipped"] = len(views)
+                    break
+                view = views.pop(0)
+                try:
+                    payload = refresh_dashboard(view)
+                except (QueryTimeout, ValueError) as e:
+                    result["failed"] += 1
+                    app.logger.warning("Warm-up of view %s failed: %s", view, str(e))
+                    continue
+                except exc.OperationalError as e:
+                    db.session.rollback()
+                    if time.monotonic() < deadline:
+                        app.logger.exception(
+                            "Failed to connect to the database while warming up"
+                        )
+                        result["skipped"] = len(views) + 1
+                        break
+                    result["failed"] += 1
+                    app.logger.warning("Warm-up of view %s failed: %s", view, str(e))
+                    continue
+                result["cached"] += 1
+                if not tags_known:
+                    tags_known = True
+                    top_tags = [tag["name"] for tag in payload["tags"][: self.top_tags]]
+                    views += [
+                        tag_view
+                        for tag_view in hot_views([], top_tags)
+                        if tag_view not in configured
+                    ]
+        result["seconds"] = round(time.monotonic() - started, 3)
+        app.logger.info("Dashboard warm-up finished: %s", result)
+        self._last = result
+        return result
+
+    def metrics(self) -> dict:
+        thread = self._thread
+        return {
+            "running": thread is not None and thread.is_alive(),
+            "last": self._last,
+        }
+
+
+def init_warm_up(app) -> None:
+    """Enables the warm-up if configured and starts it
+
+    Has to be called after the database is initialized.
+    """
+    if not app.config.get("WARM_UP", False):
+        return
+    warm_up = WarmUp(
+        views=app.config.get("WARM_UP_VIEWS", [{}]),
+        top_tags=app.config.get("WARM_UP_TOP_TAGS", 5),
+        budget_seconds=app.config.get("WARM_UP_BUDGET_SECONDS", 30),
+    )
+    app.extensions["warm_up"] = warm_up
+    warm_up.start(app)
+
+
+def start_warm_up() -> bool:
+    """Starts the warm-up of the current app (if it is enabled)
+    in a background thread, eg. after new offers were stored
+    """
+    warm_up = current_app.extensions.get("warm_up")
+    if warm_up is None:
+        return False
+    return warm_up.start(current_app._get_current_object())
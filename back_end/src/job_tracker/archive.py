@@ -0,0 +1,125 @@
+"""Archiving of old offers (hot and cold tiers of offers)
+
+Offers posted more than ARCHIVE_AFTER_DAYS ago are moved, together with
+their tags, job levels and contract types, from the regular tables
+(hot tier) to the archive tables (cold tier, see models.ARCHIVED_OFFERS)
+by a scheduled task (see tasks module). This keeps the tables read by
+listings, search and most statistics small, no matter how long offers
+are collected.
+
+- archived offers are no longer listed, searched or exported,
+- statistics include archived offers, the archive is read only
+  if the requested date range starts before the newest archived offer,
+- archived offers are not stored again when scraped again.
+
+Offers can be archived manually with:
+
+python -m job_tracker.archive <days>
+
+The database is selected the same way as by the app
+(DATABASE_URI environment variable or the development sqlite file).
+"""
+
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import bindparam, create_engine, delete, func, insert, select, update
+
+from job_tracker.config import DevelopmentConfig
+from job_tracker.models import ARCHIVED_OFFERS, HOT_OFFERS, OfferTables, company_stats
+
+# Number of offers moved at once (in a single transaction)
+BATCH_SIZE = 1000
+
+
+def archive_offers(engine, posted_before: date) -> int:
+    """Moves offers posted before the date to the archive
+
+    Offers are moved in batches (oldest first), each one in its own
+    transaction, so that the scraping task and readers are not blocked
+    for long (eg. SQLite allows a single writer at a time).
+
+    Returns
+    -------
+    number of archived offers
+    """
+    hot_offers = HOT_OFFERS.offers
+    archived = 0
+    while True:
+        with engine.begin() as connection:
+            offer_ids = (
+                connection.execute(
+                    select(hot_offers.c.joboffer_id)
+                    .where(hot_offers.c.posted_date < posted_before)
+                    .order_by(hot_offers.c.posted_date)
+                    .limit(BATCH_SIZE)
+                )
+                .scalars()
+                .all()
+            )
+            if not offer_ids:
+                return archived
+            # Archived offers are no longer active offers of their companies
+            archived_by_company = connection.execute(
+                # pylint: disable-next=not-callable
+                select(hot_offers.c.company_id, func.count())
+                .where(hot_offers.c.joboffer_id.in_(offer_ids))
+                .group_by(hot_offers.c.company_id)
+            ).all()
+            connection.execute(
+                update(company_stats)
+                .where(company_stats.c.company_id == bindparam("b_company_id"))
+                .values(active_offers=company_stats.c.active_offers - bindparam("b_n")),
+                [
+                    {"b_company_id": company_id, "b_n": count}
+                    for company_id, count in archived_by_company
+                ],
+            )
+            for hot, cold in zip(HOT_OFFERS, ARCHIVED_OFFERS):
+                connection.execute(
+                    insert(cold).from_select(
+                        hot.columns.keys(),
+                        select(hot).where(hot.c.joboffer_id.in_(offer_ids)),
+                    )
+                )
+            # Junction rows before the offers they reference
+            for hot in (*HOT_OFFERS[1:], hot_offers):
+                connection.execute(delete(hot).where(hot.c.joboffer_id.in_(offer_ids)))
+        archived += len(offer_ids)
+
+
+def is_archived(connection, offer_id: int) -> bool:
+    """Checks if the offer was archived (connection can also be a session)"""
+    archived_offers = ARCHIVED_OFFERS.offers
+    return (
+        connection.execute(
+            select(archived_offers.c.joboffer_id).where(
+                archived_offers.c.joboffer_id == offer_id
+            )
+        ).first()
+        is not None
+    )
+
+
+def offer_tiers(connection, first_day: date) -> list[OfferTables]:
+    """Returns tables holding offers posted on the day or later
+
+    The archive is included only if any of the archived offers
+    was posted on the day or later (newest of them is found
+    with the posted_date index). Connection can also be a session.
+    """
+    newest_archived = connection.execute(
+        select(func.max(ARCHIVED_OFFERS.offers.c.posted_date))
+    ).scalar_one()
+    if newest_archived is None or newest_archived < first_day:
+        return [HOT_OFFERS]
+    return [HOT_OFFERS, ARCHIVED_OFFERS]
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1])
+    cutoff = date.today() - timedelta(days=days)
+    n_archived = archive_offers(
+        create_engine(DevelopmentConfig.SQLALCHEMY_DATABASE_URI), cutoff
+    )
+    print(f"{n_archived} offers posted before {cutoff} archived")
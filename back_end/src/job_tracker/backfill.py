@@ -0,0 +1,337 @@
+"""Backfill of values derived from the raw offer data
+
+Values derived from collected offers (eg. canonical job levels)
+are set by the ORM when offers are stored. Offers stored in any other way
+(eg. demo data loaded with plain SQL, databases created before
+the derived values were introduced) are processed here.
+
+Functions operate on a connection (not the Flask-SQLAlchemy session)
+so that they can also be used by migrations.
+Backfill can be run manually with:
+
+python -m job_tracker.backfill
+
+The database is selected the same way as by the app
+(DATABASE_URI environment variable or the development sqlite file).
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import (
+    and_,
+    bindparam,
+    case,
+    create_engine,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+)
+
+from job_tracker.config import DevelopmentConfig
+from job_tracker.fulltext import search_document
+from job_tracker.models import (
+    ARCHIVED_OFFERS,
+    HOT_OFFERS,
+    RECENT_OFFER_DAYS,
+    Company,
+    JobOffer,
+    company_stats,
+    joboffer_contracttype,
+    joboffer_joblevel,
+    posted_calendar,
+    salary_columns,
+    tag_pair_month,
+)
+from job_tracker.parsers import (
+    contract_type_id,
+    job_level_id,
+    parse_contract_types,
+    parse_job_levels,
+)
+
+# Number of offers processed at once
+BATCH_SIZE = 1000
+
+
+def offer_batches(connection, *columns):
+    """Yields lists of rows of all offers (in batches of BATCH_SIZE)
+
+    Batches are read one by one in the order of joboffer_id (keyset
+    pagination) so other statements can be executed on the same connection
+    between them (which is not possible while streaming a single result
+    with some drivers, eg. PyMySQL).
+    """
+    last_id = None
+    while True:
+        query = select(*columns).order_by(JobOffer.joboffer_id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(JobOffer.joboffer_id > last_id)
+        rows = connection.execute(query).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].joboffer_id
+
+
+def backfill_dimensions(connection) -> int:
+    """Links all offers with canonical job levels and contract types
+
+    Existing links are replaced with the ones parsed from the raw
+    descriptions (joblevel and contracttype columns).
+
+    Returns
+    -------
+    number of processed offers
+    """
+    processed = 0
+    for rows in offer_batches(
+        connection, JobOffer.joboffer_id, JobOffer.joblevel, JobOffer.contracttype
+    ):
+        offer_ids = [row.joboffer_id for row in rows]
+        connection.execute(
+            delete(joboffer_joblevel).where(
+                joboffer_joblevel.c.joboffer_id.in_(offer_ids)
+            )
+        )
+        connection.execute(
+            delete(joboffer_contracttype).where(
+                joboffer_contracttype.c.joboffer_id.in_(offer_ids)
+            )
+        )
+        levels = [
+            {"joboffer_id": row.joboffer_id, "joblevel_id": job_level_id(name)}
+            for row in rows
+            for name in parse_job_levels(row.joblevel)
+        ]
+        contract_types = [
+            {"joboffer_id": row.joboffer_id, "contracttype_id": contract_type_id(name)}
+            for row in rows
+            for name in parse_contract_types(row.contracttype)
+        ]
+        if levels:
+            connection.execute(insert(joboffer_joblevel), levels)
+        if contract_types:
+            connection.execute(insert(joboffer_contracttype), contract_types)
+        processed += len(rows)
+    return processed
+
+
+def backfill_calendar(connection) -> int:
+    """Sets calendar bins (posted_date, posted_month, posted_year) of all offers
+
+    Returns
+    -------
+    number of processed offers
+    """
+    processed = 0
+    joboffer = JobOffer.__table__
+    statement = (
+        update(joboffer)
+        .where(joboffer.c.joboffer_id == bindparam("b_joboffer_id"))
+        .values(
+            posted_date=bindparam("b_posted_date"),
+            posted_month=bindparam("b_posted_month"),
+            posted_year=bindparam("b_posted_year"),
+        )
+    )
+    for rows in offer_batches(connection, JobOffer.joboffer_id, JobOffer.posted):
+        values = []
+        for row in rows:
+            posted_date, posted_month, posted_year = posted_calendar(row.posted)
+            values.append(
+                {
+                    "b_joboffer_id": row.joboffer_id,
+                    "b_posted_date": posted_date,
+                    "b_posted_month": posted_month,
+                    "b_posted_year": posted_year,
+                }
+            )
+        connection.execute(statement, values)
+        processed += len(rows)
+    return processed
+
+
+def backfill_salaries(connection) -> int:
+    """Sets parsed salary columns of all offers
+
+    Returns
+    -------
+    number of processed offers
+    """
+    processed = 0
+    joboffer = JobOffer.__table__
+    statement = (
+        update(joboffer)
+        .where(joboffer.c.joboffer_id == bindparam("b_joboffer_id"))
+        .values(
+            salary_min=bindparam("b_salary_min"),
+            salary_max=bindparam("b_salary_max"),
+            salary_currency=bindparam("b_salary_currency"),
+            salary_gross=bindparam("b_salary_gross"),
+            salary_period=bindparam("b_salary_period"),
+        )
+    )
+    names = ("min", "max", "currency", "gross", "period")
+    for rows in offer_batches(connection, JobOffer.joboffer_id, JobOffer.salary):
+        values = []
+        for row in rows:
+            row_values = {"b_joboffer_id": row.joboffer_id}
+            for name, value in zip(names, salary_columns(row.salary)):
+                row_values[f"b_salary_{name}"] = value
+            values.append(row_values)
+        connection.execute(statement, values)
+        processed += len(rows)
+    return processed
+
+
+def backfill_search(connection) -> int:
+    """Sets search documents (search_text) of all offers
+
+    Returns
+    -------
+    number of processed offers
+    """
+    processed = 0
+    joboffer = JobOffer.__table__
+    statement = (
+        update(joboffer)
+        .where(joboffer.c.joboffer_id == bindparam("b_joboffer_id"))
+        .values(search_text=bindparam("b_search_text"))
+    )
+    company_name = (
+        select(Company.name)
+        .where(Company.company_id == JobOffer.company_id)
+        .scalar_subquery()
+        .label("company_name")
+    )
+    for rows in offer_batches(
+        connection, JobOffer.joboffer_id, JobOffer.title, company_name
+    ):
+        values = [
+            {
+                "b_joboffer_id": row.joboffer_id,
+                "b_search_text": search_document(row.title, row.company_name),
+            }
+            for row in rows
+        ]
+        connection.execute(statement, values)
+        processed += len(rows)
+    return processed
+
+
+def backfill_tag_pairs(connection) -> int:
+    """Counts pairs of tags of all offers (regular and archived)
+    in months they were posted (tag_pair_month) from scratch
+
+    Has to run after backfill_calendar (offers are counted by posted_month).
+
+    Returns
+    -------
+    number of counted (month, tag, other tag) rows
+    """
+    counts = Counter()
+    for tables in (HOT_OFFERS, ARCHIVED_OFFERS):
+        offers, tags = tables.offers, tables.tags
+        other = tags.alias()
+        query = (
+            # pylint: disable-next=not-callable
+            select(offers.c.posted_month, tags.c.tag_id, other.c.tag_id, func.count())
+            .join(tags, tags.c.joboffer_id == offers.c.joboffer_id)
+            .join(
+                other,
+                and_(
+                    other.c.joboffer_id == offers.c.joboffer_id,
+                    other.c.tag_id >= tags.c.tag_id,
+                ),
+            )
+            .group_by(offers.c.posted_month, tags.c.tag_id, other.c.tag_id)
+        )
+        for month, tag_id, other_tag_id, offers_count in connection.execute(query):
+            counts[month, tag_id, other_tag_id] += offers_count
+    connection.execute(delete(tag_pair_month))
+    if counts:
+        connection.execute(
+            insert(tag_pair_month),
+            [
+                {
+                    "month": month,
+                    "tag_id": tag_id,
+                    "other_tag_id": other_tag_id,
+                    "offers": offers_count,
+                }
+                for (month, tag_id, other_tag_id), offers_count in counts.items()
+            ],
+        )
+    return len(counts)
+
+
+def backfill_company_stats(connection, today: date | None = None) -> int:
+    """Counts offers (regular and archived) of all companies
+    (company_stats) from scratch
+
+    Offers posted RECENT_OFFER_DAYS before today (default: the current
+    date) or later are counted as recent. Companies without any offers
+    are not counted (they are listed once they have offers).
+
+    Returns
+    -------
+    number of companies
+    """
+    recent_since = (today or date.today()) - timedelta(days=RECENT_OFFER_DAYS)
+    stats = {}
+    for tables in (HOT_OFFERS, ARCHIVED_OFFERS):
+        offers = tables.offers
+        query = select(
+            offers.c.company_id,
+            func.count(),  # pylint: disable=not-callable
+            func.sum(case((offers.c.posted_date >= recent_since, 1), else_=0)),
+            func.min(offers.c.collected),
+            func.max(offers.c.collected),
+        ).group_by(offers.c.company_id)
+        for company_id, total, recent, first_seen, last_seen in connection.execute(
+            query
+        ):
+            if company_id is None:
+                continue
+            company = stats.setdefault(
+                company_id,
+                {
+                    "company_id": company_id,
+                    "offers": 0,
+                    "active_offers": 0,
+                    "recent_offers": 0,
+                    "recent_since": recent_since,
+                    "first_seen": first_seen,
+                    "last_seen": last_seen,
+                },
+            )
+            company["offers"] += total
+            if tables is HOT_OFFERS:
+                company["active_offers"] = total
+            company["recent_offers"] += recent
+            company["first_seen"] = min(company["first_seen"], first_seen)
+            company["last_seen"] = max(company["last_seen"], last_seen)
+    connection.execute(delete(company_stats))
+    if stats:
+        connection.execute(insert(company_stats), list(stats.values()))
+    return len(stats)
+
+
+def backfill_all(connection) -> None:
+    """Runs all backfills"""
+    backfill_dimensions(connection)
+    backfill_calendar(connection)
+    backfill_salaries(connection)
+    backfill_search(connection)
+    backfill_tag_pairs(connection)
+    backfill_company_stats(connection)
+
+
+if __name__ == "__main__":
+    engine = create_engine(DevelopmentConfig.SQLALCHEMY_DATABASE_URI)
+    with engine.begin() as conn:
+        backfill_all(conn)
+    print("Backfill completed")
@@ -0,0 +1,199 @@
+"""ASGI middleware compressing responses (brotli or gzip)
+
+The encoding is negotiated with the client using the Accept-Encoding header.
+Brotli is only offered when the optional brotli package is installed.
+"""
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int) -> None:
+        # wbits=31 - produce gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, level: int) -> None:
+        # Brotli quality is in range 0-11 (gzip levels are 1-9)
+        self._compressor = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """Parses Accept-Encoding header into {encoding: quality}"""
+    encodings = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def negotiate_encoder(accept_encoding: str, gzip_level: int, brotli_level: int):
+    """Returns encoder for the best encoding accepted by the client or None"""
+    encodings = accepted_encodings(accept_encoding)
+    candidates = [(GzipEncoder, gzip_level)]
+    if brotli is not None:
+        # Preferred (listed first) when accepted with the same quality
+        candidates.insert(0, (BrotliEncoder, brotli_level))
+    best, best_quality = None, 0.0
+    for encoder_class, level in candidates:
+        quality = encodings.get(encoder_class.name, encodings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = (encoder_class, level), quality
+    if best is None:
+        return None
+    encoder_class, level = best
+    return encoder_class(level)
+
+
+class CompressionMiddleware:
+    """Compresses response bodies of at least minimum_size bytes
+
+    Responses that already have a Content-Encoding and responses
+    of media types that are already compressed are passed through untouched.
+    Streamed responses (eg. the offers export) are compressed chunk by chunk.
+    """
+
+    # Only these media types are compressed
+    compressible_types = (
+        "application/json",
+        "application/problem+json",
+        "application/x-ndjson",
+        "text/",
+    )
+
+    def __init__(
+        self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_level=4
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+        encoder = negotiate_encoder(accept_encoding, self.gzip_level, self.brotli_level)
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(
+            send, encoder, self.minimum_size, self.compressible_types
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """Wraps ASGI send callable of a single request"""
+
+    def __init__(self, send, encoder, minimum_size: int, compressible_types):
+        self._send = send
+        self.encoder = encoder
+        self.minimum_size = minimum_size
+        self.compressible_types = compressible_types
+        self.start_message = None
+        self.buffer = b""
+        self.is_passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Postpone sending headers until enough of the body is known
+            # to decide whether it is worth compressing.
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("Content-Type", "")
+            self.is_passthrough = "Content-Encoding" in headers or not any(
+                content_type.startswith(media_type)
+                for media_type in self.compressible_types
+            )
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.is_passthrough:
+            if self.start_message is not None:
+                await self._send(self.start_message)
+                self.start_message = None
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is None:
+            # Consecutive parts of the body (compression already started)
+            compressed = self.encoder.compress(body)
+            if not more_body:
+                compressed += self.encoder.flush()
+            await self._send(
+                {
+                    "type": "http.response.body",
+                    "body": compressed,
+                    "more_body": more_body,
+                }
+            )
+            return
+
+        # Body is usually sent in several parts (even if it is not streamed),
+        # collect them until the decision can be made.
+        self.buffer += body
+        if more_body and len(self.buffer) < self.minimum_size:
+            return
+        if not more_body and len(self.buffer) < self.minimum_size:
+            # Small, complete response - not worth compressing
+            await self._send(self.start_message)
+            self.start_message = None
+            await self._send({"type": "http.response.body", "body": self.buffer})
+            self.buffer = b""
+            self.is_passthrough = True
+            return
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoder.name
+        headers.add_vary_header("Accept-Encoding")
+        compressed = self.encoder.compress(self.buffer)
+        self.buffer = b""
+        if more_body:
+            # Final length is not known yet
+            del headers["Content-Length"]
+        else:
+            compressed += self.encoder.flush()
+            headers["Content-Length"] = str(len(compressed))
+        await self._send(self.start_message)
+        self.start_message = None
+        await self._send(
+            {"type": "http.response.body", "body": compressed, "more_body": more_body}
+        )
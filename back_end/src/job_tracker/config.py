@@ -1,17 +1,132 @@
+import json
 import os
 import pathlib
 
 root_dir = pathlib.Path(__file__).parent.resolve()
 
+# Connection pool used with database servers (MariaDB/MySQL, PostgreSQL).
+# Every gunicorn worker process has its own pool.
+SERVER_ENGINE_OPTIONS = {
+    # Connections kept open (and extra ones opened under load)
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+    # Seconds to wait for a free connection before failing the request
+    "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+    # Servers (and proxies) close idle connections (eg. MariaDB after
+    # wait_timeout), so they are replaced before that can happen
+    # and checked before being handed out.
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": True,
+}
+# Threads serving requests of a worker process (see workers module)
+# if the pool of the database engine does not limit its connections
+# (eg. SQLite in memory or max_overflow of -1)
+UNLIMITED_POOL_WSGI_WORKERS = int(os.environ.get("UNLIMITED_POOL_WSGI_WORKERS", "10"))
+# PRAGMAs set on every new SQLite connection (see database module)
+SQLITE_PRAGMAS = {
+    # Readers do not block the writer (the scraping task) and vice versa
+    "journal_mode": "WAL",
+    # Durable enough with WAL (only the last transactions can be lost
+    # on power failure, the database is never corrupted)
+    "synchronous": "NORMAL",
+    # Milliseconds to wait for the lock held by other connection
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", "5000")),
+    # Bytes of the database file read through memory mapping
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024**2))),
+    # Page cache of every connection (negative - in KiB)
+    "cache_size": -int(os.environ.get("SQLITE_CACHE_KIB", str(64 * 1024))),
+}
+
+
+def engine_options(database_uri: str | None) -> dict:
+    """Returns SQLAlchemy engine options suitable for the database
+
+    SQLite is tuned with PRAGMAs (SQLITE_PRAGMAS) instead,
+    the default pool of its engine is kept.
+    """
+    if database_uri is None or database_uri.startswith("sqlite"):
+        return {}
+    return dict(SERVER_ENGINE_OPTIONS)
+
 
 class BaseConfig:
     # SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Threads serving requests of a worker process (see workers module),
+    # 0 - as many as connections of the pool of the database engine.
+    WSGI_WORKERS = int(os.environ.get("WSGI_WORKERS", "0"))
+    UNLIMITED_POOL_WSGI_WORKERS = UNLIMITED_POOL_WSGI_WORKERS
+    # How long (in seconds) the total number of offers,
+    # returned with cursor paginated results, can be cached.
+    OFFERS_COUNT_CACHE_SECONDS = int(os.environ.get("OFFERS_COUNT_CACHE_SECONDS", "60"))
+    # JSON encoder used for responses: "orjson" (if installed) or "default"
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "orjson")
+    # Responses (of compressible types) of at least this many bytes
+    # are compressed with brotli or gzip, if the client accepts them.
+    COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true") == "true"
+    COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+    # Set to an empty dict to use SQLite defaults (rollback journal etc.)
+    SQLITE_PRAGMAS = SQLITE_PRAGMAS
+    # Read replicas (comma separated database URIs) used by the read-only
+    # endpoints (see replicas module). Replicas that can not be connected to
+    # are skipped for REPLICA_RETRY_SECONDS, the others are checked at most
+    # every REPLICA_CHECK_SECONDS.
+    SQLALCHEMY_READ_REPLICAS = [
+        uri for uri in os.environ.get("DATABASE_REPLICA_URIS", "").split(",") if uri
+    ]
+    REPLICA_CHECK_SECONDS = int(os.environ.get("REPLICA_CHECK_SECONDS", "10"))
+    REPLICA_RETRY_SECONDS = int(os.environ.get("REPLICA_RETRY_SECONDS", "30"))
+    # Offers posted more than this many days ago are moved to the archive
+    # every day (see archive module), 0 - offers are never archived.
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "0"))
+    # Offers are counted by statistics with SQL queries ("sql")
+    # or in a snapshot kept in memory ("memory", see api.stats_snapshot)
+    # refreshed at least every STATISTICS_SNAPSHOT_REFRESH_SECONDS.
+    STATISTICS_ENGINE = os.environ.get("STATISTICS_ENGINE", "sql")
+    STATISTICS_SNAPSHOT_REFRESH_SECONDS = int(
+        os.environ.get("STATISTICS_SNAPSHOT_REFRESH_SECONDS", "60")
+    )
+    # Offers having tags are found with bitmaps kept in memory
+    # (see api.tag_index) refreshed at least every TAG_INDEX_REFRESH_SECONDS.
+    # Statistics match tags with SQL if more than TAG_INDEX_MAX_OFFERS
+    # offers have them.
+    TAG_INDEX = os.environ.get("TAG_INDEX", "false") == "true"
+    TAG_INDEX_REFRESH_SECONDS = int(os.environ.get("TAG_INDEX_REFRESH_SECONDS", "60"))
+    TAG_INDEX_MAX_OFFERS = int(os.environ.get("TAG_INDEX_MAX_OFFERS", "10000"))
+    # Cost limits of statistics requests (see api.query_cost, 0 - no limit):
+    # number of bins, seconds of queries of a request and number
+    # of data points above which responses are streamed.
+    STATISTICS_MAX_BINS = int(os.environ.get("STATISTICS_MAX_BINS", "2000"))
+    STATISTICS_TIMEOUT_SECONDS = float(
+        os.environ.get("STATISTICS_TIMEOUT_SECONDS", "10")
+    )
+    STATISTICS_STREAM_MIN_ITEMS = int(
+        os.environ.get("STATISTICS_STREAM_MIN_ITEMS", "1000")
+    )
+    # How long (in seconds) payloads of the dashboard endpoint
+    # (tags, filters and statistics of a view) can be cached.
+    DASHBOARD_CACHE_SECONDS = int(os.environ.get("DASHBOARD_CACHE_SECONDS", "60"))
+    # Payloads of hot dashboard views are cached when the app starts
+    # and after new offers are stored (see api.warm_up): views of WARM_UP_VIEWS
+    # (JSON list of parameters of the dashboard endpoint, {} - the default
+    # view) and the default view of each of WARM_UP_TOP_TAGS most common tags,
+    # computed for at most WARM_UP_BUDGET_SECONDS.
+    WARM_UP = os.environ.get("WARM_UP", "true") == "true"
+    WARM_UP_VIEWS = json.loads(os.environ.get("WARM_UP_VIEWS", "[{}]"))
+    WARM_UP_TOP_TAGS = int(os.environ.get("WARM_UP_TOP_TAGS", "5"))
+    WARM_UP_BUDGET_SECONDS = float(os.environ.get("WARM_UP_BUDGET_SECONDS", "30"))
+    # Identical concurrent statistics requests share one computation
+    # (see api.single_flight), joined for at most SINGLE_FLIGHT_TIMEOUT_SECONDS.
+    SINGLE_FLIGHT = os.environ.get("SINGLE_FLIGHT", "true") == "true"
+    SINGLE_FLIGHT_TIMEOUT_SECONDS = float(
+        os.environ.get("SINGLE_FLIGHT_TIMEOUT_SECONDS", "10")
+    )
 
 
 class RegularConfig(BaseConfig):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URI")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
 
 
 class DevelopmentConfig(BaseConfig):
@@ -19,3 +134,4 @@ class DevelopmentConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = (
         os.environ.get("DATABASE_URI") or f"sqlite:///{root_dir.joinpath('backend.db')}"
     )
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
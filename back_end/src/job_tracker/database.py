@@ -1,3 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
-db = SQLAlchemy()
+from job_tracker.replicas import RoutingSession
+
+# Reads of the read-only endpoints can be routed to replicas (see replicas module)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def set_sqlite_pragmas(engine, pragmas: dict) -> None:
+    """Makes the engine set the PRAGMAs on every new connection
+
+    Does nothing for databases other than SQLite.
+    PRAGMAs are set once per connection (connections are pooled)
+    before it is used for anything else.
+    """
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
@@ -3,6 +3,7 @@ from flask import current_app
 from sqlalchemy import exc
 from sqlalchemy.sql import text
 
+from .backfill import backfill_all
 from .config import root_dir
 
 demo_data_script = root_dir.joinpath("demo_data.sql")
@@ -32,4 +33,7 @@ def load_demo_data(db):
             ("Failed to connect to the database while trying to load demo data.")
         )
     else:
+        # Demo offers are inserted with plain SQL (bypassing the ORM)
+        # so values derived from them have to be filled in.
+        backfill_all(db.session.connection())
         db.session.commit()
@@ -8,7 +8,7 @@
 -- search radius 10 km
 
 
-INSERT INTO `company` VALUES
+INSERT INTO `company` (`company_id`, `name`, `address`, `town`, `postalcode`, `website`) VALUES
 (37,'KPMG','','','','https://pracodawcy.pracuj.pl/company/37'),
 (519,'Leroy Merlin Polska Sp. z o.o.','','','','https://pracodawcy.pracuj.pl/company/519'),
 (967,'Polpharma S.A.','','','','https://pracodawcy.pracuj.pl/company/967'),
@@ -165,7 +165,7 @@ INSERT INTO `company` VALUES
 (1074158914,'DARWINAPPS sp. z o.o.','','','','https://pracodawcy.pracuj.pl/company/1074158914');
 
 
-INSERT INTO `joboffer` VALUES
+INSERT INTO `joboffer` (`joboffer_id`, `company_id`, `title`, `posted`, `collected`, `contracttype`, `jobmode`, `joblevel`, `salary`, `detailsurl`) VALUES
 (10535652,20109980,'DWH Tester','2024-03-25 00:00:00','2024-03-26 20:15:40','Pełny etat','','Specjalista (Mid / Regular), Starszy specjalista (Senior)','160–190 zł netto (+ VAT) / godz.','https://www.pracuj.pl/praca/dwh-tester-wegry,oferta,10535652?s=1d2c2faa&searchId=MTcxMTQ4NDExNTUzNi43MDYz'),
 (1003173113,1074015835,'QA Engineer (Manual Tester)','2024-03-23 00:00:00','2024-03-26 20:15:57','Pełny etat','','Specjalista (Mid / Regular)','','https://www.pracuj.pl/praca/qa-engineer-manual-tester-warszawa-aleje-jerozolimskie-132,oferta,1003173113?s=1d2c2faa&searchId=MTcxMTQ4NDExNTUzNi43MDYz'),
 (1003173147,1074015835,'Test Automation Engineer (QA)','2024-03-23 00:00:00','2024-03-26 20:15:57','Pełny etat','','Specjalista (Mid / Regular)','','https://www.pracuj.pl/praca/test-automation-engineer-qa-warszawa-aleje-jerozolimskie-132,oferta,1003173147?s=1d2c2faa&searchId=MTcxMTQ4NDExNTUzNi43MDYz'),
@@ -435,7 +435,7 @@ INSERT INTO `joboffer` VALUES
 (1003293661,20109980,'Tester','2024-04-19 00:00:00','2024-04-20 12:00:34','Pełny etat','','Specjalista (Mid / Regular)','60–80 zł netto (+ VAT) / godz.','https://www.pracuj.pl/praca/tester-warszawa-aleje-jerozolimskie-125-127,oferta,1003293661?s=1d2c2faa&searchId=MTcxMzYxNDQxNjY1OS41MDgz');
 
 
-INSERT INTO `tag` VALUES
+INSERT INTO `tag` (`tag_id`, `name`) VALUES
 (197,'.NET'),
 (270,'A/B testing'),
 (94,'Active Directory'),
@@ -710,7 +710,7 @@ INSERT INTO `tag` VALUES
 (134,'znajomość regulacji i procesów AML/CFT');
 
 
-INSERT INTO `joboffer_tag` VALUES
+INSERT INTO `joboffer_tag` (`joboffer_id`, `tag_id`) VALUES
 (10535652,1),
 (10535652,34),
 (10535652,56),
@@ -0,0 +1,166 @@
+"""Full-text search of offers (by title and company name)
+
+Every offer has a search document (JobOffer.search_text) - its title
+and the name of its company, lowercased and with diacritics removed
+(eg. "Młodszy Programista, Łódź" -> "mlodszy programista lodz"),
+so that searching for "lodz" finds "Łódź" on every database.
+Search phrases are folded the same way before they are matched.
+
+The document is indexed with the full-text index of the database:
+- SQLite: FTS5 external content table (joboffer_search) kept in sync
+  with the joboffer table by triggers,
+- PostgreSQL: GIN index of to_tsvector('simple', search_text),
+- MySQL/MariaDB: FULLTEXT index of search_text
+  (WARNING: words shorter than innodb_ft_min_token_size, 3 by default,
+  are not indexed).
+
+All words of the phrase must match words of the document, the last one
+as a prefix (so that a partially typed word is found too), and results
+are ranked by relevance as calculated by the database (BM25 in SQLite,
+ts_rank in PostgreSQL, MATCH score in MySQL/MariaDB).
+Higher score means better match on all databases.
+
+WARNING: SQLite drops triggers together with their table, migrations
+recreating the joboffer table (batch mode) must recreate the search index
+(drop_search_index + create_search_index).
+"""
+
+import re
+import unicodedata
+
+from sqlalchemy import column, func, literal_column, select, table, text
+
+SEARCH_TABLE = "joboffer_search"
+SEARCH_INDEX = "ix_joboffer_search_text"
+# Maximum number of words of a search phrase
+MAX_SEARCH_TERMS = 10
+
+# Letters that are not decomposed into a base letter and a diacritic
+_unfolded_letters = str.maketrans({"ł": "l", "Ł": "l"})
+_words = re.compile(r"\w+")
+
+_sqlite_statements = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        search_text, content='joboffer', content_rowid='joboffer_id',
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert
+        AFTER INSERT ON joboffer BEGIN
+        INSERT INTO {SEARCH_TABLE} (rowid, search_text)
+        VALUES (new.joboffer_id, new.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete
+        AFTER DELETE ON joboffer BEGIN
+        INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, search_text)
+        VALUES ('delete', old.joboffer_id, old.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+        AFTER UPDATE OF search_text ON joboffer BEGIN
+        INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, search_text)
+        VALUES ('delete', old.joboffer_id, old.search_text);
+        INSERT INTO {SEARCH_TABLE} (rowid, search_text)
+        VALUES (new.joboffer_id, new.search_text);
+    END""",
+    # Index offers existing before the table was created
+    f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')",
+)
+
+
+def fold_text(raw: str | None) -> str:
+    """Lowercases the text and removes diacritics, eg.::
+
+    >>> fold_text("Żółć, Łódź")
+    'zolc, lodz'
+    """
+    decomposed = unicodedata.normalize("NFKD", (raw or "").translate(_unfolded_letters))
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).lower()
+
+
+def search_document(title: str | None, company_name: str | None) -> str:
+    """Returns the text indexed for the offer (JobOffer.search_text)"""
+    return " ".join(_words.findall(fold_text(f"{title or ''} {company_name or ''}")))
+
+
+def search_terms(phrase: str | None) -> list[str]:
+    """Splits the search phrase into (folded) words
+
+    Punctuation and operators of the database search syntax are removed.
+    """
+    return _words.findall(fold_text(phrase))[:MAX_SEARCH_TERMS]
+
+
+def create_search_index(connection) -> None:
+    """Creates the full-text index of search documents of all offers"""
+    match connection.dialect.name:
+        case "sqlite":
+            for statement in _sqlite_statements:
+                connection.execute(text(statement))
+        case "postgresql":
+            connection.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON joboffer "
+                    "USING GIN (to_tsvector('simple', search_text))"
+                )
+            )
+        case "mysql" | "mariadb":
+            connection.execute(
+                text(f"CREATE FULLTEXT INDEX {SEARCH_INDEX} ON joboffer (search_text)")
+            )
+
+
+def drop_search_index(connection) -> None:
+    """Reverses create_search_index"""
+    match connection.dialect.name:
+        case "sqlite":
+            for trigger in ("insert", "delete", "update"):
+                connection.execute(
+                    text(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{trigger}")
+                )
+            connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+        case "postgresql":
+            connection.execute(text(f"DROP INDEX IF EXISTS {SEARCH_INDEX}"))
+        case "mysql" | "mariadb":
+            connection.execute(text(f"DROP INDEX {SEARCH_INDEX} ON joboffer"))
+
+
+def search_matches(dialect_name: str, id_column, text_column, terms: list[str]):
+    """Returns a subquery of offers matching all of the search terms
+
+    Parameters
+    ----------
+    dialect_name : name of the database dialect
+    id_column : JobOffer.joboffer_id
+    text_column : JobOffer.search_text
+    terms : words returned by search_terms (not empty)
+
+    Returns
+    -------
+    subquery with joboffer_id and score (higher is better) columns
+    """
+    match dialect_name:
+        case "sqlite":
+            # FTS5 query syntax, eg. "java" AND "krakow"*
+            query = " AND ".join(f'"{term}"' for term in terms) + "*"
+            search_table = table(SEARCH_TABLE, column("rowid"))
+            table_column = literal_column(SEARCH_TABLE)
+            matches = select(
+                search_table.c.rowid.label("joboffer_id"),
+                # bm25 is lower for better matches
+                (-func.bm25(table_column)).label("score"),
+            ).where(table_column.op("MATCH")(query))
+        case "postgresql":
+            # tsquery syntax, eg. java & krakow:*
+            query = " & ".join(terms) + ":*"
+            document = func.to_tsvector(literal_column("'simple'"), text_column)
+            tsquery = func.to_tsquery(literal_column("'simple'"), query)
+            matches = select(
+                id_column, func.ts_rank(document, tsquery).label("score")
+            ).where(document.op("@@")(tsquery))
+        case _:
+            # MySQL/MariaDB boolean mode syntax, eg. +java +krakow*
+            query = " ".join(f"+{term}" for term in terms) + "*"
+            score = text_column.match(query)
+            matches = select(id_column, score.label("score")).where(score)
+    return matches.subquery("matches")
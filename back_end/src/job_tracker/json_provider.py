@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from connexion.frameworks.flask import FlaskJSONProvider
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class OrjsonProvider(FlaskJSONProvider):
+    """JSON provider using orjson (much faster than the json module)
+
+    Output is compatible with the default (connexion's) provider:
+    keys are sorted and datetime objects are passed to the same
+    default() function, so they are encoded exactly as before.
+    Formatting arguments (eg. indent) passed by callers are ignored,
+    output is always compact.
+    """
+
+    options = (
+        orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if orjson is not None
+        else 0
+    )
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+json_providers = {
+    "default": FlaskJSONProvider,
+    "orjson": OrjsonProvider,
+}
+
+
+def init_json_provider(app: Flask) -> None:
+    """Replaces app's JSON provider with the one named in JSON_PROVIDER config"""
+    name = app.config.get("JSON_PROVIDER", "default")
+    if name not in json_providers:
+        raise ValueError(
+            f"JSON_PROVIDER can only be one of: {', '.join(json_providers)} "
+            f"- is: {name}"
+        )
+    if name == "orjson" and orjson is None:
+        app.logger.warning("orjson is not installed, using default JSON provider")
+        name = "default"
+    app.json = json_providers[name](app)
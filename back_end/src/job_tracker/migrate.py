@@ -0,0 +1,117 @@
+"""Database schema migrations (Alembic)
+
+Migration scripts live in the migrations directory of the package.
+The schema is brought up to date on application startup
+(see init_database), migrations can also be managed manually, eg.:
+
+python -m job_tracker.migrate current
+python -m job_tracker.migrate upgrade head
+python -m job_tracker.migrate downgrade 0001
+python -m job_tracker.migrate revision --autogenerate -m "add something"
+python -m job_tracker.migrate check-plans
+
+The database is selected the same way as by the app
+(DATABASE_URI environment variable or the development sqlite file).
+"""
+
+import argparse
+import sys
+
+from alembic import command
+from alembic.config import Config
+from flask import current_app
+from sqlalchemy import inspect
+
+from job_tracker.config import DevelopmentConfig, root_dir
+
+migrations_dir = root_dir.joinpath("migrations")
+# Revision matching the schema created by db.create_all()
+# before migrations were introduced.
+INITIAL_REVISION = "0001"
+VERSION_TABLE = "alembic_version"
+
+
+def alembic_config(connection=None, url: str | None = None) -> Config:
+    """Creates alembic configuration
+
+    If connection is given migrations are run using it (and its transaction),
+    otherwise alembic connects to the database at url.
+    """
+    cfg = Config()
+    cfg.set_main_option("script_location", str(migrations_dir))
+    if url is not None:
+        # '%' has a special meaning in alembic (configparser) options
+        cfg.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    cfg.attributes["connection"] = connection
+    return cfg
+
+
+def init_database(sqldb) -> None:
+    """Creates or upgrades the database schema to the latest revision
+
+    - empty database: all tables are created from models and the database
+      is marked as being at the latest revision,
+    - database created before migrations were introduced (tables exist
+      but there is no alembic version table): it is marked as being at the
+      initial revision and then upgraded,
+    - otherwise: the database is upgraded.
+
+    This function must be executed in active application context.
+    """
+    with sqldb.engine.begin() as connection:
+        existing_tables = set(inspect(connection).get_table_names())
+        cfg = alembic_config(connection)
+        if not existing_tables - {VERSION_TABLE}:
+            current_app.logger.info("Creating database schema")
+            sqldb.metadata.create_all(connection)
+            command.stamp(cfg, "head")
+            return
+        if VERSION_TABLE not in existing_tables:
+            current_app.logger.info(
+                "Database has no migrations history, assuming initial schema"
+            )
+            command.stamp(cfg, INITIAL_REVISION)
+        command.upgrade(cfg, "head")
+
+
+def main(argv=None):
+    # Imported here since it depends on the api package
+    # which is not needed to run migrations.
+    from job_tracker.query_plans import report_full_scans
+
+    parser = argparse.ArgumentParser(prog="python -m job_tracker.migrate")
+    subparsers = parser.add_subparsers(dest="cmd", required=True)
+    subparsers.add_parser("current", help="show current revision")
+    subparsers.add_parser("history", help="list revisions")
+    upgrade = subparsers.add_parser("upgrade", help="upgrade to a later revision")
+    upgrade.add_argument("revision", nargs="?", default="head")
+    downgrade = subparsers.add_parser("downgrade", help="revert to a revision")
+    downgrade.add_argument("revision")
+    revision = subparsers.add_parser("revision", help="create new revision")
+    revision.add_argument("-m", "--message", required=True)
+    revision.add_argument("--autogenerate", action="store_true")
+    subparsers.add_parser(
+        "check-plans", help="look for full table scans in the main queries"
+    )
+    args = parser.parse_args(argv)
+
+    url = DevelopmentConfig.SQLALCHEMY_DATABASE_URI
+    cfg = alembic_config(url=url)
+    match args.cmd:
+        case "current":
+            command.current(cfg, verbose=True)
+        case "history":
+            command.history(cfg)
+        case "upgrade":
+            command.upgrade(cfg, args.revision)
+        case "downgrade":
+            command.downgrade(cfg, args.revision)
+        case "revision":
+            command.revision(cfg, message=args.message, autogenerate=args.autogenerate)
+        case "check-plans":
+            return 1 if report_full_scans(url) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# pylint: skip-file
+# Alembic environment - executed by alembic commands
+# (see job_tracker.migrate for how they are invoked).
+from alembic import context
+from sqlalchemy import create_engine
+
+from job_tracker.database import db
+from job_tracker.fulltext import SEARCH_INDEX, SEARCH_TABLE
+from job_tracker.models import Company, JobOffer, Tag  # noqa: F401
+
+config = context.config
+target_metadata = db.metadata
+
+
+def include_name(name, type_, parent_names):
+    # Full-text search index (FTS5 tables in SQLite, FULLTEXT index
+    # in MySQL) is not described by models, see job_tracker.fulltext.
+    return not (name or "").startswith((SEARCH_TABLE, SEARCH_INDEX))
+
+
+def run_migrations_offline():
+    """Emit SQL to the script output instead of executing it"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # Normally the connection of the running app is passed by
+    # job_tracker.migrate, otherwise connect to the configured database.
+    connection = config.attributes.get("connection")
+    if connection is None:
+        engine = create_engine(config.get_main_option("sqlalchemy.url"))
+        with engine.connect() as connection:
+            run_migrations(connection)
+    else:
+        run_migrations(connection)
+
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # SQLite can alter tables only by recreating them
+        # ("batch" mode does it automatically).
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,75 @@
+"""Initial schema
+
+Tables as they were created by db.create_all() before migrations
+were introduced. Databases created that way are stamped with this
+revision by job_tracker.migrate.init_database.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-04-02 18:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tag",
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint("tag_id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "company",
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("address", sa.String(length=255), nullable=True),
+        sa.Column("town", sa.String(length=255), nullable=True),
+        sa.Column("postalcode", sa.String(length=255), nullable=True),
+        sa.Column("website", sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint("company_id"),
+    )
+    op.create_table(
+        "joboffer",
+        sa.Column("joboffer_id", sa.Integer(), nullable=False),
+        sa.Column("company_id", sa.Integer(), nullable=True),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("posted", sa.DateTime(), nullable=False),
+        sa.Column("collected", sa.DateTime(), nullable=False),
+        sa.Column("contracttype", sa.String(length=255), nullable=True),
+        sa.Column("jobmode", sa.String(length=255), nullable=True),
+        sa.Column("joblevel", sa.String(length=255), nullable=True),
+        sa.Column("salary", sa.String(length=255), nullable=True),
+        sa.Column("detailsurl", sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(["company_id"], ["company.company_id"]),
+        sa.PrimaryKeyConstraint("joboffer_id"),
+    )
+    op.create_table(
+        "joboffer_tag",
+        sa.Column("joboffer_id", sa.Integer(), nullable=False),
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["joboffer_id"], ["joboffer.joboffer_id"]),
+        sa.ForeignKeyConstraint(["tag_id"], ["tag.tag_id"]),
+        sa.PrimaryKeyConstraint("joboffer_id", "tag_id", name="joboffer_tag_pk"),
+    )
+    op.create_table(
+        "tmp_continuous_dates_range",
+        sa.Column("timestamp", sa.DateTime(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint("timestamp"),
+    )
+
+
+def downgrade():
+    op.drop_table("tmp_continuous_dates_range")
+    op.drop_table("joboffer_tag")
+    op.drop_table("joboffer")
+    op.drop_table("company")
+    op.drop_table("tag")
@@ -0,0 +1,38 @@
+"""Indexes for hot query paths
+
+- (posted, joboffer_id) and (collected, joboffer_id): offers orderings
+  (cursor pagination) and date range filters (incl. statistics)
+- joboffer.company_id: offers of a company
+- joboffer_tag(tag_id, joboffer_id): offers having a tag
+- company.name: company lookup by name
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-04-10 18:00:00
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_joboffer_posted_id", "joboffer", ["posted", "joboffer_id"])
+    op.create_index(
+        "ix_joboffer_collected_id", "joboffer", ["collected", "joboffer_id"]
+    )
+    op.create_index("ix_joboffer_company_id", "joboffer", ["company_id"])
+    op.create_index("ix_joboffer_tag_tag_id", "joboffer_tag", ["tag_id", "joboffer_id"])
+    op.create_index("ix_company_name", "company", ["name"])
+
+
+def downgrade():
+    op.drop_index("ix_company_name", table_name="company")
+    op.drop_index("ix_joboffer_tag_tag_id", table_name="joboffer_tag")
+    op.drop_index("ix_joboffer_company_id", table_name="joboffer")
+    op.drop_index("ix_joboffer_collected_id", table_name="joboffer")
+    op.drop_index("ix_joboffer_posted_id", table_name="joboffer")
@@ -0,0 +1,107 @@
+"""Job level and contract type dimensions
+
+Tables of canonical job levels and contract types and junction tables
+linking them with offers. Existing offers are linked with values parsed
+from their raw descriptions (which are kept).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-04-17 18:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from job_tracker.backfill import backfill_dimensions
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+job_levels = [
+    "trainee",
+    "assistant",
+    "junior",
+    "regular",
+    "senior",
+    "expert",
+    "team manager",
+    "manager",
+    "director",
+    "president",
+    "physical worker",
+]
+contract_types = ["full time", "part time", "temporary"]
+
+
+def upgrade():
+    joblevel = op.create_table(
+        "joblevel",
+        sa.Column("joblevel_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint("joblevel_id"),
+        sa.UniqueConstraint("name"),
+    )
+    contracttype = op.create_table(
+        "contracttype",
+        sa.Column("contracttype_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint("contracttype_id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.bulk_insert(
+        joblevel,
+        [{"joblevel_id": i, "name": name} for i, name in enumerate(job_levels, 1)],
+    )
+    op.bulk_insert(
+        contracttype,
+        [
+            {"contracttype_id": i, "name": name}
+            for i, name in enumerate(contract_types, 1)
+        ],
+    )
+    op.create_table(
+        "joboffer_joblevel",
+        sa.Column("joboffer_id", sa.Integer(), nullable=False),
+        sa.Column("joblevel_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["joboffer_id"], ["joboffer.joboffer_id"]),
+        sa.ForeignKeyConstraint(["joblevel_id"], ["joblevel.joblevel_id"]),
+        sa.PrimaryKeyConstraint(
+            "joboffer_id", "joblevel_id", name="joboffer_joblevel_pk"
+        ),
+    )
+    op.create_index(
+        "ix_joboffer_joblevel_joblevel_id",
+        "joboffer_joblevel",
+        ["joblevel_id", "joboffer_id"],
+    )
+    op.create_table(
+        "joboffer_contracttype",
+        sa.Column("joboffer_id", sa.Integer(), nullable=False),
+        sa.Column("contracttype_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["joboffer_id"], ["joboffer.joboffer_id"]),
+        sa.ForeignKeyConstraint(["contracttype_id"], ["contracttype.contracttype_id"]),
+        sa.PrimaryKeyConstraint(
+            "joboffer_id", "contracttype_id", name="joboffer_contracttype_pk"
+        ),
+    )
+    op.create_index(
+        "ix_joboffer_contracttype_contracttype_id",
+        "joboffer_contracttype",
+        ["contracttype_id", "joboffer_id"],
+    )
+    backfill_dimensions(op.get_bind())
+
+
+def downgrade():
+    op.drop_index(
+        "ix_joboffer_contracttype_contracttype_id",
+        table_name="joboffer_contracttype",
+    )
+    op.drop_table("joboffer_contracttype")
+    op.drop_index("ix_joboffer_joblevel_joblevel_id", table_name="joboffer_joblevel")
+    op.drop_table("joboffer_joblevel")
+    op.drop_table("contracttype")
+    op.drop_table("joblevel")
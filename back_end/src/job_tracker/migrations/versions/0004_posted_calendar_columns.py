@@ -0,0 +1,48 @@
+"""Calendar columns of the posted timestamp
+
+Indexed posted_date, posted_month (first day of the month) and posted_year
+columns used for binning statistics, filled in for existing offers.
+The temporary table used previously for binning is no longer needed.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-04-24 18:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from job_tracker.backfill import backfill_calendar
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("joboffer") as batch_op:
+        batch_op.add_column(sa.Column("posted_date", sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column("posted_month", sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column("posted_year", sa.Integer(), nullable=True))
+    backfill_calendar(op.get_bind())
+    op.create_index("ix_joboffer_posted_date", "joboffer", ["posted_date"])
+    op.create_index("ix_joboffer_posted_month", "joboffer", ["posted_month"])
+    op.create_index("ix_joboffer_posted_year", "joboffer", ["posted_year"])
+    op.drop_table("tmp_continuous_dates_range")
+
+
+def downgrade():
+    op.create_table(
+        "tmp_continuous_dates_range",
+        sa.Column("timestamp", sa.DateTime(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint("timestamp"),
+    )
+    op.drop_index("ix_joboffer_posted_year", table_name="joboffer")
+    op.drop_index("ix_joboffer_posted_month", table_name="joboffer")
+    op.drop_index("ix_joboffer_posted_date", table_name="joboffer")
+    with op.batch_alter_table("joboffer") as batch_op:
+        batch_op.drop_column("posted_year")
+        batch_op.drop_column("posted_month")
+        batch_op.drop_column("posted_date")
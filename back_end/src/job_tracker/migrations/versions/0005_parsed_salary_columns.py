@@ -0,0 +1,51 @@
+"""Parsed salary columns
+
+Numeric salary range, currency, gross/net and period (month or hour)
+parsed from the raw salary description, filled in for existing offers.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-05-01 18:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from job_tracker.backfill import backfill_salaries
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("joboffer") as batch_op:
+        batch_op.add_column(sa.Column("salary_min", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("salary_max", sa.Float(), nullable=True))
+        batch_op.add_column(
+            sa.Column("salary_currency", sa.String(length=3), nullable=True)
+        )
+        batch_op.add_column(sa.Column("salary_gross", sa.Boolean(), nullable=True))
+        batch_op.add_column(
+            sa.Column("salary_period", sa.String(length=5), nullable=True)
+        )
+    backfill_salaries(op.get_bind())
+    op.create_index(
+        "ix_joboffer_salary_period_currency_posted",
+        "joboffer",
+        ["salary_period", "salary_currency", "posted_date"],
+    )
+    op.create_index("ix_joboffer_salary_min", "joboffer", ["salary_min"])
+
+
+def downgrade():
+    op.drop_index("ix_joboffer_salary_min", table_name="joboffer")
+    op.drop_index("ix_joboffer_salary_period_currency_posted", table_name="joboffer")
+    with op.batch_alter_table("joboffer") as batch_op:
+        batch_op.drop_column("salary_period")
+        batch_op.drop_column("salary_gross")
+        batch_op.drop_column("salary_currency")
+        batch_op.drop_column("salary_max")
+        batch_op.drop_column("salary_min")
@@ -0,0 +1,35 @@
+"""Full-text search of offers
+
+Search document (folded title and company name) of every offer,
+filled in for existing offers and indexed with the full-text index
+of the database (see job_tracker.fulltext).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-05-08 18:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from job_tracker.backfill import backfill_search
+from job_tracker.fulltext import create_search_index, drop_search_index
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("joboffer") as batch_op:
+        batch_op.add_column(sa.Column("search_text", sa.Text(), nullable=True))
+    backfill_search(op.get_bind())
+    create_search_index(op.get_bind())
+
+
+def downgrade():
+    drop_search_index(op.get_bind())
+    with op.batch_alter_table("joboffer") as batch_op:
+        batch_op.drop_column("search_text")
@@ -0,0 +1,89 @@
+"""Archive of old offers
+
+Tables of archived offers and of their tags, job levels and contract types
+(same columns as the regular ones, without foreign keys),
+see job_tracker.archive.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-05-15 18:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "joboffer_archive",
+        sa.Column("joboffer_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("company_id", sa.Integer(), nullable=True),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("posted", sa.DateTime(), nullable=False),
+        sa.Column("collected", sa.DateTime(), nullable=False),
+        sa.Column("posted_date", sa.Date(), nullable=True),
+        sa.Column("posted_month", sa.Date(), nullable=True),
+        sa.Column("posted_year", sa.Integer(), nullable=True),
+        sa.Column("contracttype", sa.String(length=255), nullable=True),
+        sa.Column("jobmode", sa.String(length=255), nullable=True),
+        sa.Column("joblevel", sa.String(length=255), nullable=True),
+        sa.Column("salary", sa.String(length=255), nullable=True),
+        sa.Column("salary_min", sa.Float(), nullable=True),
+        sa.Column("salary_max", sa.Float(), nullable=True),
+        sa.Column("salary_currency", sa.String(length=3), nullable=True),
+        sa.Column("salary_gross", sa.Boolean(), nullable=True),
+        sa.Column("salary_period", sa.String(length=5), nullable=True),
+        sa.Column("detailsurl", sa.String(length=255), nullable=True),
+        sa.Column("search_text", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("joboffer_id"),
+    )
+    op.create_index(
+        "ix_joboffer_archive_posted_date", "joboffer_archive", ["posted_date"]
+    )
+    op.create_index(
+        "ix_joboffer_archive_posted_month", "joboffer_archive", ["posted_month"]
+    )
+    op.create_index(
+        "ix_joboffer_archive_posted_year", "joboffer_archive", ["posted_year"]
+    )
+    op.create_index(
+        "ix_joboffer_archive_salary_period_currency_posted",
+        "joboffer_archive",
+        ["salary_period", "salary_currency", "posted_date"],
+    )
+    for dimension in ("tag", "joblevel", "contracttype"):
+        table_name = f"joboffer_{dimension}_archive"
+        op.create_table(
+            table_name,
+            sa.Column("joboffer_id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column(
+                f"{dimension}_id", sa.Integer(), autoincrement=False, nullable=False
+            ),
+            sa.PrimaryKeyConstraint("joboffer_id", f"{dimension}_id"),
+        )
+        op.create_index(
+            f"ix_{table_name}_{dimension}_id",
+            table_name,
+            [f"{dimension}_id", "joboffer_id"],
+        )
+
+
+def downgrade():
+    for dimension in ("tag", "joblevel", "contracttype"):
+        table_name = f"joboffer_{dimension}_archive"
+        op.drop_index(f"ix_{table_name}_{dimension}_id", table_name=table_name)
+        op.drop_table(table_name)
+    op.drop_index(
+        "ix_joboffer_archive_salary_period_currency_posted",
+        table_name="joboffer_archive",
+    )
+    op.drop_index("ix_joboffer_archive_posted_year", table_name="joboffer_archive")
+    op.drop_index("ix_joboffer_archive_posted_month", table_name="joboffer_archive")
+    op.drop_index("ix_joboffer_archive_posted_date", table_name="joboffer_archive")
+    op.drop_table("joboffer_archive")
@@ -0,0 +1,40 @@
+"""Monthly counts of pairs of tags
+
+Number of offers posted in a month having both tags of a pair
+(see models.tag_pair_month), counted for existing offers.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-05-22 18:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from job_tracker.backfill import backfill_tag_pairs
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tag_pair_month",
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.Column("other_tag_id", sa.Integer(), nullable=False),
+        sa.Column("offers", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["tag_id"], ["tag.tag_id"]),
+        sa.ForeignKeyConstraint(["other_tag_id"], ["tag.tag_id"]),
+        sa.PrimaryKeyConstraint(
+            "month", "tag_id", "other_tag_id", name="tag_pair_month_pk"
+        ),
+    )
+    backfill_tag_pairs(op.get_bind())
+
+
+def downgrade():
+    op.drop_table("tag_pair_month")
@@ -0,0 +1,49 @@
+"""Numbers of offers of companies
+
+Numbers of offers of every company (see models.company_stats)
+with indexes of the orderings of the companies endpoint,
+counted for existing offers.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-05-29 18:00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from job_tracker.backfill import backfill_company_stats
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+ORDERINGS = ("offers", "active_offers", "recent_offers", "last_seen")
+
+
+def upgrade():
+    op.create_table(
+        "company_stats",
+        sa.Column("company_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("offers", sa.Integer(), nullable=False),
+        sa.Column("active_offers", sa.Integer(), nullable=False),
+        sa.Column("recent_offers", sa.Integer(), nullable=False),
+        sa.Column("recent_since", sa.Date(), nullable=False),
+        sa.Column("first_seen", sa.DateTime(), nullable=True),
+        sa.Column("last_seen", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["company_id"], ["company.company_id"]),
+        sa.PrimaryKeyConstraint("company_id"),
+    )
+    for column in ORDERINGS:
+        op.create_index(
+            f"ix_company_stats_{column}", "company_stats", [column, "company_id"]
+        )
+    backfill_company_stats(op.get_bind())
+
+
+def downgrade():
+    for column in ORDERINGS:
+        op.drop_index(f"ix_company_stats_{column}", table_name="company_stats")
+    op.drop_table("company_stats")
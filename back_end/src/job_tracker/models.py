@@ -1,7 +1,23 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
 from marshmallow_sqlalchemy import fields
+from sqlalchemy import and_, delete, event, insert, inspect, select, update
+from sqlalchemy.orm import Session, validates
 
 from job_tracker.database import db
 from job_tracker.extensions import ma
+from job_tracker.fulltext import create_search_index, drop_search_index, search_document
+from job_tracker.parsers import (
+    CONTRACT_TYPES,
+    JOB_LEVELS,
+    contract_type_id,
+    job_level_id,
+    parse_contract_types,
+    parse_job_levels,
+    parse_salary,
+)
 
 
 # orm model for the tag table
@@ -22,6 +38,46 @@ class Tag(db.Model):
         super().__init__(**kwargs)
 
 
+# Dimension tables of canonical job levels and contract types.
+# Their rows are fixed (see parsers module) and are inserted
+# when the tables are created.
+class JobLevel(db.Model):
+    __tablename__ = "joblevel"
+    joblevel_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(255), nullable=False, unique=True)
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+
+class ContractType(db.Model):
+    __tablename__ = "contracttype"
+    contracttype_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(255), nullable=False, unique=True)
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+
+@event.listens_for(JobLevel.__table__, "after_create")
+def insert_job_levels(target, connection, **kw):
+    connection.execute(
+        insert(target),
+        [{"joblevel_id": job_level_id(name), "name": name} for name in JOB_LEVELS],
+    )
+
+
+@event.listens_for(ContractType.__table__, "after_create")
+def insert_contract_types(target, connection, **kw):
+    connection.execute(
+        insert(target),
+        [
+            {"contracttype_id": contract_type_id(name), "name": name}
+            for name in CONTRACT_TYPES
+        ],
+    )
+
+
 class Company(db.Model):
     # CREATE TABLE IF NOT EXISTS `company` (
     #   `company_id` INT(11) NOT NULL AUTO_INCREMENT,
@@ -34,7 +90,7 @@ class Company(db.Model):
     # )
     __tablename__ = "company"
     company_id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(255), nullable=False)
+    name = db.Column(db.String(255), nullable=False, index=True)
     address = db.Column(db.String(255), nullable=True)
     town = db.Column(db.String(255), nullable=True)
     postalcode = db.Column(db.String(255), nullable=True)
@@ -77,6 +133,35 @@ joboffer_tag = db.Table(
     db.Column("joboffer_id", db.Integer, db.ForeignKey("joboffer.joboffer_id")),
     db.Column("tag_id", db.Integer, db.ForeignKey("tag.tag_id")),
     db.PrimaryKeyConstraint("joboffer_id", "tag_id", name="joboffer_tag_pk"),
+    # Reverse lookup (offers having a given tag),
+    # the primary key covers lookups by joboffer_id.
+    db.Index("ix_joboffer_tag_tag_id", "tag_id", "joboffer_id"),
+)
+
+
+# Junction tables between offers and their canonical job levels
+# and contract types (an offer can list more than one of each).
+# Indexes on (dimension id, joboffer_id) make finding offers
+# with a given value an index lookup.
+joboffer_joblevel = db.Table(
+    "joboffer_joblevel",
+    db.Column("joboffer_id", db.Integer, db.ForeignKey("joboffer.joboffer_id")),
+    db.Column("joblevel_id", db.Integer, db.ForeignKey("joblevel.joblevel_id")),
+    db.PrimaryKeyConstraint("joboffer_id", "joblevel_id", name="joboffer_joblevel_pk"),
+    db.Index("ix_joboffer_joblevel_joblevel_id", "joblevel_id", "joboffer_id"),
+)
+joboffer_contracttype = db.Table(
+    "joboffer_contracttype",
+    db.Column("joboffer_id", db.Integer, db.ForeignKey("joboffer.joboffer_id")),
+    db.Column(
+        "contracttype_id", db.Integer, db.ForeignKey("contracttype.contracttype_id")
+    ),
+    db.PrimaryKeyConstraint(
+        "joboffer_id", "contracttype_id", name="joboffer_contracttype_pk"
+    ),
+    db.Index(
+        "ix_joboffer_contracttype_contracttype_id", "contracttype_id", "joboffer_id"
+    ),
 )
 
 
@@ -98,26 +183,460 @@ class JobOffer(db.Model):
     #                            REFERENCES `company` (`company_id`)
     # )
     __tablename__ = "joboffer"
+    # Composite indexes matching the orderings used by the offers endpoint
+    # (make cursor based pagination an index range scan).
+    __table_args__ = (
+        db.Index("ix_joboffer_posted_id", "posted", "joboffer_id"),
+        db.Index("ix_joboffer_collected_id", "collected", "joboffer_id"),
+        db.Index("ix_joboffer_company_id", "company_id"),
+        # Statistics are binned by these (range scan + grouping in index order)
+        db.Index("ix_joboffer_posted_date", "posted_date"),
+        db.Index("ix_joboffer_posted_month", "posted_month"),
+        db.Index("ix_joboffer_posted_year", "posted_year"),
+        # Salaries of a given kind posted in a date range (salary statistics)
+        db.Index(
+            "ix_joboffer_salary_period_currency_posted",
+            "salary_period",
+            "salary_currency",
+            "posted_date",
+        ),
+        db.Index("ix_joboffer_salary_min", "salary_min"),
+    )
     joboffer_id = db.Column(db.Integer, primary_key=True)
-    company_id = db.Column(db.Integer, db.ForeignKey("company.company_id"))
+    # The previous company is kept when it changes (see count_company_offers)
+    company_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("company.company_id")),
+        active_history=True,
+    )
     title = db.Column(db.String(255), nullable=False)
     posted = db.Column(db.DateTime, nullable=False)
     collected = db.Column(db.DateTime, nullable=False)
+    # Calendar bins of the posted timestamp, set whenever posted is set:
+    # the date, the first day of the month and the year.
+    # Previous values are kept when they change (see count_company_offers
+    # and count_tag_pairs).
+    posted_date = db.column_property(
+        db.Column(db.Date, nullable=True), active_history=True
+    )
+    posted_month = db.column_property(
+        db.Column(db.Date, nullable=True), active_history=True
+    )
+    posted_year = db.Column(db.Integer, nullable=True)
+    # Raw contract type and job level descriptions, as collected,
+    # canonical values parsed from them are in contract_types and job_levels.
     contracttype = db.Column(db.String(255), nullable=True)
     jobmode = db.Column(db.String(255), nullable=True)
     joblevel = db.Column(db.String(255), nullable=True)
     salary = db.Column(db.String(255), nullable=True)
+    # Salary range parsed from the (raw) salary description, set whenever
+    # salary is set. All are null if the salary was not given.
+    salary_min = db.Column(db.Float, nullable=True)
+    salary_max = db.Column(db.Float, nullable=True)
+    salary_currency = db.Column(db.String(3), nullable=True)  # ISO 4217 code
+    salary_gross = db.Column(db.Boolean, nullable=True)  # False - net
+    salary_period = db.Column(db.String(5), nullable=True)  # "month" or "hour"
     detailsurl = db.Column(db.String(255), nullable=True)  # these tend to be very long
+    # Folded title and company name indexed for full-text search
+    # (see fulltext module), set whenever title or company is set.
+    search_text = db.Column(db.Text, nullable=True)
     tags = db.relationship(
         "Tag",  # Use this class
         secondary=joboffer_tag,  # indirect relationship - intermediary: joboffer_tag
         # backref="joboffer",  # this bref. shows in which offers the tag is used
         order_by="asc(Tag.name)",
     )
+    job_levels = db.relationship(
+        "JobLevel", secondary=joboffer_joblevel, order_by="JobLevel.joblevel_id"
+    )
+    contract_types = db.relationship(
+        "ContractType",
+        secondary=joboffer_contracttype,
+        order_by="ContractType.contracttype_id",
+    )
 
     def __init__(self, **kwargs) -> None:
         super().__init__(**kwargs)
 
+    @validates("posted")
+    def validate_posted(self, key, posted: datetime) -> datetime:
+        self.posted_date, self.posted_month, self.posted_year = posted_calendar(posted)
+        return posted
+
+    @validates("salary")
+    def validate_salary(self, key, salary: str | None) -> str | None:
+        (
+            self.salary_min,
+            self.salary_max,
+            self.salary_currency,
+            self.salary_gross,
+            self.salary_period,
+        ) = salary_columns(salary)
+        return salary
+
+
+def archive_columns(table) -> list:
+    """Returns copies of the columns of the table for its archive
+
+    Foreign keys are not copied (archived rows are only read).
+    """
+    return [
+        db.Column(
+            column.name,
+            column.type,
+            primary_key=column.primary_key,
+            nullable=column.nullable,
+            autoincrement=False,
+        )
+        for column in table.columns
+    ]
+
+
+# Archive (cold tier) of offers posted long ago and of their junction rows,
+# see archive module. Offers are moved here from the regular (hot) tables
+# on schedule, archived offers are only counted by statistics
+# (hence only the indexes used by statistics).
+joboffer_archive = db.Table(
+    "joboffer_archive",
+    *archive_columns(JobOffer.__table__),
+    db.Index("ix_joboffer_archive_posted_date", "posted_date"),
+    db.Index("ix_joboffer_archive_posted_month", "posted_month"),
+    db.Index("ix_joboffer_archive_posted_year", "posted_year"),
+    db.Index(
+        "ix_joboffer_archive_salary_period_currency_posted",
+        "salary_period",
+        "salary_currency",
+        "posted_date",
+    ),
+)
+joboffer_tag_archive = db.Table(
+    "joboffer_tag_archive",
+    *archive_columns(joboffer_tag),
+    db.Index("ix_joboffer_tag_archive_tag_id", "tag_id", "joboffer_id"),
+)
+joboffer_joblevel_archive = db.Table(
+    "joboffer_joblevel_archive",
+    *archive_columns(joboffer_joblevel),
+    db.Index("ix_joboffer_joblevel_archive_joblevel_id", "joblevel_id", "joboffer_id"),
+)
+joboffer_contracttype_archive = db.Table(
+    "joboffer_contracttype_archive",
+    *archive_columns(joboffer_contracttype),
+    db.Index(
+        "ix_joboffer_contracttype_archive_contracttype_id",
+        "contracttype_id",
+        "joboffer_id",
+    ),
+)
+
+
+# Number of offers posted in a month having both tags of a pair
+# (tag_id <= other_tag_id, the pair of a tag with itself counts offers
+# having the tag), regular and archived offers alike.
+# Co-occurrence of tags in a range of months is summed from these rows
+# instead of joining tags of offers with themselves. Rows are updated when
+# offers are stored or deleted through the ORM (see count_tag_pairs),
+# offers stored in any other way are counted by job_tracker.backfill.
+tag_pair_month = db.Table(
+    "tag_pair_month",
+    db.Column("month", db.Date, nullable=False),
+    db.Column("tag_id", db.Integer, db.ForeignKey("tag.tag_id"), nullable=False),
+    db.Column("other_tag_id", db.Integer, db.ForeignKey("tag.tag_id"), nullable=False),
+    db.Column("offers", db.Integer, nullable=False),
+    db.PrimaryKeyConstraint(
+        "month", "tag_id", "other_tag_id", name="tag_pair_month_pk"
+    ),
+)
+
+
+# Offers posted this many days ago or later are recent (see company_stats)
+RECENT_OFFER_DAYS = 30
+
+# Numbers of offers of every company, so that companies can be listed
+# (and sorted by activity) without counting their offers:
+# offers - all (regular and archived), active_offers - regular ones
+# (not yet archived), recent_offers - posted on recent_since or later,
+# first_seen and last_seen - earliest and latest collected timestamps.
+# Rows are updated when offers are stored or deleted through the ORM
+# (see count_company_offers) and archived, and counted from scratch
+# daily (recent offers change with the date) by job_tracker.backfill.
+company_stats = db.Table(
+    "company_stats",
+    db.Column(
+        "company_id",
+        db.Integer,
+        db.ForeignKey("company.company_id"),
+        primary_key=True,
+        autoincrement=False,
+    ),
+    db.Column("offers", db.Integer, nullable=False),
+    db.Column("active_offers", db.Integer, nullable=False),
+    db.Column("recent_offers", db.Integer, nullable=False),
+    db.Column("recent_since", db.Date, nullable=False),
+    db.Column("first_seen", db.DateTime, nullable=True),
+    db.Column("last_seen", db.DateTime, nullable=True),
+    # Orderings of the companies endpoint (see api.companies)
+    db.Index("ix_company_stats_offers", "offers", "company_id"),
+    db.Index("ix_company_stats_active_offers", "active_offers", "company_id"),
+    db.Index("ix_company_stats_recent_offers", "recent_offers", "company_id"),
+    db.Index("ix_company_stats_last_seen", "last_seen", "company_id"),
+)
+
+
+class OfferTables(NamedTuple):
+    """Table of offers and its junction tables (of one tier)"""
+
+    offers: db.Table
+    tags: db.Table
+    job_levels: db.Table
+    contract_types: db.Table
+
+
+HOT_OFFERS = OfferTables(
+    JobOffer.__table__, joboffer_tag, joboffer_joblevel, joboffer_contracttype
+)
+ARCHIVED_OFFERS = OfferTables(
+    joboffer_archive,
+    joboffer_tag_archive,
+    joboffer_joblevel_archive,
+    joboffer_contracttype_archive,
+)
+
+
+@event.listens_for(JobOffer.__table__, "after_create")
+def create_offers_search_index(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(JobOffer.__table__, "before_drop")
+def drop_offers_search_index(target, connection, **kw):
+    drop_search_index(connection)
+
+
+def salary_columns(salary: str | None) -> tuple:
+    """Returns values of the parsed salary columns of the description
+
+    (salary_min, salary_max, salary_currency, salary_gross, salary_period)
+    """
+    parsed = parse_salary(salary)
+    if parsed is None:
+        return None, None, None, None, None
+    return tuple(parsed)
+
+
+def posted_calendar(posted: datetime) -> tuple[date, date, int]:
+    """Returns (posted_date, posted_month, posted_year) of the timestamp"""
+    return posted.date(), date(posted.year, posted.month, 1), posted.year
+
+
+@event.listens_for(Session, "before_flush")
+def parse_offers_descriptions(session, flush_context, instances):
+    """Links new and modified offers with canonical values of their
+    job level and contract type descriptions and sets their search documents
+
+    This way they are set no matter how offers are stored
+    (the scraping task, tests, etc.).
+    Offers inserted bypassing the ORM have to be processed
+    by job_tracker.backfill.
+    """
+    with session.no_autoflush:
+        for obj in (*session.new, *session.dirty):
+            if not isinstance(obj, JobOffer):
+                continue
+            attrs = inspect(obj).attrs
+            if (
+                attrs.title.history.has_changes()
+                or attrs.company_id.history.has_changes()
+                or attrs.company.history.has_changes()
+            ):
+                company = obj.company
+                if company is None and obj.company_id is not None:
+                    company = session.get(Company, obj.company_id)
+                obj.search_text = search_document(
+                    obj.title, company.name if company else None
+                )
+            if attrs.joblevel.history.has_changes():
+                obj.job_levels = [
+                    level
+                    for name in parse_job_levels(obj.joblevel)
+                    if (level := session.get(JobLevel, job_level_id(name)))
+                ]
+            if attrs.contracttype.history.has_changes():
+                obj.contract_types = [
+                    contract_type
+                    for name in parse_contract_types(obj.contracttype)
+                    if (
+                        contract_type := session.get(
+                            ContractType, contract_type_id(name)
+                        )
+                    )
+                ]
+
+
+def tag_pairs(tag_ids) -> list[tuple[int, int]]:
+    """Returns pairs (tag_id <= other_tag_id) of tags of an offer,
+    including pairs of every tag with itself
+    """
+    ids = sorted(set(tag_ids))
+    return [(tag_id, other) for i, tag_id in enumerate(ids) for other in ids[i:]]
+
+
+def add_tag_pairs(connection, counts: Counter) -> None:
+    """Adds counts of offers ({(month, tag_id, other_tag_id): offers},
+    negative for removed offers) to tag_pair_month
+    """
+    for (month, tag_id, other_tag_id), offers in counts.items():
+        if not offers:
+            continue
+        pair = and_(
+            tag_pair_month.c.month == month,
+            tag_pair_month.c.tag_id == tag_id,
+            tag_pair_month.c.other_tag_id == other_tag_id,
+        )
+        result = connection.execute(
+            update(tag_pair_month)
+            .where(pair)
+            .values(offers=tag_pair_month.c.offers + offers)
+        )
+        if result.rowcount == 0 and offers > 0:
+            connection.execute(
+                insert(tag_pair_month).values(
+                    month=month, tag_id=tag_id, other_tag_id=other_tag_id, offers=offers
+                )
+            )
+    if any(offers < 0 for offers in counts.values()):
+        connection.execute(delete(tag_pair_month).where(tag_pair_month.c.offers <= 0))
+
+
+@event.listens_for(Session, "before_flush")
+def load_tags_of_deleted_offers(session, flush_context, instances):
+    """Loads tags of offers being deleted or moved to another month
+    (count_tag_pairs could not read their tags after the flush)
+    """
+    with session.no_autoflush:
+        for obj in session.deleted:
+            if isinstance(obj, JobOffer):
+                obj.tags  # noqa: B018
+        for obj in session.dirty:
+            if (
+                isinstance(obj, JobOffer)
+                and inspect(obj).attrs.posted_month.history.deleted
+            ):
+                obj.tags  # noqa: B018
+
+
+@event.listens_for(Session, "after_flush")
+def count_tag_pairs(session, flush_context):
+    """Updates counts of pairs of tags (tag_pair_month) of offers
+    stored, deleted or with tags or the posted month changed by the flush
+
+    Tags have their ids here (new tags are inserted by the flush),
+    session.new, dirty, deleted and the history of attributes
+    still show the state before the flush.
+    """
+    counts = Counter()
+
+    def count(month, tags, offers: int):
+        for pair in tag_pairs(tag.tag_id for tag in tags):
+            counts[(month, *pair)] += offers
+
+    for obj in session.new:
+        if isinstance(obj, JobOffer):
+            # Tags of new offers are not loaded if none were added
+            count(obj.posted_month, inspect(obj).dict.get("tags", ()), 1)
+    for obj in session.deleted:
+        if isinstance(obj, JobOffer):
+            count(obj.posted_month, obj.tags, -1)
+    for obj in session.dirty:
+        if isinstance(obj, JobOffer):
+            attrs = inspect(obj).attrs
+            history = attrs.tags.history
+            months = attrs.posted_month.history
+            old_month = months.deleted[0] if months.deleted else obj.posted_month
+            if history.added or history.deleted or old_month != obj.posted_month:
+                count(old_month, [*history.unchanged, *history.deleted], -1)
+                count(obj.posted_month, [*history.unchanged, *history.added], 1)
+    if counts:
+        add_tag_pairs(session.connection(), counts)
+
+
+def add_company_offers(connection, company_id: int, offers: list[tuple]) -> None:
+    """Adds (or removes) offers to (from) counts of offers of the company
+
+    Parameters
+    ----------
+    offers : (posted_date, collected, 1 - stored or -1 - deleted)
+             of every offer
+    """
+    stats = connection.execute(
+        select(company_stats).where(company_stats.c.company_id == company_id)
+    ).one_or_none()
+    recent_since = (
+        stats.recent_since
+        if stats is not None
+        else date.today() - timedelta(days=RECENT_OFFER_DAYS)
+    )
+    total = sum(change for _, _, change in offers)
+    recent = sum(
+        change for posted_date, _, change in offers if posted_date >= recent_since
+    )
+    # Timestamps of deleted offers were seen as well
+    seen = [collected for _, collected, _ in offers]
+    if stats is None:
+        connection.execute(
+            insert(company_stats).values(
+                company_id=company_id,
+                offers=total,
+                active_offers=total,
+                recent_offers=recent,
+                recent_since=recent_since,
+                first_seen=min(seen),
+                last_seen=max(seen),
+            )
+        )
+        return
+    connection.execute(
+        update(company_stats)
+        .where(company_stats.c.company_id == company_id)
+        .values(
+            offers=company_stats.c.offers + total,
+            active_offers=company_stats.c.active_offers + total,
+            recent_offers=company_stats.c.recent_offers + recent,
+            first_seen=min(filter(None, [stats.first_seen, *seen])),
+            last_seen=max(filter(None, [stats.last_seen, *seen])),
+        )
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def count_company_offers(session, flush_context):
+    """Updates numbers of offers of companies (company_stats)
+    of offers stored, deleted or moved to another company
+    or posted date by the flush
+    """
+    offers = defaultdict(list)
+    for objects, change in ((session.new, 1), (session.deleted, -1)):
+        for obj in objects:
+            if isinstance(obj, JobOffer) and obj.company_id is not None:
+                offers[obj.company_id].append((obj.posted_date, obj.collected, change))
+    for obj in session.dirty:
+        if not isinstance(obj, JobOffer):
+            continue
+        attrs = inspect(obj).attrs
+        companies = attrs.company_id.history
+        dates = attrs.posted_date.history
+        if not (companies.deleted or dates.deleted):
+            continue
+        old_company = companies.deleted[0] if companies.deleted else obj.company_id
+        old_date = dates.deleted[0] if dates.deleted else obj.posted_date
+        for company_id, posted_date, change in (
+            (old_company, old_date, -1),
+            (obj.company_id, obj.posted_date, 1),
+        ):
+            if company_id is not None:
+                offers[company_id].append((posted_date, obj.collected, change))
+    for company_id, company_offers in offers.items():
+        add_company_offers(session.connection(), company_id, company_offers)
+
 
 # Declare Models before instantiating Schemas.
 # (sqlalchemy.orm.configure_mappers() will run too soon and fail otherwise)
@@ -141,6 +660,18 @@ class JobOfferSchema(ma.SQLAlchemyAutoSchema):
         # 'company_id' will be returned anyway because of include_fk=True
         # so there is no need to follow the relationship and 'company' filed
         include_relationships = False
+        # Columns derived from 'posted' and 'salary' are used internally
+        exclude = (
+            "posted_date",
+            "posted_month",
+            "posted_year",
+            "salary_min",
+            "salary_max",
+            "salary_currency",
+            "salary_gross",
+            "salary_period",
+            "search_text",
+        )
 
     # 1. Marshmallow will not follow relationships down the hierarchy
     # (even if include_relationships was set to True)
@@ -166,10 +697,13 @@ class CompanySchema(ma.SQLAlchemyAutoSchema):
 class DataPoint(ma.Schema):
     """Used to serialize statistics (datetime, count)
     Warning: Casts datatime to date !
+    Moving average and running total are only dumped if calculated.
     """
 
     date = fields.fields.Date()
     count = fields.fields.Integer()
+    average = fields.fields.Float()
+    cumulative = fields.fields.Integer()
 
 
 datapoint_schema = DataPoint()
@@ -0,0 +1,196 @@
+"""Parsers of free text offer descriptions into canonical values
+
+Offers collected from pracuj.pl describe job level and contract type
+with Polish phrases, often listing several of them in one string,
+eg. "Specjalista (Mid / Regular), Starszy specjalista (Senior)".
+The raw text is stored as it was collected (for display) and the
+canonical values parsed from it are stored in dimension tables
+(see JobLevel and ContractType models) to make filtering by them
+an indexed equality lookup.
+Salary descriptions are parsed into numeric ranges in the same manner.
+"""
+
+import re
+from typing import NamedTuple
+
+# Canonical job levels and contract types.
+# WARNING: Position in the tuple (+1) is the primary key of the value
+#          in its dimension table - only append new values at the end.
+JOB_LEVELS = (
+    "trainee",
+    "assistant",
+    "junior",
+    "regular",
+    "senior",
+    "expert",
+    "team manager",
+    "manager",
+    "director",
+    "president",
+    "physical worker",
+)
+CONTRACT_TYPES = (
+    "full time",
+    "part time",
+    "temporary",
+)
+
+# Phrases (lowercase) used by the website, besides the canonical names
+# themselves, mapped to canonical values.
+job_level_synonyms = {
+    "praktykant / stażysta": "trainee",
+    "praktykant": "trainee",
+    "stażysta": "trainee",
+    "intern": "trainee",
+    "asystent": "assistant",
+    "młodszy specjalista (junior)": "junior",
+    "młodszy specjalista": "junior",
+    "specjalista (mid / regular)": "regular",
+    "specjalista": "regular",
+    "mid": "regular",
+    "mid / regular": "regular",
+    "starszy specjalista (senior)": "senior",
+    "starszy specjalista": "senior",
+    "ekspert": "expert",
+    "kierownik / koordynator": "team manager",
+    "kierownik": "team manager",
+    "koordynator": "team manager",
+    "menedżer": "manager",
+    "dyrektor": "director",
+    "prezes": "president",
+    "pracownik fizyczny": "physical worker",
+}
+contract_type_synonyms = {
+    "pełny etat": "full time",
+    "full_time": "full time",
+    "część etatu": "part time",
+    "part_time": "part time",
+    "dodatkowa / tymczasowa": "temporary",
+}
+
+
+def _parse_listed(raw: str | None, canonical: tuple, synonyms: dict) -> list[str]:
+    values = []
+    for phrase in (raw or "").split(","):
+        phrase = " ".join(phrase.lower().split())
+        value = phrase if phrase in canonical else synonyms.get(phrase)
+        if value is not None and value not in values:
+            values.append(value)
+    return values
+
+
+def parse_job_levels(raw: str | None) -> list[str]:
+    """Returns canonical job levels listed in the raw description
+
+    Phrases that are not recognized are skipped, eg.::
+
+        >>> parse_job_levels("Specjalista (Mid / Regular), Ekspert")
+        ['regular', 'expert']
+    """
+    return _parse_listed(raw, JOB_LEVELS, job_level_synonyms)
+
+
+def parse_contract_types(raw: str | None) -> list[str]:
+    """Returns canonical contract types listed in the raw description
+
+    Phrases that are not recognized are skipped, eg.::
+
+        >>> parse_contract_types("Pełny etat, Część etatu")
+        ['full time', 'part time']
+    """
+    return _parse_listed(raw, CONTRACT_TYPES, contract_type_synonyms)
+
+
+def job_level_id(name: str) -> int:
+    """Primary key of the canonical job level in the joblevel table"""
+    return JOB_LEVELS.index(name) + 1
+
+
+def contract_type_id(name: str) -> int:
+    """Primary key of the canonical contract type in the contracttype table"""
+    return CONTRACT_TYPES.index(name) + 1
+
+
+class Salary(NamedTuple):
+    """Salary range parsed from its description
+
+    gross is None if it depends on the type of the contract
+    (or is not given at all).
+    """
+
+    minimum: float
+    maximum: float
+    currency: str | None
+    gross: bool | None
+    period: str | None
+
+
+SALARY_PERIODS = ("month", "hour")
+
+# Currency symbols and names (lowercase) mapped to ISO 4217 codes
+currency_synonyms = {
+    "zł": "PLN",
+    "pln": "PLN",
+    "€": "EUR",
+    "eur": "EUR",
+    "$": "USD",
+    "usd": "USD",
+    "£": "GBP",
+    "gbp": "GBP",
+    "chf": "CHF",
+}
+# Amount or range of amounts at the beginning of the description,
+# eg. "10 000–14 000", "120", "12 500,50"
+# (spaces, including non-breaking ones, separate thousands).
+_salary_amounts = re.compile(
+    r"^\s*(?P<min>\d[\d \u00a0\u202f]*(?:[.,]\d+)?)"
+    r"(?:\s*[–—-]\s*(?P<max>\d[\d \u00a0\u202f]*(?:[.,]\d+)?))?"
+)
+_salary_currency = re.compile(r"zł|€|\$|£|\b(?:pln|eur|usd|gbp|chf)\b")
+_salary_gross = re.compile(r"\b(?:brutto|gross)\b")
+_salary_net = re.compile(r"\b(?:netto|net)\b")
+_salary_month = re.compile(r"/\s*(?:mies|mo|month)|\b(?:monthly|miesięcznie)\b")
+_salary_hour = re.compile(r"/\s*(?:godz|h|hr|hour)\b|\b(?:hourly|godzinowo)\b")
+
+
+def _amount(text: str) -> float:
+    # split() removes all kinds of spaces (incl. non-breaking ones)
+    return float("".join(text.split()).replace(",", "."))
+
+
+def parse_salary(raw: str | None) -> Salary | None:
+    """Parses salary description into numeric range and its attributes
+
+    Returns None if the description does not start with an amount
+    (eg. salary was not given), eg.::
+
+        >>> parse_salary("10 000–14 000 zł netto (+ VAT) / mies.")
+        Salary(minimum=10000.0, maximum=14000.0, currency='PLN', gross=False, period='month')
+        >>> parse_salary("120 zł / godz. (zal. od umowy)")
+        Salary(minimum=120.0, maximum=120.0, currency='PLN', gross=None, period='hour')
+    """  # noqa: E501
+    text = (raw or "").lower()
+    amounts = _salary_amounts.match(text)
+    if amounts is None:
+        return None
+    minimum = _amount(amounts["min"])
+    maximum = _amount(amounts["max"]) if amounts["max"] else minimum
+    rest = text[amounts.end() :]
+    currency = _salary_currency.search(rest)
+    gross = None
+    if _salary_gross.search(rest):
+        gross = True
+    elif _salary_net.search(rest):
+        gross = False
+    period = None
+    if _salary_month.search(rest):
+        period = "month"
+    elif _salary_hour.search(rest):
+        period = "hour"
+    return Salary(
+        minimum=min(minimum, maximum),
+        maximum=max(minimum, maximum),
+        currency=currency_synonyms[currency[0]] if currency else None,
+        gross=gross,
+        period=period,
+    )
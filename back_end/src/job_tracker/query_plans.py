@@ -0,0 +1,175 @@
+"""Execution plans of the main queries
+
+Used to check that the indexes (see migrations) are actually used
+by the database for the hot query paths, ie. that none of the main queries
+reads a whole table (full table scan).
+
+Supported databases:
+- SQLite: EXPLAIN QUERY PLAN, "SCAN <table>" without an index,
+- MySQL/MariaDB: EXPLAIN, access type "ALL",
+- PostgreSQL: EXPLAIN, "Seq Scan on <table>"
+  (WARNING: PostgreSQL prefers sequential scans of small tables
+  even if an index is available, run the check on a realistic data set).
+"""
+
+import re
+from datetime import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from werkzeug.datastructures import MultiDict
+
+from job_tracker.api.companies import companies_query
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.offers import listing_columns, offers_filters, search_query
+from job_tracker.api.pagination import after_cursor, encode_cursor
+from job_tracker.api.statistics import (
+    binned_counts_query,
+    grouped_counts_query,
+    top_tags_query,
+)
+from job_tracker.models import ARCHIVED_OFFERS, JobOffer, Tag, joboffer_tag
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN statement of the given select (in dialect specific form)"""
+
+    inherit_cache = False
+
+    def __init__(self, statement) -> None:
+        self.statement = statement
+
+
+@compiles(Explain)
+def _explain_default(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+@compiles(Explain, "sqlite")
+def _explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+
+def main_queries(dialect_name: str) -> dict:
+    """Returns representative versions of the queries the API runs most often
+
+    Parameters
+    ----------
+    dialect_name : name of the database dialect (full-text search queries
+                   are database specific)
+
+    Returns
+    -------
+    {query name: select statement}
+    """
+    sample_date = datetime(2024, 1, 1)
+    offers_page = select(*listing_columns).limit(31)
+    return {
+        "offers first page": offers_page.order_by(
+            JobOffer.posted, JobOffer.joboffer_id
+        ),
+        "offers after cursor": offers_page.where(
+            after_cursor(
+                JobOffer.collected,
+                JobOffer.joboffer_id,
+                encode_cursor("-collected", sample_date, 1000),
+                "-collected",
+                descending=True,
+            )
+        ).order_by(JobOffer.collected.desc(), JobOffer.joboffer_id.desc()),
+        "offers with a tag": offers_page.where(
+            *offers_filters(MultiDict({"tags": "Python"}))
+        ).order_by(JobOffer.posted, JobOffer.joboffer_id),
+        "offers of a company": offers_page.where(
+            *offers_filters(MultiDict({"company": "Company 1"}))
+        ).order_by(JobOffer.posted, JobOffer.joboffer_id),
+        "offers posted in a date range": offers_page.where(
+            *offers_filters(
+                MultiDict({"posted_from": "2024-01-01", "posted_to": "2024-01-31"})
+            )
+        ).order_by(JobOffer.posted, JobOffer.joboffer_id),
+        "offers of a job level": offers_page.where(
+            *offers_filters(MultiDict({"job_level": "junior"}))
+        ).order_by(JobOffer.posted, JobOffer.joboffer_id),
+        **{
+            f"statistics {binning.value} bins": binned_counts_query(
+                sample_date, datetime(2024, 12, 31), binning
+            )
+            for binning in Interval
+        },
+        "statistics of archived offers": binned_counts_query(
+            sample_date,
+            datetime(2024, 12, 31),
+            Interval.MONTH,
+            tags=["Python"],
+            tables=ARCHIVED_OFFERS,
+        ),
+        "statistics grouped by tag": grouped_counts_query(
+            sample_date, datetime(2024, 12, 31), Interval.MONTH, "tag"
+        ),
+        "top tags (co-occurrence)": top_tags_query(
+            sample_date, datetime(2024, 12, 31), 10
+        ),
+        "most active companies": companies_query("-recent_offers").limit(31),
+        "companies after cursor": companies_query(
+            "-last_seen", encode_cursor("-last_seen", sample_date, 10)
+        ).limit(31),
+        "offers search": search_query(dialect_name, ["offer", "company"], []).limit(31),
+        "tags of offers": select(joboffer_tag.c.joboffer_id, Tag.name)
+        .join(Tag, Tag.tag_id == joboffer_tag.c.tag_id)
+        .where(joboffer_tag.c.joboffer_id.in_([1, 2, 3])),
+    }
+
+
+# "SCAN joboffer" (or "SCAN TABLE joboffer" in older SQLite versions)
+# but not "SCAN joboffer USING INDEX ..." which reads rows in index order
+_sqlite_full_scan = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_postgresql_full_scan = re.compile(r"Seq Scan on (\w+)")
+
+
+def full_scans(connection, statement) -> list[str]:
+    """Returns names of tables fully scanned when executing the statement"""
+    rows = connection.execute(Explain(statement)).mappings().all()
+    tables = []
+    match connection.dialect.name:
+        case "sqlite":
+            for row in rows:
+                if match := _sqlite_full_scan.match(row["detail"]):
+                    tables.append(match.group(1))
+        case "mysql" | "mariadb":
+            tables = [row["table"] for row in rows if row["type"] == "ALL"]
+        case "postgresql":
+            for row in rows:
+                plan_line = next(iter(row.values()))
+                tables += _postgresql_full_scan.findall(plan_line)
+        case dialect:
+            raise NotImplementedError(f"query plans of {dialect} are not supported")
+    return tables
+
+
+def find_full_scans(connection) -> dict[str, list[str]]:
+    """Checks execution plans of all main queries
+
+    Returns
+    -------
+    {query name: names of fully scanned tables} for queries with full scans
+    """
+    found = {}
+    for name, statement in main_queries(connection.dialect.name).items():
+        tables = full_scans(connection, statement)
+        if tables:
+            found[name] = tables
+    return found
+
+
+def report_full_scans(url: str) -> dict[str, list[str]]:
+    """Prints main queries performing full table scans on the database at url"""
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        found = find_full_scans(connection)
+    for name, tables in found.items():
+        print(f"{name}: full scan of {', '.join(tables)}")
+    if not found:
+        print("No full table scans in the main queries")
+    return found
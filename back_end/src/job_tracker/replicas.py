@@ -0,0 +1,165 @@
+"""Routing of reads of the read-only API endpoints to database replicas
+
+Replicas are configured with SQLALCHEMY_READ_REPLICAS (list of database URIs,
+like SQLALCHEMY_BINDS they share SQLALCHEMY_ENGINE_OPTIONS of the primary).
+Handlers decorated with read_only run their SELECT statements on one
+of the replicas, everything else (the scraping task, writes) uses
+the primary database.
+
+- Replicas are used in turns (round robin), a request reads only from
+  the replica chosen when it started (consistent view of the data).
+- Replica that can not be connected to is skipped for REPLICA_RETRY_SECONDS,
+  replicas are checked (SELECT 1) before use at most every
+  REPLICA_CHECK_SECONDS. If all replicas are down the primary is used.
+- Read-your-writes: clients may request reading from the primary with
+  the X-Read-From-Primary header (eg. right after new offers were stored),
+  code can do the same with the primary_reads context manager.
+
+Replicas are expected to be asynchronous copies of the primary,
+so data read from them may be slightly out of date.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.sql import Select
+
+PRIMARY_HEADER = "X-Read-From-Primary"
+
+
+class ReplicaRouter:
+    """Chooses replicas in turns, skipping the ones that are down"""
+
+    def __init__(self, engines, check_seconds: float, retry_seconds: float) -> None:
+        self.engines = list(engines)
+        self.check_seconds = check_seconds
+        self.retry_seconds = retry_seconds
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+        # Monotonic time until which the replica is not used
+        self._down_until: dict = {}
+        # Monotonic time of the last successful check of the replica
+        self._checked_at: dict = {}
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        # Connection could not be established or was lost
+        if context.connection is None or context.is_disconnect:
+            self.mark_down(context.engine)
+
+    def mark_down(self, engine) -> None:
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_seconds
+            self._checked_at.pop(engine, None)
+
+    def is_healthy(self, engine) -> bool:
+        """Checks the replica if it was not checked recently"""
+        now = time.monotonic()
+        with self._lock:
+            if self._down_until.get(engine, 0) > now:
+                return False
+            if now - self._checked_at.get(engine, -self.check_seconds) < (
+                self.check_seconds
+            ):
+                return True
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except exc.DBAPIError:
+            current_app.logger.warning(
+                "Database replica %s is not available", engine.url.render_as_string()
+            )
+            self.mark_down(engine)
+            return False
+        with self._lock:
+            self._checked_at[engine] = time.monotonic()
+        return True
+
+    def choose(self):
+        """Returns the next healthy replica engine or None if all are down"""
+        for _ in range(len(self.engines)):
+            with self._lock:
+                engine = self.engines[next(self._turns) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+
+def init_replicas(app) -> list:
+    """Creates engines of the replicas configured for the app (if any)
+
+    Engines are created with the same options as the primary one
+    (SQLALCHEMY_ENGINE_OPTIONS).
+
+    Returns
+    -------
+    list of the replica engines
+    """
+    options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    engines = [
+        create_engine(uri, **options)
+        for uri in app.config.get("SQLALCHEMY_READ_REPLICAS", [])
+    ]
+    if engines:
+        app.extensions["replica_router"] = ReplicaRouter(
+            engines,
+            check_seconds=app.config.get("REPLICA_CHECK_SECONDS", 10),
+            retry_seconds=app.config.get("REPLICA_RETRY_SECONDS", 30),
+        )
+    return engines
+
+
+class RoutingSession(Session):
+    """Session sending SELECT statements to the replica chosen for the request"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and isinstance(clause, Select)
+            and not self._flushing
+            and has_app_context()
+        ):
+            engine = g.get("read_engine")
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def primary_requested() -> bool:
+    return has_request_context() and request.headers.get(
+        PRIMARY_HEADER, ""
+    ).lower() in ("1", "true")
+
+
+def read_only(handler):
+    """Makes the handler read from a replica (if there are any)
+
+    The handler must not write to the database.
+    """
+
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        router = current_app.extensions.get("replica_router")
+        if router is not None and not primary_requested():
+            g.read_engine = router.choose()
+        return handler(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    """Reads inside the context are made from the primary database"""
+    engine = g.pop("read_engine", None)
+    try:
+        yield
+    finally:
+        if engine is not None:
+            g.read_engine = engine
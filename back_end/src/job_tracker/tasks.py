@@ -1,12 +1,15 @@
 import os
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 import urllib3.exceptions as UE
 from flask import current_app
 from selenium import webdriver
 from sqlalchemy import exc
 
+from job_tracker.api.warm_up import start_warm_up
+from job_tracker.archive import archive_offers, is_archived
+from job_tracker.backfill import backfill_company_stats
 from job_tracker.database import db
 from job_tracker.extensions import scheduler
 from job_tracker.models import Company, JobOffer, Tag
@@ -119,92 +122,173 @@ def fetch_offers():
                 return
             current_app.logger.info("Job offers scraping completed")
 
-        current_app.logger.info("Adding collected job offers to the database")
-        try:
-            for offer in all_offers:
-                if not JobOffer.query.get(offer.id):  # new, not yet stored offer
-                    if not Company.query.get(
-                        offer.company_id
-                    ):  # not yet stored company
-                        new_company = Company(
-                            company_id=offer.company_id,
-                            name=offer.company_name,
-                            address="",
-                            town="",
-                            postalcode="",
-                            website=offer.company_link,
-                        )
-                        try:
-                            db.session.add(new_company)
-                        except (exc.DataError, exc.IntegrityError) as e:
-                            db.session.rollback()
-                            current_app.logger.error(
-                                (
-                                    "failed to add company while processing "
-                                    "offer_id %s. Offer skipped.: %s"
-                                ),
-                                offer.id,
-                                str(e),
-                            )
-                            continue
-                    else:
-                        current_app.logger.info(
-                            "Company (id = %s) already in db", offer.company_id
-                        )
+        if store_offers(all_offers, is_tag_list_available):
+            # The first dashboard users after the scraping do not wait
+            # for the statistics of the new offers (see api.warm_up)
+            start_warm_up()
+
+
+def store_offers(all_offers, is_tag_list_available: bool) -> int:
+    """Stores offers (and their companies and tags) that are not yet stored
 
-                    new_offer = JobOffer(
-                        joboffer_id=offer.id,
+    Offers are committed one by one. This function must be executed
+    in active application context.
+
+    Parameters
+    ----------
+    all_offers : collected offers (Advertisement objects of the results page)
+    is_tag_list_available : whether technology tags were collected
+
+    Returns
+    -------
+    number of offers stored
+    """
+    current_app.logger.info("Adding collected job offers to the database")
+    stored = 0
+    try:
+        for offer in all_offers:
+            # new, not yet stored (nor archived) offer
+            if not JobOffer.query.get(offer.id) and not is_archived(
+                db.session, offer.id
+            ):
+                if not Company.query.get(offer.company_id):  # not yet stored company
+                    new_company = Company(
                         company_id=offer.company_id,
-                        title=offer.title,
-                        posted=offer.publication_date,
-                        collected=offer.webscrap_timestamp,
-                        contracttype=offer.contract_type,
-                        jobmode="",  # TODO: Not collected at the moment
-                        joblevel=offer.job_level,
-                        salary=offer.salary,
-                        detailsurl=offer.link,
+                        name=offer.company_name,
+                        address="",
+                        town="",
+                        postalcode="",
+                        website=offer.company_link,
                     )
-                    if is_tag_list_available:
-                        for tag in offer.technology_tags:
-                            existing_tag = Tag.query.filter(
-                                Tag.name == tag
-                            ).one_or_none()
-                            if existing_tag:
-                                new_offer.tags.append(existing_tag)
-                            else:
-                                new_tag = Tag(name=tag)
-                                try:
-                                    db.session.add(new_tag)
-                                except (exc.DataError, exc.IntegrityError) as e:
-                                    db.session.rollback()
-                                    current_app.logger.error(
-                                        (
-                                            "failed to add new tag while processing "
-                                            "offer_id %s. Offer skipped.: %s"
-                                        ),
-                                        offer.id,
-                                        str(e),
-                                    )
-                                    continue
-                                new_offer.tags.append(new_tag)
                     try:
-                        db.session.add(new_offer)
-                        db.session.commit()
+                        db.session.add(new_company)
                     except (exc.DataError, exc.IntegrityError) as e:
                         db.session.rollback()
                         current_app.logger.error(
-                            "failed to add new offer (offer_id %s). Offer skipped.: %s",
+                            (
+                                "failed to add company while processing "
+                                "offer_id %s. Offer skipped.: %s"
+                            ),
                             offer.id,
                             str(e),
                         )
                         continue
                 else:
-                    current_app.logger.info("Offer (id = %s) already in db", offer.id)
-            current_app.logger.info("Finished adding offers to the database")
+                    current_app.logger.info(
+                        "Company (id = %s) already in db", offer.company_id
+                    )
+
+                new_offer = JobOffer(
+                    joboffer_id=offer.id,
+                    company_id=offer.company_id,
+                    title=offer.title,
+                    posted=offer.publication_date,
+                    collected=offer.webscrap_timestamp,
+                    contracttype=offer.contract_type,
+                    jobmode="",  # TODO: Not collected at the moment
+                    joblevel=offer.job_level,
+                    salary=offer.salary,
+                    detailsurl=offer.link,
+                )
+                if is_tag_list_available:
+                    for tag in offer.technology_tags:
+                        existing_tag = Tag.query.filter(Tag.name == tag).one_or_none()
+                        if existing_tag:
+                            new_offer.tags.append(existing_tag)
+                        else:
+                            new_tag = Tag(name=tag)
+                            try:
+                                db.session.add(new_tag)
+                            except (exc.DataError, exc.IntegrityError) as e:
+                                db.session.rollback()
+                                current_app.logger.error(
+                                    (
+                                        "failed to add new tag while processing "
+                                        "offer_id %s. Offer skipped.: %s"
+                                    ),
+                                    offer.id,
+                                    str(e),
+                                )
+                                continue
+                            new_offer.tags.append(new_tag)
+                try:
+                    db.session.add(new_offer)
+                    db.session.commit()
+                except (exc.DataError, exc.IntegrityError) as e:
+                    db.session.rollback()
+                    current_app.logger.error(
+                        "failed to add new offer (offer_id %s). Offer skipped.: %s",
+                        offer.id,
+                        str(e),
+                    )
+                    continue
+                stored += 1
+            else:
+                current_app.logger.info("Offer (id = %s) already in db", offer.id)
+        current_app.logger.info("Finished adding offers to the database")
+        # In-memory statistics engine and tag index (if used)
+        # count the new offers too
+        for extension in ("stats_snapshot", "tag_index"):
+            if extension in current_app.extensions:
+                current_app.extensions[extension].refresh(db.session)
+    except exc.OperationalError:
+        current_app.logger.exception(
+            (
+                "Failed to connect to the database while trying to store "
+                "new offers - none were stored."
+            )
+        )
+    return stored
+
+
+@scheduler.task(
+    trigger="cron",
+    id="archive_offers_task",
+    hour="3",
+    minute="0",
+    max_instances=1,
+    misfire_grace_time=3600,  # seconds
+)
+def archive_old_offers():
+    """Moves offers older than ARCHIVE_AFTER_DAYS to the archive"""
+    with scheduler.app.app_context():
+        archive_after_days = current_app.config.get("ARCHIVE_AFTER_DAYS", 0)
+        if not archive_after_days:
+            return
+        posted_before = date.today() - timedelta(days=archive_after_days)
+        try:
+            archived = archive_offers(db.engine, posted_before)
         except exc.OperationalError:
             current_app.logger.exception(
-                (
-                    "Failed to connect to the database while trying to store "
-                    "new offers - none were stored."
-                )
+                "Failed to connect to the database while trying to archive offers"
+            )
+        else:
+            current_app.logger.info(
+                "%s offers posted before %s archived", archived, posted_before
+            )
+
+
+@scheduler.task(
+    trigger="cron",
+    id="count_company_offers_task",
+    hour="3",
+    minute="30",
+    max_instances=1,
+    misfire_grace_time=3600,  # seconds
+)
+def count_company_offers():
+    """Counts offers of companies from scratch
+
+    Numbers of offers are kept up to date when offers are stored
+    and archived, but offers become older than recent every day.
+    """
+    with scheduler.app.app_context():
+        try:
+            with db.engine.begin() as connection:
+                companies = backfill_company_stats(connection)
+        except exc.OperationalError:
+            current_app.logger.exception(
+                "Failed to connect to the database while trying to count offers"
             )
+        else:
+            current_app.logger.info("Offers of %s companies counted", companies)
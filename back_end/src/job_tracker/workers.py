@@ -0,0 +1,89 @@
+"""Threads serving requests under the ASGI server (uvicorn)
+
+Connexion's FlaskApp runs the (WSGI) Flask app in a pool of threads
+of the a2wsgi middleware, every request occupies one of them until its
+response is sent. The pool has 10 threads by default, so one worker
+process could not serve more than 10 requests at a time, even if
+all of them were waiting for the database (queries release the GIL).
+
+WSGIWorkers, the innermost middleware of the app (see middlewares),
+serves requests of the Flask app in its own pool of WSGI_WORKERS threads
+instead. By default there are as many of them as connections the pool
+of the database engine can open (DB_POOL_SIZE + DB_MAX_OVERFLOW),
+more threads would only wait for connections
+(UNLIMITED_POOL_WSGI_WORKERS if the pool does not limit them).
+
+Handlers stay synchronous, every request waiting for the database still
+occupies a thread. Serving them without threads would take async handlers
+(connexion's AsyncApp) and an async engine (aiosqlite, asyncpg, asyncmy).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from a2wsgi import WSGIMiddleware
+from connexion.middleware import ConnexionMiddleware
+from sqlalchemy.pool import QueuePool
+
+from job_tracker.config import UNLIMITED_POOL_WSGI_WORKERS
+from job_tracker.database import db
+
+if TYPE_CHECKING:
+    from connexion.apps.flask import FlaskASGIApp
+    from flask import Flask
+    from starlette.types import Receive, Scope, Send
+
+# Connections opened by a QueuePool above its size by default
+DEFAULT_MAX_OVERFLOW = 10
+
+
+def database_connections(app: Flask) -> int | None:
+    """Returns the number of connections the pool of the database engine
+    can open at a time, None if it is not limited
+    """
+    with app.app_context():
+        pool = db.engine.pool
+    if not isinstance(pool, QueuePool):
+        return None
+    options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    max_overflow = options.get("max_overflow", DEFAULT_MAX_OVERFLOW)
+    if max_overflow < 0:
+        return None
+    return pool.size() + max_overflow
+
+
+def wsgi_workers(app: Flask) -> int:
+    """Returns the number of threads serving requests of the app"""
+    return (
+        app.config.get("WSGI_WORKERS")
+        or database_connections(app)
+        or app.config.get("UNLIMITED_POOL_WSGI_WORKERS", UNLIMITED_POOL_WSGI_WORKERS)
+    )
+
+
+class WSGIWorkers:
+    """Serves HTTP requests of the Flask app of connexion (app)
+    in a pool of wsgi_workers threads
+
+    Created with the middleware stack, when the app serves
+    its first request. Other requests (lifespan) are passed to the app.
+    """
+
+    def __init__(self, app: FlaskASGIApp) -> None:
+        self.app = app
+        self.workers = wsgi_workers(app.app)
+        self.wsgi_app = WSGIMiddleware(app.app.wsgi_app, workers=self.workers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            await self.wsgi_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+def middlewares() -> list:
+    """Returns middlewares of the connexion app: connexion's default ones
+    and WSGIWorkers (a new list, middlewares added to the app are inserted)
+    """
+    return [*ConnexionMiddleware.default_middlewares, WSGIWorkers]
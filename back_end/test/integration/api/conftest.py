@@ -6,6 +6,7 @@ from datetime import datetime
 import pytest
 
 from job_tracker import create_app
+from job_tracker.api.statistics import calculate_stats
 from job_tracker.config import BaseConfig
 from job_tracker.database import db
 from job_tracker.models import Company, JobOffer, Tag
@@ -155,6 +156,9 @@ def connexion_app_instance():
     class TestConfig(BaseConfig):
         TESTING = True
         SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_fpath}"
+        # Test data is loaded after the app is created
+        # (payloads of the empty database would be cached)
+        WARM_UP = False
 
     conxn_app = create_app(custom_config=TestConfig)
 
@@ -176,6 +180,10 @@ def connexion_app_instance():
     # After the test close and remove the db file.
     os.close(db_fd)
     os.remove(db_fpath)
+    # write-ahead log of the database (see SQLITE_PRAGMAS)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_fpath + suffix):
+            os.remove(db_fpath + suffix)
     # This only exists because app factory starts the scheduler
     # probably it should be started externally based environment variables
     scheduler.shutdown(wait=False)
@@ -201,3 +209,48 @@ def httpx_test_client(connexion_app_instance):
     # r.content (use instead of r.data for binary data)
     # r.json()
     return connexion_app_instance.test_client()
+
+
+@pytest.fixture
+def start_app():
+    """Returns a function creating an app using the database of the given url.
+
+    Settings of the test configuration can be overridden
+    with keyword arguments. Test data is not loaded.
+    """
+
+    def start(url, **config):
+        class TestConfig(BaseConfig):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = url
+            WARM_UP = False
+
+        for name, value in config.items():
+            setattr(TestConfig, name, value)
+        conxn_app = create_app(custom_config=TestConfig)
+        for job in scheduler.get_jobs():
+            job.remove()
+        scheduler.shutdown(wait=False)
+        return conxn_app
+
+    return start
+
+
+@pytest.fixture
+def all_stats():
+    """Returns a function calculating statistics of the app with every
+    one of the functions for every date range and criteria.
+
+    Used to compare results of different statistics engines and indexes.
+    """
+
+    def calculate(app, ranges, criteria, functions=(calculate_stats,)) -> list:
+        with app.app_context():
+            return [
+                function(start_date, end_date, binning, **kwargs)
+                for function in functions
+                for start_date, end_date, binning in ranges
+                for kwargs in criteria
+            ]
+
+    return calculate
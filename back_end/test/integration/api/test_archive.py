@@ -0,0 +1,125 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+
+from job_tracker.archive import archive_offers, offer_tiers
+from job_tracker.database import db
+from job_tracker.models import ARCHIVED_OFFERS, HOT_OFFERS, JobOffer
+from job_tracker.tasks import store_offers
+
+# Test offer 1 (posted 2012-06-18, tags: Java, Selenium)
+# and offers posted in September 2023 are archived
+POSTED_BEFORE = date(2023, 10, 1)
+
+STATISTICS_PARAMS = [
+    {"start_date": "2012-01-01", "end_date": "2024-12-31", "binning": "year"},
+    {"start_date": "2023-01-01", "end_date": "2023-12-31", "binning": "month"},
+    {"start_date": "2023-09-20", "end_date": "2023-10-10", "binning": "day"},
+    {
+        "start_date": "2012-01-01",
+        "end_date": "2024-12-31",
+        "binning": "year",
+        "tags": ["Selenium"],
+    },
+    {
+        "start_date": "2012-01-01",
+        "end_date": "2024-12-31",
+        "binning": "month",
+        "job_level": "junior",
+        "contract_type": "full time",
+    },
+]
+
+
+def count_rows(tables) -> list[int]:
+    return [
+        # pylint: disable-next=not-callable
+        db.session.execute(select(func.count()).select_from(table)).scalar_one()
+        for table in tables
+    ]
+
+
+def archive(app) -> int:
+    with app.app_context():
+        return archive_offers(db.engine, POSTED_BEFORE)
+
+
+class TestHappyPaths:
+    def test_should_move_old_offers_to_the_archive(self, connexion_app_instance):
+        with connexion_app_instance.app.app_context():
+            before = count_rows(HOT_OFFERS)
+        archived = archive(connexion_app_instance.app)
+        with connexion_app_instance.app.app_context():
+            hot = count_rows(HOT_OFFERS)
+            cold = count_rows(ARCHIVED_OFFERS)
+            newest_archived = db.session.execute(
+                select(func.max(ARCHIVED_OFFERS.offers.c.posted_date))
+            ).scalar_one()
+            oldest_hot = db.session.execute(
+                select(func.min(JobOffer.posted_date))
+            ).scalar_one()
+        assert 1 < archived < 1003
+        assert cold[0] == archived
+        # tags (of Test offer 1), job levels and contract types are moved too
+        assert cold[1] == 2
+        assert [h + c for h, c in zip(hot, cold)] == before
+        assert newest_archived < POSTED_BEFORE <= oldest_hot
+        # nothing is left to archive
+        assert archive(connexion_app_instance.app) == 0
+
+    @pytest.mark.parametrize("params", STATISTICS_PARAMS)
+    def test_should_include_archived_offers_in_statistics(
+        self, connexion_app_instance, httpx_test_client, params
+    ):
+        before = httpx_test_client.get("/api/statistics", params=params).json()
+        archive(connexion_app_instance.app)
+        after = httpx_test_client.get("/api/statistics", params=params).json()
+        assert after == before
+
+    def test_should_include_archived_offers_in_salary_statistics(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        params = {
+            "start_date": "2012-01-01",
+            "end_date": "2024-12-31",
+            "binning": "year",
+            "currency": "USD",
+        }
+        before = httpx_test_client.get("/api/statistics/salary", params=params).json()
+        archive(connexion_app_instance.app)
+        after = httpx_test_client.get("/api/statistics/salary", params=params).json()
+        assert after == before
+
+    def test_should_read_archive_only_when_range_needs_it(self, connexion_app_instance):
+        archive(connexion_app_instance.app)
+        with connexion_app_instance.app.app_context():
+            assert offer_tiers(db.session, date(2023, 9, 15)) == [
+                HOT_OFFERS,
+                ARCHIVED_OFFERS,
+            ]
+            assert offer_tiers(db.session, POSTED_BEFORE) == [HOT_OFFERS]
+
+    def test_should_not_list_archived_offers(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        archive(connexion_app_instance.app)
+        response = httpx_test_client.get(
+            "/api/offers/search", params={"q": "Test offer", "perpagelimit": 30}
+        )
+        assert response.status_code == 200
+        titles = {offer["title"] for offer in response.json()["offers"]}
+        assert titles == {"Test offer 2", "Test offer 3"}
+
+    def test_should_not_store_archived_offers_again(self, connexion_app_instance):
+        archive(connexion_app_instance.app)
+        with connexion_app_instance.app.app_context():
+            archived_offer = db.session.execute(
+                select(ARCHIVED_OFFERS.offers).limit(1)
+            ).one()
+            scraped_again = SimpleNamespace(
+                id=archived_offer.joboffer_id, company_id=archived_offer.company_id
+            )
+            store_offers([scraped_again], is_tag_list_available=False)
+            assert db.session.get(JobOffer, archived_offer.joboffer_id) is None
@@ -0,0 +1,172 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import func, select
+from test_stats_snapshot import scraped_offer
+
+from job_tracker.api.pagination import encode_cursor
+from job_tracker.archive import archive_offers
+from job_tracker.backfill import backfill_company_stats
+from job_tracker.database import db
+from job_tracker.models import Company, JobOffer, company_stats
+from job_tracker.tasks import store_offers
+
+
+def get_companies(client, **params) -> dict:
+    response = client.get("/api/companies", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def counts() -> set:
+    return set(
+        db.session.execute(
+            select(
+                company_stats.c.company_id,
+                company_stats.c.offers,
+                company_stats.c.active_offers,
+                company_stats.c.first_seen,
+                company_stats.c.last_seen,
+            )
+        ).all()
+    )
+
+
+def recounted() -> set:
+    """Counts as counted from scratch (and restores them)"""
+    counted = counts()
+    backfill_company_stats(db.session.connection())
+    rebuilt = counts()
+    db.session.rollback()
+    assert counts() == counted
+    return rebuilt
+
+
+class TestHappyPaths:
+    def test_should_get_numbers_of_offers_of_companies(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        with connexion_app_instance.app.app_context():
+            expected = dict(
+                db.session.execute(
+                    # pylint: disable-next=not-callable
+                    select(JobOffer.company_id, func.count()).group_by(
+                        JobOffer.company_id
+                    )
+                ).all()
+            )
+        companies = get_companies(httpx_test_client, sort="-offers")["companies"]
+        assert {
+            company["company_id"]: company["offers"] for company in companies
+        } == expected
+        assert [company["offers"] for company in companies] == sorted(
+            expected.values(), reverse=True
+        )
+        assert all(
+            company["active_offers"] == company["offers"] for company in companies
+        )
+        assert {company["name"] for company in companies} == {"Company 1", "Company 2"}
+
+    @pytest.mark.parametrize(
+        "sort", ["-recent_offers", "-active_offers", "-offers", "-last_seen", "name"]
+    )
+    def test_should_get_every_company_once_page_by_page(self, httpx_test_client, sort):
+        expected = get_companies(httpx_test_client, sort=sort)
+        assert expected["info"]["next_after"] is None
+        companies, params = [], {"sort": sort, "perpagelimit": 1}
+        while True:
+            page = get_companies(httpx_test_client, **params)
+            companies += page["companies"]
+            if page["info"]["next_after"] is None:
+                break
+            params["after"] = page["info"]["next_after"]
+        assert companies == expected["companies"]
+
+    def test_should_count_stored_and_deleted_offers(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        before = get_companies(httpx_test_client, sort="name")["companies"][0]
+        with connexion_app_instance.app.app_context():
+            store_offers(
+                [scraped_offer(5000, ["Java"]), scraped_offer(5001, [])],
+                is_tag_list_available=True,
+            )
+            db.session.delete(db.session.get(JobOffer, 1))
+            db.session.commit()
+            assert counts() == recounted()
+        after = get_companies(httpx_test_client, sort="name")["companies"][0]
+        assert after["offers"] == before["offers"] + 1
+        assert after["last_seen"] == "2030-01-01T00:00:00"
+
+    @pytest.mark.parametrize(
+        "changes",
+        [
+            {"company_id": 2},
+            {"company": 2},
+            {"posted": datetime.now()},
+            {"company_id": 2, "posted": datetime.now()},
+        ],
+    )
+    def test_should_move_offers_to_another_company_or_posted_date(
+        self, connexion_app_instance, changes
+    ):
+        def recent_offers():
+            return dict(
+                db.session.execute(
+                    select(company_stats.c.company_id, company_stats.c.recent_offers)
+                ).all()
+            )
+
+        with connexion_app_instance.app.app_context():
+            offer = db.session.get(JobOffer, 1)
+            # Expired attributes are loaded when they are changed
+            db.session.expire(offer)
+            for name, value in changes.items():
+                if name == "company":
+                    value = db.session.get(Company, value)
+                setattr(offer, name, value)
+            db.session.commit()
+            recent = recent_offers()
+            assert counts() == recounted()
+            backfill_company_stats(db.session.connection())
+            assert recent_offers() == recent
+            db.session.rollback()
+
+    def test_should_count_archived_offers_as_not_active(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        with connexion_app_instance.app.app_context():
+            archived = archive_offers(db.engine, date(2023, 10, 1))
+            assert counts() == recounted()
+        companies = get_companies(httpx_test_client)["companies"]
+        assert (
+            sum(company["offers"] - company["active_offers"] for company in companies)
+            == archived
+        )
+
+    def test_should_count_recent_offers(self, connexion_app_instance):
+        with connexion_app_instance.app.app_context():
+            backfill_company_stats(db.session.connection(), date(2024, 1, 20))
+            recent = db.session.execute(
+                select(func.sum(company_stats.c.recent_offers))
+            ).scalar_one()
+            expected = db.session.execute(
+                # pylint: disable-next=not-callable
+                select(func.count()).where(JobOffer.posted_date >= date(2023, 12, 21))
+            ).scalar_one()
+            db.session.rollback()
+        assert recent == expected > 0
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"perpagelimit": 0},
+        {"sort": "offers"},
+        {"after": "not a token"},
+        {"sort": "name", "after": encode_cursor("-offers", 1, 1)},
+    ],
+)
+def test_should_get_400error_when_invalid_params_passed(httpx_test_client, params):
+    response = httpx_test_client.get("/api/companies", params=params)
+    assert response.status_code == 400
@@ -0,0 +1,69 @@
+import pytest
+
+daily_stats_params = {
+    "start_date": "2020-01-01",
+    "end_date": "2024-12-31",
+    "binning": "day",
+}
+
+
+class TestHappyPaths:
+    def test_should_get_gzip_compressed_response(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics",
+            params=daily_stats_params,
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        # httpx decompresses the content transparently
+        assert len(response.json()) == 1827
+        assert response.num_bytes_downloaded < len(response.content)
+
+    def test_should_prefer_brotli_when_accepted(self, httpx_test_client):
+        pytest.importorskip("brotli")
+        response = httpx_test_client.get(
+            "/api/statistics",
+            params=daily_stats_params,
+            headers={"Accept-Encoding": "gzip, br"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "br"
+        assert len(response.json()) == 1827
+
+    def test_should_respect_quality_values(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics",
+            params=daily_stats_params,
+            headers={"Accept-Encoding": "gzip;q=1.0, br;q=0.5"},
+        )
+        assert response.headers["content-encoding"] == "gzip"
+
+    @pytest.mark.parametrize("accept_encoding", ["identity", "gzip;q=0"])
+    def test_should_not_compress_if_not_accepted(
+        self, httpx_test_client, accept_encoding
+    ):
+        response = httpx_test_client.get(
+            "/api/statistics",
+            params=daily_stats_params,
+            headers={"Accept-Encoding": accept_encoding},
+        )
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert len(response.json()) == 1827
+
+    def test_should_not_compress_small_responses(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/tags", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+    def test_should_get_compact_json(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics",
+            params=daily_stats_params,
+            headers={"Accept-Encoding": "identity"},
+        )
+        assert response.text.startswith('[{"count":0,"date":"2020-01-01"},')
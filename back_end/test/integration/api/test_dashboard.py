@@ -0,0 +1,80 @@
+import pytest
+from test_stats_snapshot import scraped_offer
+
+from job_tracker.api.dashboard import DEFAULT_VIEW
+from job_tracker.tasks import store_offers
+
+
+def get_dashboard(client, headers=None, **params):
+    response = client.get("/api/dashboard", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestHappyPaths:
+    def test_should_get_default_view(self, httpx_test_client):
+        dashboard = get_dashboard(httpx_test_client)
+        assert dashboard["view"] == DEFAULT_VIEW
+        statistics = httpx_test_client.get(
+            "/api/statistics",
+            params={name: value for name, value in DEFAULT_VIEW.items() if value},
+        ).json()
+        assert dashboard["statistics"] == statistics
+        assert (
+            dashboard["tags"]
+            == httpx_test_client.get("/api/tags", params={"counts": "true"}).json()
+        )
+        assert dashboard["choices"]["binning"] == [
+            "day",
+            "week",
+            "month",
+            "quarter",
+            "year",
+        ]
+        assert "full time" in dashboard["choices"]["contract_type"]
+        assert "junior" in dashboard["choices"]["job_level"]
+
+    def test_should_get_requested_view(self, httpx_test_client):
+        params = {
+            "start_date": "2023-01-01",
+            "end_date": "2024-12-31",
+            "binning": "month",
+            "tags": ["Selenium", "Python"],
+            "job_level": "senior",
+        }
+        dashboard = get_dashboard(httpx_test_client, **params)
+        assert dashboard["view"] == {**DEFAULT_VIEW, **params}
+        statistics = httpx_test_client.get(
+            "/api/statistics",
+            params={**params, "contract_type": DEFAULT_VIEW["contract_type"]},
+        ).json()
+        assert dashboard["statistics"] == statistics
+        assert sum(point["count"] for point in statistics) == 1
+
+    def test_should_serve_cached_payload_until_it_expires(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        before = get_dashboard(httpx_test_client)
+        with connexion_app_instance.app.app_context():
+            store_offers([scraped_offer(5000, ["Kotlin"])], is_tag_list_available=True)
+        assert get_dashboard(httpx_test_client) == before
+        fresh = get_dashboard(
+            httpx_test_client, headers={"X-Read-From-Primary": "true"}
+        )
+        assert {"name": "Kotlin", "count": 1} in fresh["tags"]
+        connexion_app_instance.app.config["DASHBOARD_CACHE_SECONDS"] = 0
+        assert get_dashboard(httpx_test_client) == fresh
+
+
+@pytest.mark.parametrize(
+    "params, status",
+    [
+        ({"start_date": "2025-01-01"}, 400),
+        ({"start_date": "2024-02-30"}, 400),
+        ({"binning": "hour"}, 400),
+        ({"start_date": "2000-01-01"}, 400),
+    ],
+)
+def test_should_get_error_when_invalid_params_passed(httpx_test_client, params, status):
+    response = httpx_test_client.get("/api/dashboard", params=params)
+    assert response.status_code == status
@@ -0,0 +1,144 @@
+import os
+import tempfile
+from datetime import date
+
+import pytest
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, func, inspect, select, text
+
+from job_tracker.backfill import backfill_all
+from job_tracker.database import db
+from job_tracker.migrate import alembic_config
+from job_tracker.models import JobOffer, joboffer_contracttype, joboffer_joblevel
+from job_tracker.query_plans import find_full_scans
+
+hot_path_indexes = {
+    ("joboffer", "ix_joboffer_posted_id"),
+    ("joboffer", "ix_joboffer_collected_id"),
+    ("joboffer", "ix_joboffer_company_id"),
+    ("joboffer_tag", "ix_joboffer_tag_tag_id"),
+    ("company", "ix_company_name"),
+}
+
+
+def existing_indexes(engine) -> set[tuple[str, str]]:
+    inspector = inspect(engine)
+    return {
+        (table, index["name"])
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+
+
+def current_revision(engine) -> str:
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT version_num FROM alembic_version")
+        ).scalar_one()
+
+
+head_revision = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+@pytest.fixture
+def db_url():
+    db_fd, db_fpath = tempfile.mkstemp(prefix="tmp_db_", suffix=".db")
+    yield f"sqlite:///{db_fpath}"
+    os.close(db_fd)
+    os.remove(db_fpath)
+    # write-ahead log of the database (see SQLITE_PRAGMAS)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_fpath + suffix):
+            os.remove(db_fpath + suffix)
+
+
+class TestHappyPaths:
+    def test_should_create_schema_at_latest_revision(self, db_url, start_app):
+        start_app(db_url)
+        engine = create_engine(db_url)
+        assert hot_path_indexes <= existing_indexes(engine)
+        assert current_revision(engine) == head_revision
+
+    def test_should_upgrade_database_created_without_migrations(
+        self, db_url, start_app
+    ):
+        # Database as created by db.create_all() before migrations existed
+        engine = create_engine(db_url)
+        with engine.begin() as connection:
+            command.upgrade(alembic_config(connection), "0001")
+            connection.execute(text("DROP TABLE alembic_version"))
+        assert not hot_path_indexes & existing_indexes(engine)
+
+        start_app(db_url)
+        assert hot_path_indexes <= existing_indexes(engine)
+        assert current_revision(engine) == head_revision
+
+    def test_should_downgrade_and_upgrade_indexes(self, db_url, start_app):
+        start_app(db_url)
+        engine = create_engine(db_url)
+        with engine.begin() as connection:
+            command.downgrade(alembic_config(connection), "0001")
+        assert not hot_path_indexes & existing_indexes(engine)
+        with engine.begin() as connection:
+            command.upgrade(alembic_config(connection), "head")
+        assert hot_path_indexes <= existing_indexes(engine)
+
+    def test_should_backfill_offers_stored_without_orm(self, connexion_app_instance):
+        with connexion_app_instance.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(joboffer_joblevel.delete())
+                connection.execute(joboffer_contracttype.delete())
+                connection.execute(
+                    JobOffer.__table__.update().values(
+                        posted_date=None,
+                        posted_month=None,
+                        posted_year=None,
+                        salary_min=None,
+                        salary_max=None,
+                        salary_currency=None,
+                        salary_gross=None,
+                        salary_period=None,
+                    )
+                )
+                backfill_all(connection)
+                offers = connection.execute(
+                    # pylint: disable-next=not-callable
+                    select(func.count()).select_from(JobOffer)
+                ).scalar_one()
+                levels = connection.execute(
+                    # pylint: disable-next=not-callable
+                    select(func.count()).select_from(joboffer_joblevel)
+                ).scalar_one()
+                contract_types = connection.execute(
+                    # pylint: disable-next=not-callable
+                    select(func.count()).select_from(joboffer_contracttype)
+                ).scalar_one()
+                first_offer = connection.execute(
+                    select(
+                        JobOffer.posted_date,
+                        JobOffer.posted_month,
+                        JobOffer.posted_year,
+                        JobOffer.salary_min,
+                        JobOffer.salary_max,
+                        JobOffer.salary_currency,
+                        JobOffer.salary_period,
+                    ).where(JobOffer.title == "Test offer 1")
+                ).one()
+        # Every test offer has exactly one (known) level and contract type
+        assert levels == contract_types == offers == 1003
+        # posted 2012-06-18 10:34:09, salary 5000 USD/mo
+        assert tuple(first_offer) == (
+            date(2012, 6, 18),
+            date(2012, 6, 1),
+            2012,
+            5000,
+            5000,
+            "USD",
+            "month",
+        )
+
+    def test_main_queries_should_not_scan_whole_tables(self, connexion_app_instance):
+        with connexion_app_instance.app.app_context():
+            with db.engine.connect() as connection:
+                assert find_full_scans(connection) == {}
@@ -1,6 +1,14 @@
+import csv
+import io
+import json
 from datetime import datetime
 
 import pytest
+from sqlalchemy import event, select, text
+
+from job_tracker.api.offers import listing_columns, serialize_offers
+from job_tracker.database import db
+from job_tracker.models import Company, JobOffer, joboffers_schema
 
 
 @pytest.mark.parametrize("pplimit", [10, 20, 30])
@@ -115,6 +123,381 @@ def test_should_get_404error_when_pagination_out_of_range(httpx_test_client):
     assert response.status_code == 404
 
 
+class TestCursorPagination:
+    def test_should_walk_all_offers_with_after_token(self, httpx_test_client):
+        response = httpx_test_client.get("/api/offers", params={"perpagelimit": 30})
+        assert response.status_code == 200
+        ans = response.json()
+        seen_ids = [offer["joboffer_id"] for offer in ans["offers"]]
+        next_after = ans["info"]["next_after"]
+        while next_after is not None:
+            response = httpx_test_client.get(
+                "/api/offers", params={"perpagelimit": 30, "after": next_after}
+            )
+            assert response.status_code == 200
+            ans = response.json()
+            assert ans["info"]["tot_offers"] == 1003
+            seen_ids.extend(offer["joboffer_id"] for offer in ans["offers"])
+            next_after = ans["info"]["next_after"]
+        # Every offer is returned exactly once
+        assert len(seen_ids) == len(set(seen_ids)) == 1003
+
+    def test_should_return_the_same_offers_as_subpage(self, httpx_test_client):
+        first = httpx_test_client.get(
+            "/api/offers", params={"perpagelimit": 10, "subpage": 1}
+        ).json()
+        second = httpx_test_client.get(
+            "/api/offers", params={"perpagelimit": 10, "subpage": 2}
+        ).json()
+        by_cursor = httpx_test_client.get(
+            "/api/offers",
+            params={"perpagelimit": 10, "after": first["info"]["next_after"]},
+        ).json()
+        assert by_cursor["offers"] == second["offers"]
+
+    def test_should_get_subpage_info_unless_cursor_pagination_requested(
+        self, httpx_test_client
+    ):
+        by_subpage = httpx_test_client.get(
+            "/api/offers", params={"perpagelimit": 10}
+        ).json()
+        assert by_subpage["info"].keys() == {
+            "tot_subpages",
+            "curr_subpage",
+            "next_after",
+        }
+        assert by_subpage["info"]["curr_subpage"] == 1
+        # The first subpage is read without counting subpages
+        by_cursor = httpx_test_client.get(
+            "/api/offers", params={"perpagelimit": 10, "pagination": "cursor"}
+        ).json()
+        assert by_cursor["info"].keys() == {"tot_offers", "next_after"}
+        assert by_cursor["offers"] == by_subpage["offers"]
+
+    @pytest.mark.parametrize("sort", ["posted", "-posted"])
+    def test_should_walk_offers_stored_without_microseconds(
+        self, connexion_app_instance, httpx_test_client, sort
+    ):
+        # Offers inserted with plain SQL (eg. the demo data)
+        # are stored by SQLite without the fraction of a second.
+        with connexion_app_instance.app.app_context():
+            db.session.execute(
+                text(
+                    "UPDATE joboffer SET posted = '2024-02-01 12:00:00' "
+                    "WHERE joboffer_id BETWEEN 100 AND 124"
+                )
+            )
+            db.session.commit()
+        offers = get_all_offers(httpx_test_client, {"perpagelimit": 10, "sort": sort})
+        ids = [offer["joboffer_id"] for offer in offers]
+        assert len(ids) == len(set(ids)) == 1003
+
+    @pytest.mark.parametrize("invalid_token", ["dog", "WzEsMl0"])
+    def test_should_get_400error_when_after_token_invalid(
+        self, httpx_test_client, invalid_token
+    ):
+        response = httpx_test_client.get(
+            "/api/offers", params={"perpagelimit": 10, "after": invalid_token}
+        )
+        assert response.status_code == 400
+
+    def test_should_get_400error_when_both_subpage_and_after_passed(
+        self, httpx_test_client
+    ):
+        first = httpx_test_client.get("/api/offers", params={"perpagelimit": 10})
+        response = httpx_test_client.get(
+            "/api/offers",
+            params={
+                "perpagelimit": 10,
+                "subpage": 2,
+                "after": first.json()["info"]["next_after"],
+            },
+        )
+        assert response.status_code == 400
+
+    def test_should_get_400error_when_subpage_passed_with_cursor_pagination(
+        self, httpx_test_client
+    ):
+        response = httpx_test_client.get(
+            "/api/offers",
+            params={"perpagelimit": 10, "subpage": 1, "pagination": "cursor"},
+        )
+        assert response.status_code == 400
+
+
+def get_all_offers(client, params):
+    """Follows next_after tokens and returns offers from all subpages"""
+    params = {"perpagelimit": 30} | params
+    ans = client.get("/api/offers", params=params).json()
+    offers = ans["offers"]
+    while ans["info"]["next_after"] is not None:
+        # The cursor has to move forward
+        assert ans["info"]["next_after"] != params.get("after")
+        params["after"] = ans["info"]["next_after"]
+        ans = client.get("/api/offers", params=params).json()
+        offers.extend(ans["offers"])
+    return offers
+
+
+class TestFilteringSortingProjection:
+    @pytest.mark.parametrize(
+        "tags, expected_titles",
+        [
+            (["Selenium"], ["Test offer 1", "Test offer 2"]),
+            (["Selenium", "Python"], ["Test offer 2"]),
+            (["Java", "Python"], []),
+        ],
+    )
+    def test_should_get_offers_having_all_tags(
+        self, httpx_test_client, tags, expected_titles
+    ):
+        offers = get_all_offers(httpx_test_client, {"tags": tags})
+        assert sorted(offer["title"] for offer in offers) == expected_titles
+
+    def test_should_get_offers_of_company(self, httpx_test_client):
+        by_name = get_all_offers(httpx_test_client, {"company": "Company 2"})
+        by_id = get_all_offers(httpx_test_client, {"company_id": [2]})
+        assert by_name and by_name == by_id
+        assert all(offer["company_id"] == 2 for offer in by_name)
+
+    def test_should_get_offers_posted_in_date_range(self, httpx_test_client):
+        offers = get_all_offers(
+            httpx_test_client, {"posted_from": "2024-01-06", "posted_to": "2024-01-09"}
+        )
+        assert sorted(offer["title"] for offer in offers) == [
+            "Test offer 2",
+            "Test offer 3",
+        ]
+
+    def test_should_get_offers_with_job_level_and_contract_type(
+        self, httpx_test_client
+    ):
+        offers = get_all_offers(
+            httpx_test_client,
+            {
+                "posted_from": "2023-09-01",
+                "posted_to": "2023-09-30",
+                "job_level": "junior",
+                "contract_type": "full time",
+            },
+        )
+        # the same criteria as used in statistics tests
+        assert len(offers) == 101
+
+    @pytest.mark.parametrize("sort", ["-posted", "collected", "-collected"])
+    def test_should_get_sorted_offers(self, httpx_test_client, sort):
+        offers = get_all_offers(httpx_test_client, {"sort": sort})
+        assert len(offers) == 1003
+        key = sort.lstrip("-")
+        values = [offer[key] for offer in offers]
+        assert values == sorted(values, reverse=sort.startswith("-"))
+
+    def test_should_get_400error_when_after_token_from_other_sort(
+        self, httpx_test_client
+    ):
+        ans = httpx_test_client.get(
+            "/api/offers", params={"perpagelimit": 10, "sort": "collected"}
+        ).json()
+        response = httpx_test_client.get(
+            "/api/offers",
+            params={"perpagelimit": 10, "after": ans["info"]["next_after"]},
+        )
+        assert response.status_code == 400
+
+    def test_should_get_only_requested_fields(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/offers",
+            params={"perpagelimit": 10, "fields": ["title", "tags"]},
+        )
+        assert response.status_code == 200
+        for offer in response.json()["offers"]:
+            assert set(offer) == {"title", "tags"}
+
+    def test_should_get_400error_when_unknown_field_requested(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/offers", params={"perpagelimit": 10, "fields": ["dog"]}
+        )
+        assert response.status_code == 400
+
+
+class TestExport:
+    def test_should_export_all_offers_as_ndjson(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/offers/export", headers={"Accept-Encoding": "identity"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "content-encoding" not in response.headers
+        offers = [json.loads(line) for line in response.text.splitlines()]
+        assert len(offers) == 1003
+        first = offers[0]  # the earliest posted
+        assert first["title"] == "Test offer 1"
+        assert first["company_name"] == "Company 1"
+        assert first["tags"] == ["Java", "Selenium"]
+        assert first["posted"] == "2012-06-18T10:34:09"
+
+    def test_should_export_offers_as_csv(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/offers/export", params={"format": "csv", "tags": ["Selenium"]}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == ["Test offer 1", "Test offer 2"]
+        assert rows[1]["tags"] == "Python;Selenium"
+
+    def test_should_export_gzip_compressed_offers(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/offers/export",
+            params={"company": "Company 2"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        # httpx decompresses the content transparently
+        offers = [json.loads(line) for line in response.text.splitlines()]
+        assert offers and all(offer["company_id"] == 2 for offer in offers)
+
+    @pytest.mark.parametrize("accept_encoding", ["gzip;q=0", "x-gzip"])
+    def test_should_not_compress_export_unless_gzip_accepted(
+        self, httpx_test_client, accept_encoding
+    ):
+        response = httpx_test_client.get(
+            "/api/offers/export", headers={"Accept-Encoding": accept_encoding}
+        )
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert len(response.text.splitlines()) == 1003
+
+    def test_should_get_400error_when_unknown_format_requested(self, httpx_test_client):
+        response = httpx_test_client.get("/api/offers/export", params={"format": "xml"})
+        assert response.status_code == 400
+
+
+def add_offer(app, title: str, company_name: str) -> int:
+    """Stores the offer the way the scraping task does, returns its id"""
+    with app.app_context():
+        company = Company(name=company_name)
+        db.session.add(company)
+        db.session.commit()
+        offer = JobOffer(
+            title=title,
+            company_id=company.company_id,
+            posted=datetime(2024, 2, 1),
+            collected=datetime(2024, 2, 2),
+        )
+        db.session.add(offer)
+        db.session.commit()
+        return offer.joboffer_id
+
+
+def search(client, q: str, **params) -> list[dict]:
+    response = client.get(
+        "/api/offers/search", params={"q": q, "perpagelimit": 30} | params
+    )
+    assert response.status_code == 200
+    return response.json()["offers"]
+
+
+class TestSearch:
+    def test_should_walk_all_matching_offers_with_after_token(self, httpx_test_client):
+        # All offers match (by company name) with many equal scores
+        params = {"q": "company", "perpagelimit": 30}
+        found = []
+        while True:
+            response = httpx_test_client.get("/api/offers/search", params=params)
+            assert response.status_code == 200
+            data = response.json()
+            found += [offer["joboffer_id"] for offer in data["offers"]]
+            if data["info"]["next_after"] is None:
+                break
+            params["after"] = data["info"]["next_after"]
+        assert sorted(found) == list(range(1, 1004))
+
+    def test_should_find_offers_stored_by_ingest_ignoring_diacritics(
+        self, connexion_app_instance
+    ):
+        offer_id = add_offer(
+            connexion_app_instance.app, "Młodszy Programista Java", "Łódzka Spółka"
+        )
+        client = connexion_app_instance.test_client()
+        for q in ("lodzka programista", "SPÓŁKA", "mlodszy prog", "java ŁÓD"):
+            assert [offer["joboffer_id"] for offer in search(client, q)] == [offer_id]
+        assert search(client, "programista krakow") == []
+        # only the last word may be incomplete
+        assert search(client, "mlod programista") == []
+
+    def test_should_find_offers_by_updated_title(self, connexion_app_instance):
+        with connexion_app_instance.app.app_context():
+            offer = db.session.get(JobOffer, 3)
+            offer.title = "Kierowca wózka widłowego"
+            db.session.commit()
+        client = connexion_app_instance.test_client()
+        assert [offer["joboffer_id"] for offer in search(client, "wozka")] == [3]
+        assert [offer["joboffer_id"] for offer in search(client, "test offer")] == [
+            2,
+            1,
+        ]
+
+    def test_should_rank_better_matches_first(self, connexion_app_instance):
+        app = connexion_app_instance.app
+        weak_id = add_offer(app, "Tester oprogramowania", "Python Software House")
+        strong_id = add_offer(app, "Python Developer", "Python Labs")
+        client = connexion_app_instance.test_client()
+        assert [offer["joboffer_id"] for offer in search(client, "python")] == [
+            strong_id,
+            weak_id,
+        ]
+
+    def test_should_search_offers_matching_filters(self, httpx_test_client):
+        offers = search(httpx_test_client, "test offer", company="Company 2")
+        assert [offer["title"] for offer in offers] == ["Test offer 3"]
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"q": "!?"},
+            {"q": ""},
+            {"q": "offer", "after": "WyJwb3N0ZWQiLDEsMV0"},  # other ordering
+        ],
+    )
+    def test_should_get_400error_when_params_invalid(self, httpx_test_client, params):
+        response = httpx_test_client.get(
+            "/api/offers/search", params={"perpagelimit": 10} | params
+        )
+        assert response.status_code == 400
+
+
+class TestListingSerialization:
+    def test_should_serialize_offers_like_joboffer_schema(self, connexion_app_instance):
+        with connexion_app_instance.app.app_context():
+            ordering = (JobOffer.posted, JobOffer.joboffer_id)
+            offers = db.session.scalars(select(JobOffer).order_by(*ordering)).all()
+            rows = db.session.execute(
+                select(*listing_columns).order_by(*ordering)
+            ).all()
+            assert serialize_offers(rows) == joboffers_schema.dump(offers)
+
+    @pytest.mark.parametrize("pplimit", [10, 30])
+    def test_should_not_query_database_per_offer(self, connexion_app_instance, pplimit):
+        with connexion_app_instance.app.app_context():
+            engine = db.engine
+        statements = []
+
+        def count_statement(*args):  # pylint: disable=unused-argument
+            statements.append(1)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            client = connexion_app_instance.test_client()
+            response = client.get("/api/offers", params={"perpagelimit": pplimit})
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        assert response.status_code == 200
+        # count (for subpages) + offers + tags of all offers on the subpage
+        assert len(statements) == 3
+
+
 @pytest.mark.xfail(reason="not yet implemented")
 def test_should_get_500error_if_server_not_healthy(httpx_test_client):
     assert False
@@ -0,0 +1,105 @@
+import pytest
+
+from job_tracker.api import query_cost
+
+TEN_YEARS = {"start_date": "2014-01-01", "end_date": "2023-12-31"}
+
+
+@pytest.mark.parametrize(
+    "path, params, bins, suggested",
+    [
+        ("/api/statistics", {**TEN_YEARS, "binning": "day"}, 3652, "week"),
+        (
+            "/api/statistics",
+            {"start_date": "2019-01-01", "end_date": "2024-06-30", "binning": "day"},
+            2008,
+            "week",
+        ),
+        (
+            "/api/statistics",
+            {**TEN_YEARS, "binning": "week", "rolling": 366},
+            887,
+            "month",
+        ),
+        ("/api/statistics/salary", {**TEN_YEARS, "binning": "day"}, 3652, "week"),
+    ],
+)
+def test_should_reject_too_many_bins_and_suggest_binning(
+    connexion_app_instance, httpx_test_client, path, params, bins, suggested
+):
+    connexion_app_instance.app.config["STATISTICS_MAX_BINS"] = (
+        800 if "rolling" in params else 2000
+    )
+    response = httpx_test_client.get(path, params=params)
+    assert response.status_code == 400
+    problem = response.json()
+    assert problem["bins"] == bins
+    assert problem["suggested_binning"] == suggested
+    assert suggested in problem["detail"]
+    params["binning"] = suggested
+    params.pop("rolling", None)
+    assert httpx_test_client.get(path, params=params).status_code == 200
+
+
+def test_should_reject_batch_query_of_too_many_bins(httpx_test_client):
+    queries = [
+        {"id": "months", **TEN_YEARS, "binning": "month"},
+        {"id": "days", **TEN_YEARS, "binning": "day"},
+    ]
+    response = httpx_test_client.post(
+        "/api/statistics/batch", json={"queries": queries}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("query days: too many bins")
+
+
+def test_should_not_limit_bins_if_disabled(connexion_app_instance, httpx_test_client):
+    connexion_app_instance.app.config["STATISTICS_MAX_BINS"] = 0
+    response = httpx_test_client.get(
+        "/api/statistics", params={**TEN_YEARS, "binning": "day"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 3652
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/api/statistics", {**TEN_YEARS, "binning": "year"}),
+        ("/api/statistics/salary", {**TEN_YEARS, "binning": "year"}),
+    ],
+)
+def test_should_interrupt_queries_after_timeout(
+    connexion_app_instance, httpx_test_client, monkeypatch, path, params
+):
+    # Queries of the test data are too short to be checked otherwise
+    monkeypatch.setattr(query_cost, "SQLITE_PROGRESS_STEPS", 10)
+    connexion_app_instance.app.config["STATISTICS_TIMEOUT_SECONDS"] = 1e-9
+    response = httpx_test_client.get(path, params=params)
+    assert response.status_code == 503
+    assert response.json()["title"] == "Query timeout"
+    # Other queries of the same connection are not interrupted
+    connexion_app_instance.app.config["STATISTICS_TIMEOUT_SECONDS"] = 10
+    assert httpx_test_client.get(path, params=params).status_code == 200
+    assert httpx_test_client.get("/api/tags").status_code == 200
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/api/statistics", {**TEN_YEARS, "binning": "week"}),
+        ("/api/statistics", {**TEN_YEARS, "binning": "week", "group_by": "tag"}),
+        ("/api/statistics/salary", {**TEN_YEARS, "binning": "week"}),
+    ],
+)
+def test_should_stream_the_same_response(
+    connexion_app_instance, httpx_test_client, path, params
+):
+    config = connexion_app_instance.app.config
+    config["STATISTICS_STREAM_MIN_ITEMS"] = 0
+    expected = httpx_test_client.get(path, params=params)
+    config["STATISTICS_STREAM_MIN_ITEMS"] = 100
+    streamed = httpx_test_client.get(path, params=params)
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"] == "application/json"
+    assert streamed.content == expected.content
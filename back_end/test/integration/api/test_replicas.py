@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+from flask import g
+
+from job_tracker.database import db
+from job_tracker.models import Tag
+from job_tracker.replicas import PRIMARY_HEADER, primary_reads
+
+
+@pytest.fixture
+def databases(tmp_path, start_app):
+    """Returns URIs of the primary database and its two replicas
+
+    Every database has a single, distinct tag: "Primary", "Replica 0"
+    and "Replica 1".
+    """
+    primary = tmp_path.joinpath("primary.db")
+    conxn_app = start_app(f"sqlite:///{primary}")
+    with conxn_app.app.app_context():
+        db.engine.dispose()
+    source = sqlite3.connect(primary)
+    replicas = []
+    for i in range(2):
+        replica = tmp_path.joinpath(f"replica{i}.db")
+        with sqlite3.connect(replica) as connection:
+            source.backup(connection)
+            connection.execute("INSERT INTO tag (name) VALUES (?)", (f"Replica {i}",))
+        connection.close()
+        replicas.append(f"sqlite:///{replica}")
+    with source:
+        source.execute("INSERT INTO tag (name) VALUES ('Primary')")
+    source.close()
+    return f"sqlite:///{primary}", replicas
+
+
+def get_tags(client, **headers):
+    response = client.get("/api/tags", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestHappyPaths:
+    def test_should_read_from_replicas_in_turns(self, databases, start_app):
+        primary, replicas = databases
+        client = start_app(primary, SQLALCHEMY_READ_REPLICAS=replicas).test_client()
+        tags = [get_tags(client) for _ in range(4)]
+        assert tags == [["Replica 0"], ["Replica 1"], ["Replica 0"], ["Replica 1"]]
+
+    def test_should_read_from_primary_on_request(self, databases, start_app):
+        primary, replicas = databases
+        client = start_app(primary, SQLALCHEMY_READ_REPLICAS=replicas).test_client()
+        assert get_tags(client, **{PRIMARY_HEADER: "true"}) == ["Primary"]
+
+    def test_should_read_from_primary_without_replicas(self, databases, start_app):
+        primary, _ = databases
+        client = start_app(primary).test_client()
+        assert get_tags(client) == ["Primary"]
+
+    def test_should_write_to_primary(self, databases, start_app):
+        primary, replicas = databases
+        conxn_app = start_app(primary, SQLALCHEMY_READ_REPLICAS=replicas)
+        flask_app = conxn_app.app
+        with flask_app.test_request_context():
+            g.read_engine = flask_app.extensions["replica_router"].choose()
+            db.session.add(Tag(name="Python"))
+            db.session.commit()
+            # read from the replica
+            assert [tag.name for tag in Tag.query.all()] == ["Replica 0"]
+            with primary_reads():
+                assert [tag.name for tag in Tag.query.all()] == ["Primary", "Python"]
+
+
+class TestUnhappyPaths:
+    def test_should_skip_replica_that_is_down(self, databases, tmp_path, start_app):
+        primary, replicas = databases
+        missing = f"sqlite:///{tmp_path.joinpath('missing', 'replica.db')}"
+        client = start_app(
+            primary, SQLALCHEMY_READ_REPLICAS=[missing, replicas[1]]
+        ).test_client()
+        tags = [get_tags(client) for _ in range(3)]
+        assert tags == [["Replica 1"]] * 3
+
+    def test_should_read_from_primary_when_all_replicas_are_down(
+        self, databases, tmp_path, start_app
+    ):
+        primary, _ = databases
+        missing = f"sqlite:///{tmp_path.joinpath('missing', 'replica.db')}"
+        client = start_app(primary, SQLALCHEMY_READ_REPLICAS=[missing]).test_client()
+        assert get_tags(client) == ["Primary"]
@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from job_tracker.api import statistics
+
+DEFAULT_VIEW = {
+    "start_date": "2024-01-01",
+    "end_date": "2024-12-31",
+    "binning": "day",
+    "contract_type": "full time",
+}
+
+
+def get_metrics(client) -> dict:
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    return response.json()["single_flight"]
+
+
+@pytest.fixture
+def slow_stats(monkeypatch):
+    """Makes calculate_stats wait until the returned event is set"""
+    calculate_stats = statistics.calculate_stats
+    release = threading.Event()
+
+    def slow_calculate_stats(*args, **kwargs):
+        release.wait(5)
+        return calculate_stats(*args, **kwargs)
+
+    monkeypatch.setattr(statistics, "calculate_stats", slow_calculate_stats)
+    return release
+
+
+class TestHappyPaths:
+    def test_should_share_computation_of_identical_concurrent_requests(
+        self, httpx_test_client, slow_stats
+    ):
+        slow_stats.set()
+        expected = httpx_test_client.get(
+            "/api/statistics", params={**DEFAULT_VIEW, "tags": ["Selenium", "Python"]}
+        )
+        slow_stats.clear()
+        params = [
+            {**DEFAULT_VIEW, "tags": tags}
+            for tags in (["Selenium", "Python"], ["Python", "Selenium"]) * 3
+        ]
+        threading.Timer(0.5, slow_stats.set).start()
+        with ThreadPoolExecutor(len(params)) as executor:
+            responses = list(
+                executor.map(
+                    lambda p: httpx_test_client.get("/api/statistics", params=p),
+                    params,
+                )
+            )
+        assert all(response.json() == expected.json() for response in responses)
+        assert get_metrics(httpx_test_client) == {
+            "in_flight": 0,
+            "computed": 2,
+            "coalesced": len(params) - 1,
+            "timed_out": 0,
+        }
+
+    def test_should_not_share_different_requests(self, httpx_test_client):
+        for binning in ("day", "month"):
+            response = httpx_test_client.get(
+                "/api/statistics", params={**DEFAULT_VIEW, "binning": binning}
+            )
+            assert response.status_code == 200
+        assert get_metrics(httpx_test_client)["computed"] == 2
+
+
+def test_should_report_disabled_coalescing(connexion_app_instance, httpx_test_client):
+    connexion_app_instance.app.extensions.pop("single_flight")
+    response = httpx_test_client.get("/api/statistics", params=DEFAULT_VIEW)
+    assert response.status_code == 200
+    assert get_metrics(httpx_test_client) is None
@@ -1,5 +1,8 @@
+import ast
 from datetime import date, datetime, timedelta
+from pathlib import Path
 
+import numpy as np
 import pytest
 
 
@@ -214,6 +217,32 @@ class TestHappyPaths:
         assert data[0]["date"] == "2023-09-01"
         assert data[0]["count"] == 101
 
+    @pytest.mark.parametrize(
+        "contract_type, job_level, expected_counts",
+        [
+            ("Pełny etat", "Młodszy specjalista (Junior)", 101),
+            ("full time", "junior, senior", 0),
+            ("full time", "unknown level", 0),
+        ],
+    )
+    def test_should_match_canonical_contract_type_and_job_level(
+        self, httpx_test_client, contract_type, job_level, expected_counts
+    ):
+        response = httpx_test_client.get(
+            "/api/statistics",
+            params={
+                "start_date": "2023-09-01",
+                "end_date": "2023-09-30",
+                "binning": "month",
+                "contract_type": contract_type,
+                "job_level": job_level,
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["count"] == expected_counts
+
     @pytest.mark.parametrize(
         "tags, expected_counts",
         [
@@ -286,6 +315,404 @@ class TestDateParametersSchemaViolations:
         assert response.status_code == 400
 
 
+def offers_salaries(year):
+    """Middles of salary ranges (USD/mo) of test offers posted in the year"""
+    salaries = []
+    data_file = Path(__file__).parent / "data" / "test_offers.dat"
+    for line in data_file.read_text().splitlines():
+        offer = ast.literal_eval(line.rstrip(","))
+        if offer[3].startswith(str(year)):
+            salaries.append(float(offer[7].split()[0]))
+    return salaries
+
+
+class TestSalaryStatistics:
+    def test_should_get_salary_percentiles_like_numpy(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics/salary",
+            params={
+                "start_date": "2023-01-01",
+                "end_date": "2024-12-31",
+                "binning": "year",
+                "currency": "USD",
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert [point["date"] for point in data] == ["2023-01-01", "2024-01-01"]
+        for point, year in zip(data, (2023, 2024)):
+            salaries = offers_salaries(year)
+            assert point["count"] == len(salaries)
+            expected = np.percentile(salaries, [10, 25, 50, 75, 90])
+            assert list(point["percentiles"]) == ["p10", "p25", "p50", "p75", "p90"]
+            assert list(point["percentiles"].values()) == pytest.approx(expected)
+
+    def test_should_get_histograms_with_shared_edges(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics/salary",
+            params={
+                "start_date": "2024-01-01",
+                "end_date": "2024-01-31",
+                "binning": "day",
+                "currency": "USD",
+                "percentiles": [50],
+                "histogram_bins": 2,
+            },
+        )
+        assert response.status_code == 200
+        stats = response.json()
+        # offers posted in 2024: 3000 USD/mo on 6th and 10000 USD/mo on 9th Jan
+        assert stats["histogram_edges"] == [3000, 6500, 10000]
+        assert len(stats["data"]) == 31
+        by_date = {point["date"]: point for point in stats["data"]}
+        assert by_date["2024-01-06"]["histogram"] == [1, 0]
+        assert by_date["2024-01-09"]["histogram"] == [0, 1]
+        assert by_date["2024-01-09"]["percentiles"] == {"p50": 10000}
+        assert by_date["2024-01-07"] == {
+            "date": "2024-01-07",
+            "count": 0,
+            "percentiles": {"p50": None},
+            "histogram": [0, 0],
+        }
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"currency": "PLN"},
+            {"currency": "USD", "period": "hour"},
+            {"currency": "USD", "gross": "true"},
+        ],
+    )
+    def test_should_skip_offers_with_other_salaries(self, httpx_test_client, params):
+        response = httpx_test_client.get(
+            "/api/statistics/salary",
+            params={
+                "start_date": "2023-01-01",
+                "end_date": "2023-12-31",
+                "binning": "month",
+            }
+            | params,
+        )
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["histogram_edges"] == []
+        assert [point["count"] for point in stats["data"]] == [0] * 12
+
+    def test_should_filter_salaries_by_contract_type(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics/salary",
+            params={
+                "start_date": "2024-01-01",
+                "end_date": "2024-12-31",
+                "binning": "year",
+                "currency": "USD",
+                "contract_type": "Część etatu",
+            },
+        )
+        assert response.status_code == 200
+        [point] = response.json()["data"]
+        assert point["count"] == 1
+        assert point["percentiles"]["p90"] == 3000
+
+    def test_should_get_salaries_in_weeks(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics/salary",
+            params={
+                "start_date": "2024-01-03",
+                "end_date": "2024-01-20",
+                "binning": "week",
+                "currency": "USD",
+            },
+        )
+        assert response.status_code == 200
+        # offers posted on 6th (Saturday) and 9th (Tuesday) of January 2024
+        assert [
+            (point["date"], point["count"]) for point in response.json()["data"]
+        ] == [
+            ("2024-01-01", 1),
+            ("2024-01-08", 1),
+            ("2024-01-15", 0),
+        ]
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"end_date": "2023-01-01"},
+            {"percentiles": [101]},
+            {"histogram_bins": 0},
+            {"period": "week"},
+            {"currency": "dollars"},
+        ],
+    )
+    def test_should_get_400error_when_invalid_params_passed(
+        self, httpx_test_client, params
+    ):
+        response = httpx_test_client.get(
+            "/api/statistics/salary",
+            params={
+                "start_date": "2023-09-01",
+                "end_date": "2023-09-30",
+                "binning": "month",
+            }
+            | params,
+        )
+        assert response.status_code == 400
+
+
+GROUPED_PARAMS = {
+    "start_date": "2012-01-01",
+    "end_date": "2024-12-31",
+    "binning": "year",
+}
+# Criteria of /statistics matching offers of a group
+GROUP_CRITERIA = {
+    "tag": "tags",
+    "job_level": "job_level",
+    "contract_type": "contract_type",
+}
+
+
+class TestGroupedStatistics:
+    @pytest.mark.parametrize("group_by", ["tag", "job_level", "contract_type"])
+    def test_should_get_same_series_as_separate_calls(
+        self, httpx_test_client, group_by
+    ):
+        response = httpx_test_client.get(
+            "/api/statistics", params={**GROUPED_PARAMS, "group_by": group_by}
+        )
+        assert response.status_code == 200
+        grouped = response.json()
+        assert grouped["group_by"] == group_by
+        assert grouped["other"] is None
+        assert grouped["series"]
+        totals = [series["total"] for series in grouped["series"]]
+        assert totals == sorted(totals, reverse=True)
+        for series in grouped["series"]:
+            separate = httpx_test_client.get(
+                "/api/statistics",
+                params={**GROUPED_PARAMS, GROUP_CRITERIA[group_by]: series["group"]},
+            ).json()
+            assert series["data"] == separate
+            assert series["total"] == sum(point["count"] for point in separate)
+
+    def test_should_count_every_offer_in_its_company(self, httpx_test_client):
+        grouped = httpx_test_client.get(
+            "/api/statistics", params={**GROUPED_PARAMS, "group_by": "company"}
+        ).json()
+        all_offers = httpx_test_client.get("/api/statistics", params=GROUPED_PARAMS)
+        assert {series["group"] for series in grouped["series"]} == {
+            "Company 1",
+            "Company 2",
+        }
+        assert sum(series["total"] for series in grouped["series"]) == sum(
+            point["count"] for point in all_offers.json()
+        )
+
+    def test_should_count_other_groups_together(self, httpx_test_client):
+        params = {**GROUPED_PARAMS, "group_by": "tag"}
+        all_groups = httpx_test_client.get("/api/statistics", params=params).json()
+        response = httpx_test_client.get("/api/statistics", params={**params, "top": 1})
+        assert response.status_code == 200
+        top = response.json()
+        assert top["series"] == all_groups["series"][:1]
+        assert top["other"]["groups"] == len(all_groups["series"]) - 1
+        assert top["other"]["total"] == sum(
+            series["total"] for series in all_groups["series"][1:]
+        )
+        assert [point["count"] for point in top["other"]["data"]] == [
+            sum(counts)
+            for counts in zip(
+                *(
+                    [point["count"] for point in series["data"]]
+                    for series in all_groups["series"][1:]
+                )
+            )
+        ]
+
+    def test_should_get_only_requested_groups(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics",
+            params={
+                **GROUPED_PARAMS,
+                "group_by": "tag",
+                "groups": ["Python", "Go"],
+            },
+        )
+        assert response.status_code == 200
+        assert [
+            (series["group"], series["total"]) for series in response.json()["series"]
+        ] == [("Python", 1), ("Go", 0)]
+
+    def test_should_get_400error_when_top_without_group_by(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics", params={**GROUPED_PARAMS, "top": 2}
+        )
+        assert response.status_code == 400
+
+
+def get_counts(client, start_date: str, end_date: str, binning: str, **params):
+    response = client.get(
+        "/api/statistics",
+        params={
+            "start_date": start_date,
+            "end_date": end_date,
+            "binning": binning,
+            **params,
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestWeeksQuartersAndRunningValues:
+    def test_should_get_iso_weeks_as_sums_of_days(self, httpx_test_client):
+        weeks = get_counts(httpx_test_client, "2023-09-13", "2023-10-20", "week")
+        # Weeks start on Monday (2023-09-11 is a Monday, 2023-10-22 a Sunday)
+        days = get_counts(httpx_test_client, "2023-09-11", "2023-10-22", "day")
+        assert [point["date"] for point in weeks] == [
+            str(date(2023, 9, 11) + timedelta(weeks=i)) for i in range(6)
+        ]
+        assert [point["count"] for point in weeks] == [
+            sum(point["count"] for point in days[i : i + 7])
+            for i in range(0, len(days), 7)
+        ]
+        assert sum(point["count"] for point in weeks) > 0
+
+    @pytest.mark.parametrize("params", [{}, {"tags": ["Selenium"]}])
+    def test_should_get_quarters_as_sums_of_months(self, httpx_test_client, params):
+        quarters = get_counts(
+            httpx_test_client, "2023-02-15", "2024-01-10", "quarter", **params
+        )
+        months = get_counts(
+            httpx_test_client, "2023-01-01", "2024-03-31", "month", **params
+        )
+        assert [point["date"] for point in quarters] == [
+            "2023-01-01",
+            "2023-04-01",
+            "2023-07-01",
+            "2023-10-01",
+            "2024-01-01",
+        ]
+        assert [point["count"] for point in quarters] == [
+            sum(point["count"] for point in months[i : i + 3])
+            for i in range(0, len(months), 3)
+        ]
+
+    def test_should_get_moving_averages(self, httpx_test_client):
+        stats = get_counts(
+            httpx_test_client, "2023-10-01", "2024-02-29", "month", rolling=3
+        )
+        # Averages of the first months include months before the range
+        months = [
+            point["count"]
+            for point in get_counts(
+                httpx_test_client, "2023-08-01", "2024-02-29", "month"
+            )
+        ]
+        assert [point["count"] for point in stats] == months[2:]
+        assert [point["average"] for point in stats] == pytest.approx(
+            [sum(months[i : i + 3]) / 3 for i in range(len(stats))]
+        )
+        assert "cumulative" not in stats[0]
+
+    def test_should_get_running_totals(self, httpx_test_client):
+        stats = get_counts(
+            httpx_test_client,
+            "2023-09-13",
+            "2023-10-20",
+            "week",
+            rolling=2,
+            cumulative="true",
+        )
+        counts = [point["count"] for point in stats]
+        assert [point["cumulative"] for point in stats] == list(np.cumsum(counts))
+        assert stats[-1]["average"] == (counts[-2] + counts[-1]) / 2
+
+    def test_should_get_400error_when_rolling_with_group_by(self, httpx_test_client):
+        response = httpx_test_client.get(
+            "/api/statistics",
+            params={**GROUPED_PARAMS, "group_by": "tag", "rolling": 2},
+        )
+        assert response.status_code == 400
+
+
+BATCH_QUERIES = [
+    {
+        "id": "all",
+        "start_date": "2012-01-01",
+        "end_date": "2024-12-31",
+        "binning": "year",
+    },
+    {
+        "id": "selenium",
+        "start_date": "2012-01-01",
+        "end_date": "2024-12-31",
+        "binning": "year",
+        "tags": ["Selenium"],
+    },
+    {
+        "id": "juniors",
+        "start_date": "2023-05-13",
+        "end_date": "2024-02-10",
+        "binning": "month",
+        "job_level": "junior",
+        "contract_type": "full time",
+    },
+    {
+        "id": "days",
+        "start_date": "2023-09-25",
+        "end_date": "2023-10-05",
+        "binning": "day",
+        "contract_type": "part time",
+    },
+]
+
+
+class TestBatchStatistics:
+    # Queries with the same (yearly) binning and with different binnings
+    @pytest.mark.parametrize("queries", [BATCH_QUERIES[:2], BATCH_QUERIES])
+    def test_should_get_same_results_as_separate_queries(
+        self, httpx_test_client, queries
+    ):
+        response = httpx_test_client.post(
+            "/api/statistics/batch", json={"queries": queries}
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results.keys() == {query["id"] for query in queries}
+        for query in queries:
+            params = {key: value for key, value in query.items() if key != "id"}
+            separate = httpx_test_client.get("/api/statistics", params=params)
+            assert results[query["id"]] == separate.json()
+
+    def test_should_get_results_of_every_id(self, httpx_test_client):
+        queries = [BATCH_QUERIES[1], {**BATCH_QUERIES[1], "id": "same criteria"}]
+        response = httpx_test_client.post(
+            "/api/statistics/batch", json={"queries": queries}
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results["selenium"] == results["same criteria"]
+
+    @pytest.mark.parametrize(
+        "queries",
+        [
+            [BATCH_QUERIES[0], BATCH_QUERIES[0]],
+            [{**BATCH_QUERIES[0], "end_date": "2011-12-31"}],
+            [{**BATCH_QUERIES[0], "binning": "hour"}],
+            [{**BATCH_QUERIES[0], "unknown": "criterion"}],
+            [],
+        ],
+    )
+    def test_should_get_400error_when_invalid_queries_passed(
+        self, httpx_test_client, queries
+    ):
+        response = httpx_test_client.post(
+            "/api/statistics/batch", json={"queries": queries}
+        )
+        assert response.status_code == 400
+
+
 def test_should_get_400error_when_end_date_eariler_then_start_date(httpx_test_client):
     sd = "2023-09-30"
     ed = "2023-09-01"
@@ -0,0 +1,151 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.statistics import calculate_grouped_stats
+from job_tracker.api.stats_snapshot import init_stats_snapshot
+from job_tracker.archive import archive_offers
+from job_tracker.database import db
+from job_tracker.models import JobOffer
+from job_tracker.tasks import store_offers
+
+CRITERIA = [
+    {},
+    {"tags": ["Selenium"]},
+    {"tags": ["Selenium", "Java"]},
+    {"tags": ["Selenium", "Unknown"]},
+    {"contract_type": "full time"},
+    {"contract_type": "full time, part time"},
+    {"contract_type": "not a contract type"},
+    {"job_level": "junior"},
+    {"job_level": "senior", "contract_type": "full time", "tags": ["Python"]},
+    {"job_mode": "remote"},
+    {"job_mode": "unknown"},
+]
+RANGES = [
+    (datetime(2012, 1, 1), datetime(2024, 12, 31), Interval.YEAR),
+    (datetime(2023, 1, 1), datetime(2024, 2, 29), Interval.MONTH),
+    (datetime(2023, 9, 15), datetime(2023, 10, 20), Interval.DAY),
+    (datetime(2012, 6, 18), datetime(2012, 6, 18), Interval.DAY),
+    (datetime(2023, 9, 13), datetime(2024, 1, 10), Interval.WEEK),
+    (datetime(2012, 5, 1), datetime(2024, 3, 31), Interval.QUARTER),
+]
+
+
+def use_snapshot(app):
+    app.config["STATISTICS_ENGINE"] = "memory"
+    init_stats_snapshot(app)
+    return app.extensions["stats_snapshot"]
+
+
+def scraped_offer(offer_id: int, tags: list[str]):
+    """Offer as collected by the results page"""
+    return SimpleNamespace(
+        id=offer_id,
+        company_id=1,
+        company_name="Company 1",
+        company_link="https://phonycompany1.com/",
+        title="New offer",
+        publication_date=datetime(2023, 10, 2),
+        webscrap_timestamp=datetime(2030, 1, 1),
+        contract_type="full time",
+        job_level="junior",
+        salary="",
+        link="https://fakeaddress.com/new",
+        technology_tags=tags,
+    )
+
+
+class TestHappyPaths:
+    def test_should_get_same_statistics_as_sql(self, connexion_app_instance, all_stats):
+        app = connexion_app_instance.app
+        expected = all_stats(app, RANGES, CRITERIA)
+        use_snapshot(app)
+        assert all_stats(app, RANGES, CRITERIA) == expected
+
+    @pytest.mark.parametrize("group_by", ["tag", "job_level", "contract_type"])
+    @pytest.mark.parametrize("groups, top", [(None, None), (["Python", "junior"], 1)])
+    def test_should_get_same_grouped_statistics_as_sql(
+        self, connexion_app_instance, group_by, groups, top
+    ):
+        app = connexion_app_instance.app
+
+        def grouped_stats():
+            with app.app_context():
+                return [
+                    calculate_grouped_stats(
+                        start_date, end_date, binning, group_by, groups, top, **criteria
+                    )
+                    for start_date, end_date, binning in RANGES
+                    for criteria in CRITERIA
+                ]
+
+        expected = grouped_stats()
+        use_snapshot(app)
+        assert grouped_stats() == expected
+
+    def test_should_include_archived_offers(self, connexion_app_instance, all_stats):
+        app = connexion_app_instance.app
+        expected = all_stats(app, RANGES, CRITERIA)
+        with app.app_context():
+            archive_offers(db.engine, datetime(2023, 10, 1).date())
+        use_snapshot(app)
+        assert all_stats(app, RANGES, CRITERIA) == expected
+
+    def test_should_count_offers_stored_after_ingest(
+        self, connexion_app_instance, all_stats
+    ):
+        app = connexion_app_instance.app
+        use_snapshot(app)
+        before = all_stats(app, RANGES, CRITERIA)
+        with app.app_context():
+            store_offers(
+                [scraped_offer(5000, ["Selenium", "Java"]), scraped_offer(5001, [])],
+                is_tag_list_available=True,
+            )
+        after = all_stats(app, RANGES, CRITERIA)
+        assert after != before
+        app.extensions.pop("stats_snapshot")
+        assert after == all_stats(app, RANGES, CRITERIA)
+
+    def test_should_rebuild_when_offers_are_deleted(
+        self, connexion_app_instance, all_stats
+    ):
+        app = connexion_app_instance.app
+        snapshot = use_snapshot(app)
+        all_stats(app, RANGES, CRITERIA)
+        with app.app_context():
+            db.session.delete(db.session.get(JobOffer, 1))
+            db.session.commit()
+            snapshot.refresh(db.session)
+        after = all_stats(app, RANGES, CRITERIA)
+        app.extensions.pop("stats_snapshot")
+        assert after == all_stats(app, RANGES, CRITERIA)
+
+    def test_should_serve_statistics_endpoint(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        params = {
+            "start_date": "2023-01-01",
+            "end_date": "2024-12-31",
+            "binning": "month",
+            "tags": ["Selenium"],
+        }
+        expected = httpx_test_client.get("/api/statistics", params=params).json()
+        use_snapshot(connexion_app_instance.app)
+        response = httpx_test_client.get("/api/statistics", params=params)
+        assert response.status_code == 200
+        assert response.json() == expected
+
+
+@pytest.mark.parametrize("engine, created", [("sql", False), ("memory", True)])
+def test_should_create_snapshot_only_for_memory_engine(
+    connexion_app_instance, engine, created
+):
+    app = connexion_app_instance.app
+    app.config["STATISTICS_ENGINE"] = engine
+    app.extensions.pop("stats_snapshot", None)
+    init_stats_snapshot(app)
+    assert ("stats_snapshot" in app.extensions) == created
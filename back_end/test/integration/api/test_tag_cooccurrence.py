@@ -0,0 +1,129 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select
+from test_stats_snapshot import scraped_offer
+
+from job_tracker.archive import archive_offers
+from job_tracker.backfill import backfill_tag_pairs
+from job_tracker.database import db
+from job_tracker.models import JobOffer, tag_pair_month
+from job_tracker.tasks import store_offers
+
+ALL_MONTHS = {"start_date": "2012-01-01", "end_date": "2024-12-31"}
+
+
+def get_cooccurrence(client, **params):
+    response = client.get(
+        "/api/statistics/tags/cooccurrence", params={**ALL_MONTHS, **params}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def pair_counts() -> set:
+    return set(db.session.execute(select(tag_pair_month)).all())
+
+
+def rebuilt_pair_counts() -> set:
+    """Pair counts as counted from scratch (and restores them)"""
+    counted = pair_counts()
+    backfill_tag_pairs(db.session.connection())
+    rebuilt = pair_counts()
+    db.session.rollback()
+    assert pair_counts() == counted
+    return rebuilt
+
+
+class TestHappyPaths:
+    # Test offer 1 (2012-06): Java, Selenium, Test offer 2 (2024-01): Python, Selenium
+    @pytest.mark.parametrize(
+        "params, expected",
+        [
+            (
+                {},
+                {
+                    "tags": ["Selenium", "Java", "Python"],
+                    "matrix": [[2, 1, 1], [1, 1, 0], [1, 0, 1]],
+                },
+            ),
+            ({"top": 1}, {"tags": ["Selenium"], "matrix": [[2]]}),
+            (
+                {"start_date": "2024-01-31", "end_date": "2024-01-31"},
+                {"tags": ["Python", "Selenium"], "matrix": [[1, 1], [1, 1]]},
+            ),
+            ({"end_date": "2012-05-31"}, {"tags": [], "matrix": []}),
+        ],
+    )
+    def test_should_count_offers_having_pairs_of_tags(
+        self, httpx_test_client, params, expected
+    ):
+        assert get_cooccurrence(httpx_test_client, **params) == expected
+
+    def test_should_count_stored_and_deleted_offers(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        with connexion_app_instance.app.app_context():
+            store_offers(
+                [
+                    scraped_offer(5000, ["Selenium", "Java", "Docker"]),
+                    scraped_offer(5001, ["Java"]),
+                ],
+                is_tag_list_available=True,
+            )
+            db.session.delete(db.session.get(JobOffer, 2))
+            db.session.commit()
+            assert pair_counts() == rebuilt_pair_counts()
+        assert get_cooccurrence(httpx_test_client) == {
+            "tags": ["Java", "Selenium", "Docker"],
+            "matrix": [[3, 2, 1], [2, 2, 1], [1, 1, 1]],
+        }
+
+    def test_should_count_changed_tags(self, connexion_app_instance):
+        with connexion_app_instance.app.app_context():
+            offer = db.session.get(JobOffer, 1)
+            offer.tags = [tag for tag in offer.tags if tag.name != "Java"]
+            db.session.commit()
+            assert pair_counts() == rebuilt_pair_counts()
+
+    @pytest.mark.parametrize("remove_tag", [None, "Java"])
+    def test_should_move_offers_posted_in_another_month(
+        self, connexion_app_instance, httpx_test_client, remove_tag
+    ):
+        with connexion_app_instance.app.app_context():
+            offer = db.session.get(JobOffer, 1)
+            # Expired attributes are loaded when they are changed
+            db.session.expire(offer)
+            offer.posted = datetime(2024, 1, 15)
+            if remove_tag:
+                offer.tags = [tag for tag in offer.tags if tag.name != remove_tag]
+            db.session.commit()
+            assert pair_counts() == rebuilt_pair_counts()
+        assert get_cooccurrence(httpx_test_client, end_date="2012-12-31") == {
+            "tags": [],
+            "matrix": [],
+        }
+
+    def test_should_include_archived_offers(
+        self, connexion_app_instance, httpx_test_client
+    ):
+        before = get_cooccurrence(httpx_test_client)
+        with connexion_app_instance.app.app_context():
+            archive_offers(db.engine, date(2023, 10, 1))
+            assert pair_counts() == rebuilt_pair_counts()
+        assert get_cooccurrence(httpx_test_client) == before
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"end_date": "2011-12-31"},
+        {"top": 0},
+        {"start_date": "2024-13-01"},
+    ],
+)
+def test_should_get_400error_when_invalid_params_passed(httpx_test_client, params):
+    response = httpx_test_client.get(
+        "/api/statistics/tags/cooccurrence", params={**ALL_MONTHS, **params}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,102 @@
+from datetime import datetime
+from functools import partial
+
+import pytest
+from test_stats_snapshot import scraped_offer
+
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.statistics import calculate_salary_stats, calculate_stats
+from job_tracker.api.tag_index import init_tag_index
+from job_tracker.archive import archive_offers
+from job_tracker.database import db
+from job_tracker.tasks import store_offers
+
+TAGS = [
+    ["Selenium"],
+    ["Selenium", "Java"],
+    ["Java", "Python"],
+    ["Selenium", "Unknown"],
+]
+# Statistics of all years (offers and salaries) of every set of tags
+YEARS = [(datetime(2012, 1, 1), datetime(2024, 12, 31), Interval.YEAR)]
+TAG_CRITERIA = [{"tags": tags} for tags in TAGS]
+STATS = (calculate_stats, partial(calculate_salary_stats, currency="USD"))
+EXPECTED_COUNTS = [
+    {"name": "Selenium", "count": 2},
+    {"name": "Java", "count": 1},
+    {"name": "Python", "count": 1},
+]
+
+
+def use_tag_index(app):
+    app.config["TAG_INDEX"] = True
+    with app.app_context():
+        init_tag_index(app)
+    return app.extensions["tag_index"]
+
+
+class TestHappyPaths:
+    def test_should_get_same_statistics_as_sql(self, connexion_app_instance, all_stats):
+        app = connexion_app_instance.app
+        expected = all_stats(app, YEARS, TAG_CRITERIA, STATS)
+        use_tag_index(app)
+        assert all_stats(app, YEARS, TAG_CRITERIA, STATS) == expected
+
+    def test_should_use_sql_if_many_offers_have_tags(
+        self, connexion_app_instance, all_stats
+    ):
+        app = connexion_app_instance.app
+        expected = all_stats(app, YEARS, TAG_CRITERIA, STATS)
+        use_tag_index(app)
+        app.config["TAG_INDEX_MAX_OFFERS"] = 0
+        assert all_stats(app, YEARS, TAG_CRITERIA, STATS) == expected
+
+    def test_should_include_archived_offers(self, connexion_app_instance, all_stats):
+        app = connexion_app_instance.app
+        expected = all_stats(app, YEARS, TAG_CRITERIA, STATS)
+        with app.app_context():
+            archive_offers(db.engine, datetime(2023, 10, 1).date())
+        use_tag_index(app)
+        assert all_stats(app, YEARS, TAG_CRITERIA, STATS) == expected
+
+    def test_should_add_tags_of_offers_stored_after_ingest(
+        self, connexion_app_instance, httpx_test_client, all_stats
+    ):
+        app = connexion_app_instance.app
+        use_tag_index(app)
+        with app.app_context():
+            store_offers(
+                [scraped_offer(5000, ["Selenium", "Java"]), scraped_offer(5001, [])],
+                is_tag_list_available=True,
+            )
+        after = all_stats(app, YEARS, TAG_CRITERIA, STATS)
+        # Test offer 1 and the new one have both Selenium and Java
+        assert sum(point["count"] for point in after[1]) == 2
+        response = httpx_test_client.get("/api/tags", params={"counts": "true"})
+        assert response.json() == [
+            {"name": "Selenium", "count": 3},
+            {"name": "Java", "count": 2},
+            {"name": "Python", "count": 1},
+        ]
+        app.extensions.pop("tag_index")
+        assert after == all_stats(app, YEARS, TAG_CRITERIA, STATS)
+
+    @pytest.mark.parametrize("indexed", [False, True])
+    def test_should_count_offers_having_tags(
+        self, connexion_app_instance, httpx_test_client, indexed
+    ):
+        if indexed:
+            use_tag_index(connexion_app_instance.app)
+        response = httpx_test_client.get("/api/tags", params={"counts": "true"})
+        assert response.status_code == 200
+        assert response.json() == EXPECTED_COUNTS
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_should_build_index_only_if_enabled(connexion_app_instance, enabled):
+    app = connexion_app_instance.app
+    app.config["TAG_INDEX"] = enabled
+    app.extensions.pop("tag_index", None)
+    with app.app_context():
+        init_tag_index(app)
+    assert ("tag_index" in app.extensions) == enabled
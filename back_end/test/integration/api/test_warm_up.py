@@ -0,0 +1,90 @@
+import pytest
+from test_stats_snapshot import scraped_offer
+
+from job_tracker.api.dashboard import DEFAULT_VIEW
+from job_tracker.api.warm_up import WarmUp
+from job_tracker.tasks import store_offers
+
+
+def get_dashboard(client, **params):
+    response = client.get("/api/dashboard", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def store_kotlin_offer(app):
+    with app.app_context():
+        store_offers([scraped_offer(5000, ["Kotlin"])], is_tag_list_available=True)
+
+
+def test_should_cache_views_and_views_of_top_tags(
+    connexion_app_instance, httpx_test_client
+):
+    app = connexion_app_instance.app
+    warm_up = WarmUp(views=[{}, {"binning": "month"}], top_tags=2)
+    assert warm_up.run(app) == {
+        "cached": 4,
+        "failed": 0,
+        "skipped": 0,
+        "seconds": pytest.approx(0, abs=30),
+    }
+    warmed = [
+        get_dashboard(httpx_test_client, **params)
+        for params in ({}, {"binning": "month"}, {"tags": "Selenium"})
+    ]
+    # Payloads were cached before the new offer was stored
+    store_kotlin_offer(app)
+    assert [
+        get_dashboard(httpx_test_client, **params)
+        for params in ({}, {"binning": "month"}, {"tags": "Selenium"})
+    ] == warmed
+    assert {"name": "Kotlin", "count": 1} not in warmed[0]["tags"]
+    # Least common tag was not warmed up
+    assert {"name": "Kotlin", "count": 1} in get_dashboard(
+        httpx_test_client, tags="Python"
+    )["tags"]
+
+
+def test_should_replace_cached_payloads(connexion_app_instance, httpx_test_client):
+    app = connexion_app_instance.app
+    before = get_dashboard(httpx_test_client)
+    store_kotlin_offer(app)
+    WarmUp(views=[{}], top_tags=0).run(app)
+    after = get_dashboard(httpx_test_client)
+    assert after != before
+    assert {"name": "Kotlin", "count": 1} in after["tags"]
+
+
+def test_should_report_number_of_stored_offers(connexion_app_instance):
+    # The scraping task starts the warm-up only if new offers were stored
+    with connexion_app_instance.app.app_context():
+        offers = [scraped_offer(5000, ["Kotlin"]), scraped_offer(1, [])]
+        assert store_offers(offers, is_tag_list_available=True) == 1
+        assert store_offers(offers, is_tag_list_available=True) == 0
+
+
+def test_should_skip_views_when_budget_runs_out(connexion_app_instance):
+    warm_up = WarmUp(views=[{}, {"binning": "week"}], budget_seconds=0)
+    result = warm_up.run(connexion_app_instance.app)
+    assert (result["cached"], result["failed"], result["skipped"]) == (0, 0, 2)
+
+
+def test_should_count_invalid_views_as_failed(connexion_app_instance):
+    warm_up = WarmUp(views=[{"binning": "hour"}, {}], top_tags=0)
+    result = warm_up.run(connexion_app_instance.app)
+    assert (result["cached"], result["failed"], result["skipped"]) == (1, 1, 0)
+
+
+def test_should_warm_up_in_background_and_report_it(
+    connexion_app_instance, httpx_test_client
+):
+    app = connexion_app_instance.app
+    warm_up = WarmUp(views=[{}])
+    app.extensions["warm_up"] = warm_up
+    assert warm_up.start(app)
+    warm_up.join(timeout=30)
+    metrics = httpx_test_client.get("/api/metrics").json()["warm_up"]
+    assert metrics["running"] is False
+    # the default view and the views of all 3 tags
+    assert metrics["last"]["cached"] == 4
+    assert get_dashboard(httpx_test_client)["view"] == DEFAULT_VIEW
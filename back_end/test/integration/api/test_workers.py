@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from job_tracker.api import tags
+from job_tracker.workers import wsgi_workers
+
+N_REQUESTS = 20
+
+
+class ConcurrentTagCounts:
+    """Tag counting waiting until `threads` requests count tags at a time,
+    records the peak number of requests counting tags at a time
+    """
+
+    def __init__(self, tag_counts, threads: int) -> None:
+        self.tag_counts = tag_counts
+        self.threads = threads
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._all_active = threading.Event()
+
+    def __call__(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            if self.active == self.threads:
+                self._all_active.set()
+        try:
+            # Only times out if fewer requests are served at a time
+            assert self._all_active.wait(timeout=30)
+            return self.tag_counts()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def concurrent_counts(monkeypatch):
+    def patch(threads):
+        counts = ConcurrentTagCounts(tags.tag_counts, threads)
+        monkeypatch.setattr(tags, "tag_counts", counts)
+        return counts
+
+    return patch
+
+
+def get_concurrently(client):
+    # The middleware stack of the app (and its pool of threads)
+    # is built by the first request
+    assert client.get("/api/metrics").status_code == 200
+    with ThreadPoolExecutor(N_REQUESTS) as executor:
+        return list(
+            executor.map(
+                lambda _: client.get("/api/tags", params={"counts": "true"}),
+                range(N_REQUESTS),
+            )
+        )
+
+
+@pytest.mark.parametrize("workers", [N_REQUESTS, N_REQUESTS // 2])
+def test_should_serve_requests_in_configured_number_of_threads(
+    connexion_app_instance, httpx_test_client, concurrent_counts, workers
+):
+    connexion_app_instance.app.config["WSGI_WORKERS"] = workers
+    counts = concurrent_counts(workers)
+    responses = get_concurrently(httpx_test_client)
+    assert [response.status_code for response in responses] == [200] * N_REQUESTS
+    assert counts.peak == workers
+
+
+@pytest.mark.parametrize(
+    "config, expected",
+    [
+        ({"WSGI_WORKERS": 7}, 7),
+        # SQLAlchemy's QueuePool: 5 connections and 10 more under load
+        ({}, 15),
+        ({"SQLALCHEMY_ENGINE_OPTIONS": {"pool_size": 3, "max_overflow": 2}}, 5),
+        (
+            {
+                "SQLALCHEMY_ENGINE_OPTIONS": {"max_overflow": -1},
+                "UNLIMITED_POOL_WSGI_WORKERS": 12,
+            },
+            12,
+        ),
+    ],
+)
+def test_should_serve_requests_in_as_many_threads_as_database_connections(
+    start_app, tmp_path, config, expected
+):
+    conxn_app = start_app(f"sqlite:///{tmp_path / 'workers.db'}", **config)
+    assert wsgi_workers(conxn_app.app) == expected
+
+
+def test_should_not_limit_threads_by_in_memory_database(start_app):
+    conxn_app = start_app("sqlite://", UNLIMITED_POOL_WSGI_WORKERS=12)
+    assert wsgi_workers(conxn_app.app) == 12
@@ -0,0 +1,40 @@
+from datetime import date
+
+import pytest
+from flask import Flask, json
+
+from job_tracker.api.date_helpers import Interval
+from job_tracker.api.query_cost import count_bins, iter_json
+from job_tracker.api.statistics import bins_range
+
+RANGES = [
+    (date(2024, 1, 1), date(2024, 1, 1)),
+    (date(2023, 12, 31), date(2024, 1, 1)),
+    (date(2012, 6, 18), date(2024, 3, 31)),
+    (date(2023, 9, 13), date(2024, 1, 10)),
+    (date(2023, 2, 28), date(2023, 3, 1)),
+]
+
+
+@pytest.mark.parametrize("binning", list(Interval))
+@pytest.mark.parametrize("start_date, end_date", RANGES)
+def test_should_count_bins_of_range(start_date, end_date, binning):
+    assert count_bins(start_date, end_date, binning) == len(
+        bins_range(start_date, end_date, binning)
+    )
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        [],
+        [{"date": "2024-01-01", "count": 1}] * 3,
+        [{"date": f"2024-01-{day:02}", "count": day} for day in range(1, 32)],
+        {"series": [{"name": "Java", "data": list(range(25))}], "other": None},
+        {"results": {"b": list(range(10)), "a": [1.5, "x"]}},
+    ],
+)
+def test_should_stream_the_same_json(value):
+    app = Flask(__name__)
+    with app.app_context():
+        assert "".join(iter_json(value, chunk_items=4)) == json.dumps(value)
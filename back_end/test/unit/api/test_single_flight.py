@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from job_tracker.api.single_flight import SingleFlight
+
+N_REQUESTS = 8
+
+
+def run_concurrently(flights, key, compute, n=N_REQUESTS, **kwargs):
+    with ThreadPoolExecutor(n) as executor:
+        futures = [
+            executor.submit(flights.do, key, compute, **kwargs) for _ in range(n)
+        ]
+        return [future.result() for future in futures]
+
+
+def blocked_compute(started, release):
+    """Returns compute() counting its calls and returning after release is set"""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"calls": len(calls)}
+
+    return compute, calls
+
+
+def test_should_compute_once_for_concurrent_requests():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    compute, calls = blocked_compute(started, release)
+    threading.Timer(0.2, release.set).start()
+    results = run_concurrently(flights, "key", compute)
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.metrics() == {
+        "in_flight": 0,
+        "computed": 1,
+        "coalesced": N_REQUESTS - 1,
+        "timed_out": 0,
+    }
+
+
+def test_should_compute_every_key_and_later_requests_again():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("b", lambda: 2) == 2
+    assert flights.do("a", lambda: 3) == 3
+    assert flights.metrics()["computed"] == 3
+
+
+def test_should_share_exceptions():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    compute, calls = blocked_compute(started, release)
+
+    def failing():
+        compute()
+        raise RuntimeError("database offline")
+
+    threading.Timer(0.2, release.set).start()
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(flights.do, "key", failing) for _ in range(2)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert len(calls) == 1
+    assert flights.metrics()["in_flight"] == 0
+
+
+def test_should_compute_on_its_own_after_timeout():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    compute, calls = blocked_compute(started, release)
+    with ThreadPoolExecutor(1) as executor:
+        stuck = executor.submit(flights.do, "key", compute, timeout=0.2)
+        started.wait(5)
+        # Joins the stuck computation and gives up after its deadline
+        release_later = threading.Timer(0.5, release.set)
+        release_later.start()
+        assert flights.do("key", lambda: "own") == "own"
+        # Requests arriving after the deadline start a new computation
+        assert flights.do("key", lambda: "new") == "new"
+        assert stuck.result() == {"calls": 1}
+    assert flights.metrics() == {
+        "in_flight": 0,
+        "computed": 2,
+        "coalesced": 0,
+        "timed_out": 1,
+    }
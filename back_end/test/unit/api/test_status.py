@@ -25,6 +25,7 @@ def connexion_app_instance():
     class TestConfig(BaseConfig):
         TESTING = True
         SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_fpath}"
+        WARM_UP = False
 
     conxn_app = create_app(custom_config=TestConfig)
 
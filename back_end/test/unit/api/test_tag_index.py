@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from job_tracker.api.tag_index import Bitmap
+
+rng = np.random.default_rng(0)
+# Sparse and dense chunks (kept as arrays and as bit arrays), ids in many chunks
+ID_SETS = {
+    "empty": np.empty(0, dtype=np.int64),
+    "sparse": rng.choice(1 << 24, size=3000, replace=False),
+    "dense": rng.choice(1 << 17, size=60000, replace=False),
+    "mixed": np.concatenate(
+        [np.arange(10000), rng.choice(np.arange(1 << 16, 1 << 20), size=5000)]
+    ),
+}
+
+
+@pytest.mark.parametrize("name", ID_SETS)
+def test_should_keep_ids(name):
+    ids = ID_SETS[name]
+    bitmap = Bitmap.from_ids(ids)
+    assert np.array_equal(bitmap.to_array(), np.unique(ids))
+    assert len(bitmap) == np.unique(ids).size
+
+
+@pytest.mark.parametrize("first", ID_SETS)
+@pytest.mark.parametrize("second", ID_SETS)
+def test_should_intersect_and_join_like_sets(first, second):
+    a, b = ID_SETS[first], ID_SETS[second]
+    intersection = Bitmap.from_ids(a) & Bitmap.from_ids(b)
+    union = Bitmap.from_ids(a) | Bitmap.from_ids(b)
+    assert np.array_equal(intersection.to_array(), np.intersect1d(a, b))
+    assert len(intersection) == np.intersect1d(a, b).size
+    assert np.array_equal(union.to_array(), np.union1d(a, b))
+
+
+def test_should_compress_dense_chunks():
+    bitmap = Bitmap.from_ids(np.arange(1 << 16))
+    assert bitmap.containers[0].nbytes == 8192
+    assert len(bitmap) == 1 << 16
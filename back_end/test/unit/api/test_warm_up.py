@@ -0,0 +1,14 @@
+from job_tracker.api.dashboard import DEFAULT_VIEW
+from job_tracker.api.warm_up import hot_views
+
+
+def test_should_list_views_of_parameters_and_tags_once():
+    views = hot_views(
+        [{}, {"binning": "month"}, {"tags": ["Python"]}], ["Python", "Java"]
+    )
+    assert views == [
+        DEFAULT_VIEW,
+        {**DEFAULT_VIEW, "binning": "month"},
+        {**DEFAULT_VIEW, "tags": ["Python"]},
+        {**DEFAULT_VIEW, "tags": ["Java"]},
+    ]
@@ -0,0 +1,36 @@
+import pytest
+
+from job_tracker.fulltext import MAX_SEARCH_TERMS, search_document, search_terms
+
+
+@pytest.mark.parametrize(
+    "title, company, expected",
+    [
+        (
+            "Młodszy Programista (Java)",
+            "Łódź Software Sp. z o.o.",
+            "mlodszy programista java lodz software sp z o o",
+        ),
+        ("Kierowca wózka widłowego", None, "kierowca wozka widlowego"),
+        ("Księgowa / Księgowy", "ŻÓŁW S.A.", "ksiegowa ksiegowy zolw s a"),
+    ],
+)
+def test_should_fold_offer_into_search_document(title, company, expected):
+    assert search_document(title, company) == expected
+
+
+@pytest.mark.parametrize(
+    "phrase, expected",
+    [
+        ("Programista Łódź", ["programista", "lodz"]),
+        ('"java" AND -python*', ["java", "and", "python"]),
+        ("  ", []),
+        (None, []),
+    ],
+)
+def test_should_split_phrase_into_search_terms(phrase, expected):
+    assert search_terms(phrase) == expected
+
+
+def test_should_limit_number_of_search_terms():
+    assert len(search_terms("word " * 50)) == MAX_SEARCH_TERMS
@@ -0,0 +1,90 @@
+import pytest
+
+from job_tracker.parsers import (
+    CONTRACT_TYPES,
+    JOB_LEVELS,
+    contract_type_id,
+    job_level_id,
+    parse_contract_types,
+    parse_job_levels,
+    parse_salary,
+)
+
+
+class TestJobLevels:
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("Młodszy specjalista (Junior)", ["junior"]),
+            (
+                "Specjalista (Mid / Regular), Starszy specjalista (Senior)",
+                ["regular", "senior"],
+            ),
+            ("Kierownik / Koordynator, Menedżer", ["team manager", "manager"]),
+            ("Praktykant / Stażysta", ["trainee"]),
+            ("junior", ["junior"]),
+            ("  SENIOR ", ["senior"]),
+        ],
+    )
+    def test_should_parse_known_levels(self, raw, expected):
+        assert parse_job_levels(raw) == expected
+
+    @pytest.mark.parametrize("raw", ["", None, "Czarodziej"])
+    def test_should_skip_unknown_levels(self, raw):
+        assert parse_job_levels(raw) == []
+
+    def test_should_not_repeat_levels(self):
+        assert parse_job_levels("Specjalista (Mid / Regular), regular") == ["regular"]
+
+
+class TestContractTypes:
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("Pełny etat", ["full time"]),
+            (" Część etatu", ["part time"]),
+            (
+                "Pełny etat, Część etatu, Dodatkowa / tymczasowa",
+                ["full time", "part time", "temporary"],
+            ),
+            ("full time", ["full time"]),
+            ("full_time", ["full time"]),
+        ],
+    )
+    def test_should_parse_known_contract_types(self, raw, expected):
+        assert parse_contract_types(raw) == expected
+
+
+def test_ids_should_be_positive_and_unique():
+    assert sorted(job_level_id(name) for name in JOB_LEVELS) == list(
+        range(1, len(JOB_LEVELS) + 1)
+    )
+    assert sorted(contract_type_id(name) for name in CONTRACT_TYPES) == list(
+        range(1, len(CONTRACT_TYPES) + 1)
+    )
+
+
+class TestSalary:
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("5000 USD/mo", (5000, 5000, "USD", None, "month")),
+            (
+                "10\u00a0000–14\u00a0000\u00a0zł brutto / mies.",
+                (10000, 14000, "PLN", True, "month"),
+            ),
+            (
+                "12 500,50 - 9 000 zł netto / mies.",
+                (9000, 12500.5, "PLN", False, "month"),
+            ),
+            ("120–150 zł / godz.", (120, 150, "PLN", None, "hour")),
+            ("4000 € gross / month", (4000, 4000, "EUR", True, "month")),
+            ("7000", (7000, 7000, None, None, None)),
+        ],
+    )
+    def test_should_parse_salary(self, raw, expected):
+        assert tuple(parse_salary(raw)) == expected
+
+    @pytest.mark.parametrize("raw", [None, "", "do negocjacji", "zł 5000"])
+    def test_should_skip_descriptions_without_amount(self, raw):
+        assert parse_salary(raw) is None
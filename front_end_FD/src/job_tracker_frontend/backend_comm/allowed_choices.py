@@ -1,17 +1,9 @@
-import logging
-
-from job_tracker_frontend.backend_comm import make_backend_call
-from job_tracker_frontend.backend_comm.tags import get_tags
-
-logger = logging.getLogger(__name__)
-
 bins = ["day", "month", "year"]
 
-try:
-    tags = get_tags()
-except Exception:  # pylint: disable=broad-exception-caught
-    logger.error("Failed to get list of tags from the backend")
-    tags = []
+# Tags are not read from the backend when the app starts, the dropdown
+# is filled with the ones returned by the dashboard endpoint on the first
+# load of the statistics page (and updated on every submit).
+tags: list[str] = []
 
 contract_types = ["Pełny etat", " Część etatu", " Dodatkowa / tymczasowa"]
 # contract_types = ["full time", "part time", "temporary"]
@@ -0,0 +1,63 @@
+import logging
+from datetime import datetime
+
+from job_tracker_frontend.backend_comm import make_backend_call
+
+from .statistics import transform_data
+from .validation import check_inputs
+
+logger = logging.getLogger(__name__)
+
+
+def get_dashboard(
+    start_date: datetime,
+    end_date: datetime,
+    binning: str,
+    tags,
+    contract_type,
+    job_mode,
+    job_level,
+):
+    """Gets statistics of the view and the list of tags in one request
+
+    Returns
+    -------
+    (statistics as DataFrame, names of tags - most common first)
+    """
+
+    try:
+        check_inputs(
+            start_date, end_date, binning, tags, contract_type, job_mode, job_level
+        )
+    except AttributeError as e:
+        logger.error("Invalid input data: %s", e)
+        raise AttributeError from e
+
+    mandatory_params = {
+        "start_date": start_date.date().isoformat(),
+        "end_date": end_date.date().isoformat(),
+        "binning": binning,
+    }
+    # Empty values are sent as well, otherwise the backend
+    # would use the ones of the default view.
+    optional_params = {
+        "tags": tags or [],
+        "contract_type": contract_type or "",
+        "job_level": job_level or "",
+    }
+    # TODO: job_mode is not yet collected when webpage offers are analysed
+    #       (the dashboard endpoint does not accept it)
+
+    return make_backend_call(
+        "dashboard",
+        mandatory_params,
+        optional_params,
+        data_conditioning=transform_dashboard,
+    )
+
+
+def transform_dashboard(json_data):
+    return (
+        transform_data(json_data["statistics"]),
+        [tag["name"] for tag in json_data["tags"]],
+    )
@@ -32,12 +32,11 @@ from dash import Dash, Input, Output, State, no_update
 from dash.html import Div, Li, Ul
 from flask import Flask, render_template
 
+from job_tracker_frontend.backend_comm.dashboard import get_dashboard
 from job_tracker_frontend.backend_comm.exceptions import (
     APIException,
     BackendNotAvailableException,
 )
-from job_tracker_frontend.backend_comm.statistics import get_stats
-from job_tracker_frontend.backend_comm.tags import get_tags
 
 from .ui import chart1, stats_criteria_menu
 
@@ -159,7 +158,9 @@ def init_dash_app(master_app: Flask) -> Flask:
             # TODO: job_mode is not yet collected when webpage offers are analysed
             #       see: Advertisement class in results_page module
             job_mode = None
-            stats = get_stats(
+            # Statistics and tags are read in a single request
+            # (on the first load and on every submit).
+            stats, retreived_tags = get_dashboard(
                 start_date,
                 end_date,
                 binning,
@@ -168,7 +169,6 @@ def init_dash_app(master_app: Flask) -> Flask:
                 job_mode,
                 job_level,
             )
-            retreived_tags = get_tags()
         except AttributeError:
             # show pop-up -- invalid parameters
             # Ideally this should never happen